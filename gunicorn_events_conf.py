@@ -0,0 +1,25 @@
+import multiprocessing
+
+# Serves GET /api/jobs/<job_id>/events (nginx routes the streams here).
+# Event streams are long-lived and almost always idle, so each process runs
+# gevent and parks thousands of them; the sync workers in gunicorn_conf.py
+# would be pinned by a single stream.
+
+# Server socket
+bind = "0.0.0.0:5001"
+
+# Worker processes
+workers = multiprocessing.cpu_count()
+worker_class = "gevent"
+worker_connections = 10000  # open streams per process
+timeout = 60
+keepalive = 75
+graceful_timeout = 30
+
+# Logging
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+# Process naming
+proc_name = "pdf-compression-events"
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from src.config import Config
-from src.database import init_database, create_default_plans
+from src.database import init_database
 from src.models.base import db
 
 @click.group()
@@ -61,6 +61,8 @@ def create_plans():
     app = create_db_app()
     with app.app_context():
         try:
+            # Plans were removed with the user models; fails with a message
+            from src.database import create_default_plans
             create_default_plans()
             click.echo("✅ Default plans created successfully")
         except Exception as e:
@@ -140,5 +142,81 @@ def status():
             click.echo(f"❌ Database status check failed: {str(e)}")
             sys.exit(1)
 
+@cli.command('migrate-storage')
+@click.option('--dry-run', is_flag=True, help='Report what would move without changing anything')
+def migrate_storage(dry_run):
+    """Move flat upload-folder files into the sharded storage layout"""
+    app = create_db_app()
+    with app.app_context():
+        try:
+            from src.services.file_management_service import FileManagementService
+            summary = FileManagementService(app.config.get('UPLOAD_FOLDER')).migrate_to_sharded_layout(dry_run=dry_run)
+            verb = "Would move" if dry_run else "Moved"
+            click.echo(f"✅ {verb} {summary['files_moved']} files, {summary['jobs_updated']} jobs updated")
+            for error in summary['errors']:
+                click.echo(f"   ⚠️  {error}")
+        except Exception as e:
+            click.echo(f"❌ Storage migration failed: {str(e)}")
+            sys.exit(1)
+
+@cli.command()
+def vacuum():
+    """Rebuild the SQLite file in SQLITE_AUTO_VACUUM mode (locks the database while it runs)"""
+    app = create_db_app()
+    with app.app_context():
+        try:
+            if db.engine.dialect.name != 'sqlite':
+                click.echo("❌ vacuum is only needed for SQLite databases")
+                sys.exit(1)
+            connection = db.engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                pages_before = cursor.execute('PRAGMA page_count').fetchone()[0]
+                # auto_vacuum can only change on an empty file or through a full VACUUM
+                cursor.executescript(f'PRAGMA auto_vacuum={Config.SQLITE_AUTO_VACUUM}; VACUUM;')
+                pages_after = cursor.execute('PRAGMA page_count').fetchone()[0]
+                mode = cursor.execute('PRAGMA auto_vacuum').fetchone()[0]
+            finally:
+                connection.close()
+            click.echo(f"✅ Vacuumed: {pages_before} -> {pages_after} pages, auto_vacuum={mode}")
+        except Exception as e:
+            click.echo(f"❌ Vacuum failed: {str(e)}")
+            sys.exit(1)
+
+@cli.command('jobs')
+@click.option('--status', type=click.Choice(['pending', 'processing', 'completed', 'failed']), help='Only jobs with this status')
+@click.option('--task-type', help='Only jobs of this type')
+@click.option('--since', type=click.DateTime(), help='Created at or after (UTC)')
+@click.option('--until', type=click.DateTime(), help='Created before (UTC)')
+@click.option('--limit', default=50, show_default=True, help='Jobs per page')
+@click.option('--cursor', help='Continue from the cursor printed by the previous page')
+@click.option('--oldest-first', is_flag=True, help='Order by creation time ascending')
+@click.option('--json', 'as_json', is_flag=True, help='Print the page as JSON')
+def list_jobs(status, task_type, since, until, limit, cursor, oldest_first, as_json):
+    """List jobs one page at a time (keyset-paginated, fast at any depth)"""
+    app = create_db_app()
+    with app.app_context():
+        try:
+            from src.jobs import JobOperations
+            jobs, next_cursor = JobOperations().query_jobs(
+                status=status, task_type=task_type, created_after=since, created_before=until,
+                limit=limit, cursor=cursor, newest_first=not oldest_first
+            )
+            if as_json:
+                import json
+                click.echo(json.dumps({'jobs': [job.to_status_dict() for job in jobs],
+                                       'next_cursor': next_cursor}, indent=2))
+                return
+            for job in jobs:
+                click.echo(f"{job.created_at.isoformat(sep=' ', timespec='seconds')}  {job.status:<10}  "
+                           f"{job.task_type:<28}  {job.progress or 0:>5.1f}%  {job.job_id}")
+            click.echo(f"📄 {len(jobs)} jobs" + (f", next page: --cursor {next_cursor}" if next_cursor else ", last page"))
+        except ValueError as e:
+            click.echo(f"❌ {str(e)}")
+            sys.exit(1)
+        except Exception as e:
+            click.echo(f"❌ Job listing failed: {str(e)}")
+            sys.exit(1)
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
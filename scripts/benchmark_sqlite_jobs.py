@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark job-status throughput on SQLite with and without the engine profile.
+
+Several processes (like web and Celery workers), each with a few threads,
+run the job lifecycle against one database file: create the job, mark it
+processing, report progress, poll its status and complete it, each step in
+its own transaction. Reported per mode: jobs/sec and how many steps failed
+with "database is locked".
+
+"default" is the engine as configured before the profile (rollback journal,
+sqlite3's own 5s lock wait); "profile" adds WAL, busy_timeout, synchronous,
+mmap/cache sizes and the pool from src/database/sqlite_profile.py.
+
+Usage:
+    python scripts/benchmark_sqlite_jobs.py [--processes 4] [--threads 4] [--jobs 100]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from src.config.config import BaseConfig  # noqa: E402
+from src.database.sqlite_profile import configure_sqlite_engine, sqlite_engine_options  # noqa: E402
+from src.models import Job  # noqa: E402
+
+jobs_table = Job.__table__
+
+
+def make_engine(url, profile):
+    options = dict(BaseConfig.SQLALCHEMY_ENGINE_OPTIONS)
+    if not profile:
+        return create_engine(url, **options)
+    engine = create_engine(url, **sqlite_engine_options(url, options))
+    configure_sqlite_engine(engine)
+    return engine
+
+
+def run_step(engine, statement, counters):
+    """Run one statement in its own transaction; False if it hit a lock"""
+    try:
+        with engine.begin() as conn:
+            conn.execute(statement)
+        return True
+    except OperationalError as e:
+        if 'locked' not in str(e):
+            raise
+        counters['locked'] += 1
+        return False
+
+
+def job_lifecycle(engine, counters):
+    job_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    steps = [
+        jobs_table.insert().values(job_id=job_id, task_type='compress', status='pending',
+                                   input_data={'file_size': 1024}, progress=0.0,
+                                   created_at=now, updated_at=now),
+        update(jobs_table).where(jobs_table.c.job_id == job_id)
+        .values(status='processing', updated_at=datetime.utcnow()),
+        update(jobs_table).where(jobs_table.c.job_id == job_id)
+        .values(progress=50.0, updated_at=datetime.utcnow()),
+        select(jobs_table.c.status, jobs_table.c.progress).where(jobs_table.c.job_id == job_id),
+        update(jobs_table).where(jobs_table.c.job_id == job_id)
+        .values(status='completed', progress=100.0, result={'output_path': f'/tmp/{job_id}.pdf'},
+                updated_at=datetime.utcnow()),
+    ]
+    for statement in steps:
+        if not run_step(engine, statement, counters):
+            return False
+    return True
+
+
+def worker(url, profile, threads, jobs, results):
+    engine = make_engine(url, profile)
+    counters = {'completed': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def loop():
+        local = {'completed': 0, 'locked': 0}
+        for _ in range(jobs):
+            if job_lifecycle(engine, local):
+                local['completed'] += 1
+        with lock:
+            for key in counters:
+                counters[key] += local[key]
+
+    pool = [threading.Thread(target=loop) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    engine.dispose()
+    results.put(counters)
+
+
+def benchmark(profile, processes, threads, jobs):
+    directory = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    engine = make_engine(url, profile)
+    jobs_table.create(engine)
+    engine.dispose()
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=worker, args=(url, profile, threads, jobs, results))
+               for _ in range(processes)]
+    start = time.perf_counter()
+    for process in workers:
+        process.start()
+    totals = {'completed': 0, 'locked': 0}
+    for _ in workers:
+        for key, value in results.get().items():
+            totals[key] += value
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+    return totals, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="threads per process")
+    parser.add_argument("--jobs", type=int, default=100, help="jobs per thread")
+    args = parser.parse_args()
+
+    attempted = args.processes * args.threads * args.jobs
+    print(f"{args.processes} processes x {args.threads} threads x {args.jobs} jobs = {attempted} jobs")
+    print(f"{'mode':<10}{'jobs':>8}{'seconds':>10}{'jobs/s':>10}{'locked':>9}")
+    for name, profile in (("default", False), ("profile", True)):
+        totals, elapsed = benchmark(profile, args.processes, args.threads, args.jobs)
+        print(f"{name:<10}{totals['completed']:>8}{elapsed:>10.2f}"
+              f"{totals['completed'] / elapsed:>10.1f}{totals['locked']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Load test for job event streams (GET /api/jobs/<job_id>/events).
+
+Opens many concurrent SSE connections to one events node, all watching the
+same job, then publishes progress events on the job's Redis channel (as a
+task reporting progress would) and measures how long each event takes to
+reach every subscriber. Reported: streams opened, streams that failed or
+dropped, and fan-out latency percentiles per event.
+
+The job must exist and not be finished (its stream would close at once).
+Run the events workers as in production:
+
+    gunicorn --config gunicorn_events_conf.py app:app
+
+Usage:
+    python scripts/loadtest_job_events.py --job-id <id> [--url http://localhost:5001]
+        [--connections 5000] [--ramp 1000] [--events 10] [--interval 1.0]
+        [--redis-url redis://localhost:6379/0]
+"""
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import redis.asyncio as aioredis  # noqa: E402
+
+from src.services.job_status_cache import JobStatusCache  # noqa: E402
+
+
+class Subscriber:
+    """One SSE connection; records when each progress value arrived"""
+
+    def __init__(self):
+        self.received = {}
+        self.connected = False
+        self.failed = False
+
+    async def run(self, host, port, path, ready):
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            if b' 200 ' not in status_line:
+                raise ConnectionError(status_line.decode().strip())
+            while (await reader.readline()).strip():
+                pass  # headers
+
+            async for line in reader:
+                if not line.startswith(b'data: '):
+                    continue
+                data = json.loads(line[6:])
+                if not self.connected:
+                    self.connected = True
+                    ready.release()
+                self.received.setdefault(data.get('progress'), time.perf_counter())
+        except Exception:
+            if not self.connected:
+                ready.release()
+            self.failed = True
+
+
+def raise_open_file_limit(connections):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, connections + 1024)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    path = f"/api/jobs/{args.job_id}/events"
+    subscribers = [Subscriber() for _ in range(args.connections)]
+    ready = asyncio.Semaphore(0)
+
+    start = time.perf_counter()
+    tasks = []
+    for i, subscriber in enumerate(subscribers):
+        tasks.append(asyncio.create_task(subscriber.run(url.hostname, url.port or 80, path, ready)))
+        if args.ramp and (i + 1) % args.ramp == 0:
+            await asyncio.sleep(1)
+    for _ in subscribers:
+        await ready.acquire()
+    connected = sum(subscriber.connected for subscriber in subscribers)
+    print(f"{connected}/{args.connections} streams open in {time.perf_counter() - start:.1f}s")
+
+    client = aioredis.from_url(args.redis_url)
+    channel = f"{JobStatusCache.CHANNEL_PREFIX}{args.job_id}"
+    print(f"{'event':>6}{'received':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for event in range(args.events):
+        # Unique progress values, so each event is a change the stream forwards
+        progress = 1.0 + event / 1000
+        sent_at = time.perf_counter()
+        await client.publish(channel, json.dumps({'job_id': args.job_id, 'progress': progress}))
+        await asyncio.sleep(args.interval)
+
+        latencies = sorted((subscriber.received[progress] - sent_at) * 1000
+                           for subscriber in subscribers if progress in subscriber.received)
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{event + 1:>6}{len(latencies):>10}{statistics.median(latencies):>9.1f}"
+                  f"{p99:>9.1f}{latencies[-1]:>9.1f}")
+        else:
+            print(f"{event + 1:>6}{0:>10}")
+    await client.aclose()
+
+    dropped = sum(subscriber.failed for subscriber in subscribers)
+    print(f"failed or dropped streams: {dropped}")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--job-id", required=True, help="pending or processing job to watch")
+    parser.add_argument("--url", default="http://localhost:5001", help="events node")
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--ramp", type=int, default=1000, help="new connections per second (0 = all at once)")
+    parser.add_argument("--events", type=int, default=10, help="progress events to publish")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between events")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    args = parser.parse_args()
+
+    raise_open_file_limit(args.connections)
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
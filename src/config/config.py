@@ -25,6 +25,42 @@ class BaseConfig:
         'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 20)),
         'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 0)),
     }
+    # SQLite engine profile (see src/database/sqlite_profile.py), applied to
+    # every connection of an SQLite database
+    SQLITE_PROFILE_ENABLED = os.environ.get('SQLITE_PROFILE_ENABLED', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', 256))
+    SQLITE_CACHE_SIZE_MB = int(os.environ.get('SQLITE_CACHE_SIZE_MB', 64))
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 5))
+    # auto_vacuum only takes effect on a new database file (or after
+    # `manage_db.py vacuum`); INCREMENTAL lets cleanup hand freed pages back
+    SQLITE_AUTO_VACUUM = os.environ.get('SQLITE_AUTO_VACUUM', 'INCREMENTAL').upper()
+    # Free pages returned to the filesystem after each cleanup run (0 = off)
+    SQLITE_INCREMENTAL_VACUUM_PAGES = int(os.environ.get('SQLITE_INCREMENTAL_VACUUM_PAGES', 0))
+    # PostgreSQL engine profile (see src/database/postgres_profile.py), used
+    # when DATABASE_URL is a postgresql:// URL
+    POSTGRES_PROFILE_ENABLED = os.environ.get('POSTGRES_PROFILE_ENABLED', 'true').lower() == 'true'
+    POSTGRES_POOL_SIZE = int(os.environ.get('POSTGRES_POOL_SIZE', 10))
+    POSTGRES_MAX_OVERFLOW = int(os.environ.get('POSTGRES_MAX_OVERFLOW', 10))
+    POSTGRES_CONNECT_TIMEOUT = int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', 10))
+    POSTGRES_STATEMENT_TIMEOUT_MS = int(os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 30000))
+    POSTGRES_LOCK_TIMEOUT_MS = int(os.environ.get('POSTGRES_LOCK_TIMEOUT_MS', 5000))
+    POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.environ.get('POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT_MS', 60000))
+    # Job progress is buffered per job and written in batches this often
+    # (0 = write every progress report through)
+    JOB_PROGRESS_FLUSH_SECONDS = float(os.environ.get('JOB_PROGRESS_FLUSH_SECONDS', 2))
+    # Job status polls are served from Redis (falls back to the database)
+    JOB_STATUS_CACHE_ENABLED = os.environ.get('JOB_STATUS_CACHE_ENABLED', 'true').lower() == 'true'
+    JOB_STATUS_CACHE_TTL_SECONDS = int(os.environ.get('JOB_STATUS_CACHE_TTL_SECONDS', 900))
+    JOB_STATUS_CACHE_TIMEOUT_SECONDS = float(os.environ.get('JOB_STATUS_CACHE_TIMEOUT_SECONDS', 0.2))
+    JOB_STATUS_BATCH_MAX = int(os.environ.get('JOB_STATUS_BATCH_MAX', 100))
+    # Job results larger than this are stored in job_results, not on the jobs row
+    JOB_RESULT_INLINE_MAX_BYTES = int(os.environ.get('JOB_RESULT_INLINE_MAX_BYTES', 16384))
+    # Server-sent job events (GET /jobs/<job_id>/events)
+    JOB_EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('JOB_EVENTS_HEARTBEAT_SECONDS', 15))
+    JOB_EVENTS_MAX_SECONDS = float(os.environ.get('JOB_EVENTS_MAX_SECONDS', 3600))
     
 
     
@@ -32,6 +68,43 @@ class BaseConfig:
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', './uploads/dev')
     MAX_FILE_AGE = timedelta(hours=int(os.environ.get('MAX_FILE_AGE_HOURS', 1)))
     MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_SIZE', 50 * 1024 * 1024))  # 50MB default
+    # Store files once per distinct content (SHA-256) with reference counts
+    CONTENT_ADDRESSED_STORAGE = os.environ.get('CONTENT_ADDRESSED_STORAGE', 'false').lower() == 'true'
+    # Where finished results live: 'local' (upload folder) or 's3' (any S3-compatible store)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').lower()
+    S3_BUCKET = os.environ.get('S3_BUCKET', '')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL', '')  # e.g. http://minio:9000
+    S3_REGION = os.environ.get('S3_REGION', '')
+    S3_MULTIPART_THRESHOLD_MB = int(os.environ.get('S3_MULTIPART_THRESHOLD_MB', 8))
+    S3_MULTIPART_CHUNK_MB = int(os.environ.get('S3_MULTIPART_CHUNK_MB', 8))
+    # How result downloads are sent: 'direct' (the app streams the file, with
+    # Range/ETag support) or 'accel' (nginx sends it via X-Accel-Redirect)
+    DOWNLOAD_MODE = os.environ.get('DOWNLOAD_MODE', 'direct').lower()
+    ACCEL_REDIRECT_PREFIX = os.environ.get('ACCEL_REDIRECT_PREFIX', '/protected-downloads/')
+    # Incremental cleanup: how often it runs, rows/files per batch and the
+    # wall-clock budget per run
+    CLEANUP_INTERVAL_MINUTES = int(os.environ.get('CLEANUP_INTERVAL_MINUTES', 10))
+    CLEANUP_BATCH_SIZE = int(os.environ.get('CLEANUP_BATCH_SIZE', 200))
+    CLEANUP_TIME_BUDGET_SECONDS = float(os.environ.get('CLEANUP_TIME_BUDGET_SECONDS', 10))
+    # Job history archival: cleanup moves finished jobs older than
+    # JOB_ARCHIVE_AFTER_HOURS to per-day archives (ndjson files or tables)
+    # instead of deleting them (see src/services/job_archive.py)
+    JOB_ARCHIVE_ENABLED = os.environ.get('JOB_ARCHIVE_ENABLED', 'false').lower() == 'true'
+    JOB_ARCHIVE_AFTER_HOURS = int(os.environ.get('JOB_ARCHIVE_AFTER_HOURS', 24))
+    JOB_ARCHIVE_BACKEND = os.environ.get('JOB_ARCHIVE_BACKEND', 'ndjson').lower()
+    JOB_ARCHIVE_DIR = os.environ.get('JOB_ARCHIVE_DIR', './data/job_archive')
+    # Disk budget: total and per-tier limits for stored files (0/empty =
+    # unlimited) and free space to keep on the volume. New uploads are
+    # refused with 503 + Retry-After once finished jobs can't be evicted.
+    DISK_BUDGET_MB = int(os.environ.get('DISK_BUDGET_MB', 0))
+    DISK_TIER_BUDGETS_MB = os.environ.get('DISK_TIER_BUDGETS_MB', '')
+    DISK_MIN_FREE_MB = int(os.environ.get('DISK_MIN_FREE_MB', 1024))
+    DISK_RETRY_AFTER_SECONDS = int(os.environ.get('DISK_RETRY_AFTER_SECONDS', 120))
+    # Scratch tier for short-lived temp files, normally a tmpfs such as
+    # /dev/shm (empty = disabled). Files that don't fit go to disk.
+    SCRATCH_DIR = os.environ.get('SCRATCH_DIR', '')
+    SCRATCH_MAX_MB = int(os.environ.get('SCRATCH_MAX_MB', 256))
     
     # Compression settings
     COMPRESSION_LEVELS = {
@@ -1,4 +1,6 @@
 """Database initialization and setup utilities"""
+from sqlalchemy import inspect, text
+
 from src.models.base import db
 from src.models import Job
 import logging
@@ -19,6 +21,7 @@ def init_database(app):
 
             # Create all tables
             db.create_all()
+            upgrade_schema()
             print("Database tables created successfully")
 
             # Verify
@@ -35,6 +38,45 @@ def init_database(app):
             traceback.print_exc()
             raise
 
+# Indexes replaced by wider ones in the models, dropped on upgrade
+RETIRED_INDEXES = {
+    'jobs': ['idx_job_status_created', 'idx_job_task_type'],
+}
+
+
+def upgrade_schema():
+    """Add columns and indexes introduced after a table was first created.
+
+    ``create_all`` never alters existing tables, so nullable columns added to
+    the models later are appended here with ``ALTER TABLE ... ADD COLUMN``,
+    missing indexes are created and RETIRED_INDEXES are dropped.
+    Must be called inside an application context.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                logger.info(f"Added column {table.name}.{column.name} ({col_type})")
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    logger.info(f"Created index {index.name} on {table.name}")
+            for name in RETIRED_INDEXES.get(table.name, []):
+                if name in indexes:
+                    conn.execute(text(f'DROP INDEX {name}'))
+                    logger.info(f"Dropped index {name} on {table.name}")
+
+
 def reset_database(app):
     """Reset database - WARNING: This will delete all data"""
     with app.app_context():
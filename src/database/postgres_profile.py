@@ -0,0 +1,83 @@
+"""PostgreSQL engine profile for the jobs database
+
+Used when DATABASE_URL points at PostgreSQL (psycopg2). Unlike SQLite,
+every web and Celery process holds its own pool of server connections, so
+the pool is sized explicitly and connections are bounded on the server:
+
+- ``pool_size`` / ``max_overflow``: connections per process (the
+  SQLite-era default of no overflow would make bursts wait on the pool);
+  ``pool_timeout`` and ``pool_recycle`` stay at DB_POOL_TIMEOUT and
+  DB_POOL_RECYCLE
+- ``statement_timeout`` / ``lock_timeout``: a stuck query or a lock wait
+  fails instead of holding a worker forever
+- ``idle_in_transaction_session_timeout``: a crashed request can't hold
+  row locks indefinitely
+- ``timezone=UTC``: job timestamps are naive UTC columns
+- TCP keepalives, and ``application_name`` to tell processes apart in
+  ``pg_stat_activity``
+
+Row locking (``FOR UPDATE`` / ``SKIP LOCKED``) is used by JobOperations on
+any backend; SQLite simply ignores it.
+"""
+import logging
+import os
+from typing import Any, Dict
+
+from flask import Flask
+from sqlalchemy.engine import make_url
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def is_postgres(uri: str) -> bool:
+    """True for a PostgreSQL database URI"""
+    return make_url(uri).get_backend_name() == 'postgresql'
+
+
+def postgres_server_settings() -> Dict[str, Any]:
+    """Session settings sent with every new connection"""
+    return {
+        'statement_timeout': Config.POSTGRES_STATEMENT_TIMEOUT_MS,
+        'lock_timeout': Config.POSTGRES_LOCK_TIMEOUT_MS,
+        'idle_in_transaction_session_timeout': Config.POSTGRES_IDLE_IN_TRANSACTION_TIMEOUT_MS,
+        'timezone': 'UTC',
+    }
+
+
+def postgres_engine_options(uri: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Engine options for ``uri`` with the PostgreSQL pool settings merged in
+
+    Other databases get ``options`` back unchanged.
+    """
+    if not is_postgres(uri):
+        return options
+    options = dict(options)
+    options['pool_size'] = Config.POSTGRES_POOL_SIZE
+    options['max_overflow'] = Config.POSTGRES_MAX_OVERFLOW
+    options.setdefault('pool_pre_ping', True)
+
+    connect_args = dict(options.get('connect_args', {}))
+    connect_args.setdefault('connect_timeout', Config.POSTGRES_CONNECT_TIMEOUT)
+    connect_args.setdefault('application_name', f"pdf_smaller:{os.getpid()}")
+    connect_args.setdefault('options', ' '.join(
+        f"-c {name}={value}" for name, value in postgres_server_settings().items()
+    ))
+    connect_args.setdefault('keepalives', 1)
+    connect_args.setdefault('keepalives_idle', 60)
+    connect_args.setdefault('keepalives_interval', 10)
+    connect_args.setdefault('keepalives_count', 3)
+    options['connect_args'] = connect_args
+    return options
+
+
+def init_postgres_profile(app: Flask):
+    """Merge the pool settings into the app config; call before ``db.init_app``"""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if uri and is_postgres(uri) and Config.POSTGRES_PROFILE_ENABLED:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = postgres_engine_options(
+            uri, app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        )
+        logger.info(f"PostgreSQL profile: pool_size={Config.POSTGRES_POOL_SIZE}, "
+                    f"max_overflow={Config.POSTGRES_MAX_OVERFLOW}")
@@ -0,0 +1,137 @@
+"""SQLite engine profile for the shared jobs database
+
+Every web worker and Celery worker writes to one SQLite file. With the
+default rollback journal a writer blocks all readers and a busy connection
+fails at once with "database is locked". The profile applied here:
+
+- ``journal_mode=WAL``: readers no longer block the writer (or vice versa)
+- ``busy_timeout``: wait for the write lock instead of failing immediately
+- ``synchronous=NORMAL``: fsync at checkpoints rather than every commit;
+  safe in WAL mode (a power cut can lose the last commits, never corrupt)
+- ``mmap_size`` / ``cache_size``: serve hot pages from memory
+- a QueuePool sized for the threads of one process, since WAL lets their
+  reads run side by side while writes still go one at a time
+- ``auto_vacuum=INCREMENTAL`` (new files only): pages freed by cleanup can
+  be handed back to the filesystem a few at a time with
+  ``incremental_vacuum()`` instead of a full ``VACUUM``
+
+The pragmas are set on every new DBAPI connection. In-memory databases
+(tests) get the profile without WAL, which they do not support.
+"""
+import logging
+from typing import Any, Dict
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def is_sqlite_file(uri: str) -> bool:
+    """True for an on-disk SQLite database URI"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def sqlite_pragmas(in_memory: bool = False) -> Dict[str, Any]:
+    """PRAGMA name -> value, in the order they are applied"""
+    pragmas = {
+        # Has to come first: it can't change once the file has tables
+        'auto_vacuum': Config.SQLITE_AUTO_VACUUM,
+        'journal_mode': Config.SQLITE_JOURNAL_MODE,
+        'busy_timeout': Config.SQLITE_BUSY_TIMEOUT_MS,
+        'synchronous': Config.SQLITE_SYNCHRONOUS,
+        'mmap_size': Config.SQLITE_MMAP_SIZE_MB * MB,
+        # Negative cache_size is in KiB rather than pages
+        'cache_size': -Config.SQLITE_CACHE_SIZE_MB * 1024,
+        'temp_store': 'MEMORY',
+    }
+    if in_memory:
+        pragmas.pop('journal_mode')
+    return pragmas
+
+
+def sqlite_engine_options(uri: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Engine options for ``uri`` with the SQLite pool settings merged in
+
+    Only on-disk databases are changed; in-memory ones keep the single
+    shared connection Flask-SQLAlchemy gives them.
+    """
+    if not is_sqlite_file(uri):
+        return options
+    options = dict(options)
+    options['pool_size'] = Config.SQLITE_POOL_SIZE
+    options.setdefault('max_overflow', 0)
+    connect_args = dict(options.get('connect_args', {}))
+    # sqlite3's own lock wait, in seconds; matches busy_timeout
+    connect_args.setdefault('timeout', Config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    # Pooled connections are handed between threads
+    connect_args.setdefault('check_same_thread', False)
+    options['connect_args'] = connect_args
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, in_memory: bool = False):
+    """Set the profile's PRAGMAs on a raw sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas(in_memory).items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_engine(engine: Engine):
+    """Apply the profile to every new connection of ``engine`` (SQLite only)"""
+    if engine.dialect.name != 'sqlite':
+        return
+    in_memory = not is_sqlite_file(str(engine.url))
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, in_memory)
+
+    logger.info(f"SQLite profile applied to {engine.url} (in_memory={in_memory})")
+
+
+def incremental_vacuum(engine: Engine, max_pages: int) -> int:
+    """Return up to ``max_pages`` free pages to the filesystem
+
+    Only SQLite files in ``auto_vacuum=INCREMENTAL`` mode have pages to
+    return; anything else is left alone. Commits the connection's pending
+    transaction, so call it between transactions.
+
+    Returns:
+        Number of pages freed
+    """
+    if engine.dialect.name != 'sqlite' or max_pages <= 0:
+        return 0
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        try:
+            if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return 0
+            free_pages = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+            # executescript steps the pragma to completion; execute() would
+            # free a single page
+            cursor.executescript(f'PRAGMA incremental_vacuum({int(max_pages)})')
+            return free_pages - cursor.execute('PRAGMA freelist_count').fetchone()[0]
+        finally:
+            cursor.close()
+    finally:
+        connection.close()
+
+
+def init_sqlite_profile(app: Flask):
+    """Merge the pool settings into the app config; call before ``db.init_app``"""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if uri and Config.SQLITE_PROFILE_ENABLED:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(
+            uri, app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        )
@@ -10,6 +10,7 @@ from flask import Flask
 from src.models import TaskType
 from src.jobs.job_operations import JobOperations
 from src.jobs.job_manager import JobStatusManager
+from src.jobs.job_state_buffer import JobStateBuffer
 from src.models.job import Job, JobStatus
 logger = logging.getLogger(__name__)
 # For backward compatibility, you can keep the old interface
@@ -21,11 +22,13 @@ class JobOperationsController:
     def __init__(self, job_operations: JobOperations | None = None, job_status_manager: JobStatusManager | None = None):
         self.job_operations = job_operations if job_operations else JobOperations()
         self.job_status_manager = job_status_manager if job_status_manager else JobStatusManager()
+        self.state_buffer = JobStateBuffer(self.job_operations)
 
     # noinspection PyShadowingNames
     def init_app(self, app: Flask,job_operations: JobOperations | None = None, job_status_manager: JobStatusManager | None = None):
         self.job_operations = job_operations if job_operations else JobOperations()
         self.job_status_manager = job_status_manager if job_status_manager else JobStatusManager()
+        self.state_buffer = JobStateBuffer(self.job_operations, app=app)
 
 
     def create_job_safely(self, job_id: str, task_type: str, input_data: Dict[str, Any] = None) -> Optional[Job]:
@@ -76,18 +79,62 @@ class JobOperationsController:
             error_message: Optional error message
             progress: Optional progress percentage (0-100)
 
+        Status changes are written immediately, together with any progress
+        still buffered for the job.
+
         Returns:
             True if update was successful, False otherwise
         """
-        success = self.job_status_manager.update_job_status(job_id=job_id, status=status, result=result,
-                                                            error_message=error_message)
-
-        # Update progress if needed (separate operation since it's not part of core status logic)
-        if success and progress is not None:
-            self.job_operations.update_job(job_id=job_id, updates={'progress': progress})
+        buffered = self.state_buffer.take(job_id)
+        if progress is None:
+            progress = buffered
+
+        if status == JobStatus.COMPLETED and isinstance(result, dict) and result.get('output_path'):
+            try:
+                result = self._publish_result(result)
+            except Exception as e:
+                logger.error(f"Failed to publish result for job {job_id}: {e}")
+                self.job_status_manager.update_job_status(job_id=job_id, status=JobStatus.FAILED,
+                                                          error_message=f"Failed to store result: {e}")
+                return False
+
+        # Status, result and progress go out in one compare-and-set statement
+        return self.job_status_manager.update_job_status(job_id=job_id, status=status, result=result,
+                                                         error_message=error_message, progress=progress)
+
+    @staticmethod
+    def _publish_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Move a finished job's output into the configured storage backend."""
+        from src.services.service_registry import ServiceRegistry
+        return ServiceRegistry.get_file_management_service().publish_result(result)
+
+    def update_job_progress(self, job_id: str, progress: float) -> bool:
+        """Record progress (0-100) for a running job without touching its status.
+
+        Progress is write-behind: reports are coalesced per job and written
+        in batches every Config.JOB_PROGRESS_FLUSH_SECONDS (see
+        JobStateBuffer), so it is cheap to call per page or per file.
 
-        return success
+        Args:
+            job_id: Unique identifier of the job
+            progress: Progress percentage (clamped to 0-100)
 
+        Returns:
+            True if the progress was recorded (or, when buffering is off,
+            the job was found and updated), False otherwise
+        """
+        progress = min(100.0, max(0.0, float(progress)))
+        try:
+            # Pollers read the cache, so buffered progress is visible right away
+            from src.services.service_registry import ServiceRegistry
+            ServiceRegistry.get_job_status_cache().set_progress(job_id, progress)
+            if self.state_buffer.enabled:
+                self.state_buffer.record_progress(job_id, progress)
+                return True
+            return bool(self.job_operations.update_job(job_id=job_id, updates={'progress': progress}))
+        except Exception as e:
+            logger.warning(f"Failed to record progress for job {job_id}: {e}")
+            return False
 
     def get_job_with_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job with progress information.
@@ -177,4 +224,4 @@ class JobOperationsController:
 
 
 
-__all__ = ['JobOperations', 'JobStatusManager', 'JobOperationsController']
\ No newline at end of file
+__all__ = ['JobOperations', 'JobStatusManager', 'JobStateBuffer', 'JobOperationsController']
\ No newline at end of file
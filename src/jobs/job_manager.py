@@ -59,8 +59,8 @@ This class contains only status-related business logic and uses JobOperations
 for all database interactions. No session management here!
 """
 
-from typing import Dict, Any, Optional
-from src.models.job import Job, JobStatus
+from typing import Dict, Any, List, Optional
+from src.models.job import Job, JobStatus, status_projection
 from src.jobs import JobOperations  # Our new class
 import logging
 
@@ -97,22 +97,26 @@ class JobStatusManager:
     def update_job_status(self, job_id: str, status: JobStatus,
                           result: Dict[str, Any] = None,
                           error_message: str = None,
-                          validate_transition: bool = True) -> bool:
-        """Atomically update job status - pure business logic."""
-        present_status = self.get_job_status(job_id=job_id)
-        if validate_transition and not self._is_valid_transition(present_status, status.value):
-            logger.error(f"Invalid status transition for job {job_id}: {present_status} -> {status.value}")
-            return False
-
+                          validate_transition: bool = True,
+                          progress: Optional[float] = None) -> bool:
+        """Atomically update job status - pure business logic.
+
+        The transition is validated and applied by one compare-and-set UPDATE
+        (``WHERE status IN (allowed predecessors)``), so a status change costs
+        a single statement and concurrent updates can't both apply.
+        """
         # Apply status-specific business logic
         updates = {
             'status': status.value,
-            'updated_at': datetime.now(timezone.utc)
         }
+        if progress is not None:
+            updates['progress'] = progress
 
-        if status == JobStatus.COMPLETED and result:
-            updates['result'] = result
-            updates['error'] = None  # Clear any previous error
+        if status == JobStatus.COMPLETED:
+            updates['progress'] = 100.0
+            if result:
+                updates['result'] = result
+                updates['error'] = None  # Clear any previous error
 
         elif status == JobStatus.FAILED and error_message:
             updates['error'] = error_message
@@ -122,20 +126,49 @@ class JobStatusManager:
             updates['error'] = None  # Clear error when retrying
             updates['result'] = None  # Clear previous result
 
-        # Let JobOperations handle the database transaction
-        return self.job_operations.update_job(job_id, updates=updates)
+        expected = self._allowed_predecessors(status.value) if validate_transition else None
+        # Claiming a job for processing never waits on another claimer's row lock
+        row = self.job_operations.transition(job_id, updates=updates, expected_statuses=expected,
+                                             skip_locked=status == JobStatus.PROCESSING)
+        if row is None:
+            if validate_transition:
+                # Only the failure path pays for a read, to say why
+                present_status = self.get_job_status(job_id=job_id)
+                if present_status in expected:
+                    logger.warning(f"Job {job_id} is being claimed by another worker; not moved to {status.value}")
+                else:
+                    logger.error(f"Invalid status transition for job {job_id}: {present_status} -> {status.value}")
+            return False
+
+        self._cache_status(job_id, row)
+        return True
 
     @staticmethod
-    def _is_valid_transition(current_status: str, new_status: str) -> bool:
+    def _cache_status(job_id: str, row: Dict[str, Any]):
+        """Write the new status to the polling cache (or drop a stale entry)."""
+        from src.services.service_registry import ServiceRegistry
+        cache = ServiceRegistry.get_job_status_cache()
+        if 'status' in row:
+            cache.set(status_projection(row))
+        else:
+            cache.delete_many([job_id])
+
+    VALID_TRANSITIONS = {
+        JobStatus.PENDING.value: [JobStatus.PROCESSING.value, JobStatus.FAILED.value],
+        JobStatus.PROCESSING.value: [JobStatus.COMPLETED.value, JobStatus.FAILED.value],
+        JobStatus.COMPLETED.value: [],  # Terminal state
+        JobStatus.FAILED.value: [JobStatus.PROCESSING.value]  # Allow retry
+    }
+
+    @classmethod
+    def _is_valid_transition(cls, current_status: str, new_status: str) -> bool:
         """Validate job status transitions - pure business logic."""
-        valid_transitions = {
-            JobStatus.PENDING.value: [JobStatus.PROCESSING.value, JobStatus.FAILED.value],
-            JobStatus.PROCESSING.value: [JobStatus.COMPLETED.value, JobStatus.FAILED.value],
-            JobStatus.COMPLETED.value: [],  # Terminal state
-            JobStatus.FAILED.value: [JobStatus.PROCESSING.value]  # Allow retry
-        }
+        return new_status in cls.VALID_TRANSITIONS.get(current_status, [])
 
-        return new_status in valid_transitions.get(current_status, [])
+    @classmethod
+    def _allowed_predecessors(cls, new_status: str) -> List[str]:
+        """Statuses a job may move to ``new_status`` from."""
+        return [current for current, targets in cls.VALID_TRANSITIONS.items() if new_status in targets]
 
     def get_job_status(self, job_id: str) -> Optional[str]:
         """Get job status - pure business logic."""
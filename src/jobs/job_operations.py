@@ -1,28 +1,43 @@
 """JobOperations - Centralized database session management for job operations.
 
-Refactored for SQLite (on-disk).
-SQLite has no row-level locking or `with_for_update`, so all locking logic
-has been adapted/removed. Concurrency is handled via transaction retries
-and SQLite’s database-level locks.
+Runs on SQLite (on-disk) and PostgreSQL.
+
+Status transitions are single compare-and-set UPDATEs, atomic on both.
+Read-modify-write paths lock the rows they read (``FOR UPDATE``) and job
+claiming skips rows another worker has locked (``FOR UPDATE SKIP LOCKED``),
+so claimers never queue behind each other. SQLite has no row locks and
+ignores both clauses: there, writers are serialised by the database-level
+write lock, and the engine profile in src/database/sqlite_profile.py (WAL,
+busy_timeout) keeps readers off that lock and makes writers wait for it
+instead of failing. PostgreSQL connections are set up by
+src/database/postgres_profile.py.
 """
 
+import base64
+import json
 import logging
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 
 from flask import Flask
-from sqlalchemy import select, delete
+from sqlalchemy import bindparam, or_, select, delete, tuple_, update
 from sqlalchemy.orm import Session
 
+from src.config import Config
 from src.models import Job, JobStatus
+from src.models.job import STATUS_COLUMNS
+from src.models.job_result import OFFLOAD_KEY, JobResult, split_result
 from src.models.base import db
 
 logger = logging.getLogger(__name__)
 
 
 class JobOperations:
-    """Centralized database session management for job operations (SQLite)."""
+    """Centralized database session management for job operations."""
+
+    # Largest page query_jobs returns
+    MAX_PAGE_SIZE = 1000
 
     def __init__(self):
         pass
@@ -70,10 +85,10 @@ class JobOperations:
 
 
     def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
-        """Update job fields directly (no row-level lock)."""
+        """Update job fields directly (row locked until commit)."""
 
         with self.session_scope() as session:
-            job = session.query(Job).filter_by(job_id=job_id).first()
+            job = session.query(Job).filter_by(job_id=job_id).with_for_update().first()
             if not isinstance(job, Job):
                 return False
 
@@ -86,6 +101,99 @@ class JobOperations:
 
 
 
+    def compare_and_set(self, job_id: str, updates: Dict[str, Any],
+                        expected_statuses: Optional[Iterable[str]] = None) -> bool:
+        """Update a job in a single UPDATE statement, guarded by its current status.
+
+        ``UPDATE jobs SET ... WHERE job_id = ? AND status IN (expected_statuses)``
+        checks and applies a transition atomically: two workers racing on the
+        same job can't both win, and no SELECT is needed first.
+
+        Args:
+            job_id: Job to update
+            updates: Column values to set (unknown keys are ignored)
+            expected_statuses: Statuses the job must be in; None skips the check
+
+        Returns:
+            True if the job existed (in an expected status) and was updated
+        """
+        return self.transition(job_id, updates, expected_statuses) is not None
+
+    def transition(self, job_id: str, updates: Dict[str, Any],
+                   expected_statuses: Optional[Iterable[str]] = None,
+                   skip_locked: bool = False) -> Optional[Dict[str, Any]]:
+        """``compare_and_set`` that also returns the job's new status columns.
+
+        The row comes back from the same statement (``UPDATE ... RETURNING``)
+        where the database supports it; otherwise only ``job_id`` is returned.
+        A large ``result`` is stored in job_results, in the same transaction,
+        and the row gets its summary.
+
+        With ``skip_locked`` the row is picked by
+        ``WHERE job_id IN (SELECT ... FOR UPDATE SKIP LOCKED)``: if another
+        transaction holds it (e.g. a second delivery of the same task
+        claiming the job), the transition is not applied instead of waiting
+        for that transaction. SQLite has no row locks and ignores this.
+
+        Returns:
+            Mapping of STATUS_COLUMNS after the update, or None if not applied
+        """
+        columns = Job.__table__.columns
+        values = {key: value for key, value in updates.items() if key in columns}
+        values['updated_at'] = datetime.now(timezone.utc)
+        offloaded = None
+        if 'result' in values:
+            values['result'], offloaded = split_result(values['result'])
+
+        conditions = [Job.job_id == job_id]
+        if expected_statuses is not None:
+            conditions.append(Job.status.in_(list(expected_statuses)))
+        if skip_locked:
+            unlocked = select(Job.job_id).where(*conditions).with_for_update(skip_locked=True)
+            conditions.append(Job.job_id.in_(unlocked.scalar_subquery()))
+        statement = update(Job).where(*conditions).values(**values)
+
+        returning = db.engine.dialect.update_returning
+        if returning:
+            statement = statement.returning(*(getattr(Job, column) for column in STATUS_COLUMNS))
+
+        with self.session_scope() as session:
+            result = session.execute(statement)
+            if returning:
+                row = result.first()
+                applied = dict(row._mapping) if row is not None else None
+            else:
+                applied = {'job_id': job_id} if result.rowcount == 1 else None
+            if applied is not None and offloaded is not None:
+                session.merge(JobResult(job_id=job_id, data=offloaded,
+                                        size_bytes=values['result'][OFFLOAD_KEY]['size_bytes']))
+        return applied
+
+    def write_progress_batch(self, progress_by_job: Dict[str, float]) -> int:
+        """Write buffered progress for many jobs in one transaction.
+
+        Jobs that already reached a terminal status are skipped, so a late
+        flush can never overwrite the progress of a finished job.
+
+        Returns:
+            Number of jobs updated
+        """
+        if not progress_by_job:
+            return 0
+        jobs = Job.__table__
+        statement = update(jobs).where(
+            jobs.c.job_id == bindparam('b_job_id'),
+            # Spelled out: IN (...) can't be used with executemany
+            or_(jobs.c.status == JobStatus.PENDING.value, jobs.c.status == JobStatus.PROCESSING.value)
+        ).values(progress=bindparam('b_progress'), updated_at=bindparam('b_updated_at'))
+        now = datetime.now(timezone.utc)
+        params = [{'b_job_id': job_id, 'b_progress': progress, 'b_updated_at': now}
+                  for job_id, progress in progress_by_job.items()]
+
+        with self.session_scope() as session:
+            result = session.execute(statement, params)
+        return result.rowcount
+
     def bulk_update_jobs(self, job_updates: List[Dict[str, Any]]) -> Dict[str, bool]:
         """Update multiple jobs in a single transaction."""
         results: Dict[str, bool] = {}
@@ -97,7 +205,7 @@ class JobOperations:
                     continue
 
                 try:
-                    job = session.query(Job).filter_by(job_id=job_id).first()
+                    job = session.query(Job).filter_by(job_id=job_id).with_for_update().first()
                     if not isinstance(job, Job):
                         results[job_id] = False
                         continue
@@ -124,32 +232,141 @@ class JobOperations:
             if not isinstance(job, Job):
                 return False
 
+            session.execute(delete(JobResult).where(JobResult.job_id == job_id))
             session.delete(job)
         return True
 
 
-    def cleanup_old_jobs(self, days_old: int = 30) -> int:
-        """Delete jobs older than `days_old` with completed/failed status."""
-
-        with self.session_scope() as session:
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
-            result = session.execute(
-                delete(Job).where(
-                    Job.created_at < cutoff_date,
-                    Job.status.in_([JobStatus.COMPLETED.value, JobStatus.FAILED.value])
-                )
-            )
-            deleted_count = result.rowcount or 0
-            logger.info(f"Cleaned up {deleted_count} jobs older than {days_old} days")
+    def cleanup_old_jobs(self, days_old: int = 30, batch_size: Optional[int] = None) -> int:
+        """Delete jobs older than `days_old` with completed/failed status.
+
+        Deletes in batches of ``batch_size`` (Config.CLEANUP_BATCH_SIZE), one
+        short transaction each, entirely on the server:
+        ``DELETE FROM jobs WHERE job_id IN (SELECT job_id ... LIMIT n FOR
+        UPDATE SKIP LOCKED)`` (rows other transactions hold are left for a
+        later batch), after the same subquery has removed the batch's
+        offloaded results. The deleted IDs come back with ``RETURNING`` where
+        supported, to drop them from the status cache.
+
+        With job archival on, each batch's IDs are selected first and the
+        batch is copied to the job archive before it is deleted (see
+        src/services/job_archive.py).
+        """
+        from src.services.service_registry import ServiceRegistry
+        archive = ServiceRegistry.get_job_archive()
+        cache = ServiceRegistry.get_job_status_cache()
+        batch_size = batch_size or Config.CLEANUP_BATCH_SIZE
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
+        batch = (
+            select(Job.job_id)
+            .where(Job.created_at < cutoff_date,
+                   Job.status.in_([JobStatus.COMPLETED.value, JobStatus.FAILED.value]))
+            .order_by(Job.created_at, Job.job_id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        returning = db.engine.dialect.delete_returning
+
+        deleted_count = 0
+        while True:
+            with self.session_scope() as session:
+                if archive.enabled:
+                    job_ids = session.execute(batch).scalars().all()
+                    archive.archive_jobs(session, job_ids)
+                    in_batch = Job.job_id.in_(job_ids)
+                    results_in_batch = JobResult.job_id.in_(job_ids)
+                else:
+                    job_ids = None
+                    in_batch = Job.job_id.in_(batch.scalar_subquery())
+                    results_in_batch = JobResult.job_id.in_(batch.scalar_subquery())
+                session.execute(delete(JobResult).where(results_in_batch))
+                statement = delete(Job).where(in_batch)
+                if returning:
+                    job_ids = session.execute(statement.returning(Job.job_id)).scalars().all()
+                    deleted = len(job_ids)
+                else:
+                    deleted = session.execute(statement).rowcount
+            if job_ids:
+                cache.delete_many(job_ids)
+            deleted_count += deleted
+            if deleted < batch_size:
+                break
+        logger.info(f"Cleaned up {deleted_count} jobs older than {days_old} days")
         return deleted_count
 
 
     def get_jobs_by_status(self, status: JobStatus, limit: int = 100) -> List[Job]:
-        """Get jobs by status."""
+        """Get the newest jobs with a status."""
+        jobs, _ = self.query_jobs(status=status.value, limit=limit)
+        return jobs
+
+    def query_jobs(self, status: Optional[str] = None, task_type: Optional[str] = None,
+                   created_after: Optional[datetime] = None, created_before: Optional[datetime] = None,
+                   limit: int = 100, cursor: Optional[str] = None,
+                   newest_first: bool = True) -> Tuple[List[Job], Optional[str]]:
+        """List jobs one page at a time, by status, type and creation time.
+
+        Pages are keyset-paginated on ``(created_at, job_id)``: the cursor
+        holds the last row of the previous page and the next page starts
+        right after it, so page 10,000 costs the same as page 1 (no OFFSET
+        scan). Filtering by status or task type walks the composite indexes
+        ``(status, created_at, job_id)`` / ``(task_type, created_at, job_id)``.
+
+        Args:
+            status: Only jobs with this status
+            task_type: Only jobs of this type
+            created_after: Only jobs created at or after this time (UTC)
+            created_before: Only jobs created before this time (UTC)
+            limit: Page size (at most MAX_PAGE_SIZE)
+            cursor: ``next_cursor`` of the previous page
+            newest_first: Order by creation time descending
+
+        Returns:
+            (jobs, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        query = select(Job)
+        if status is not None:
+            query = query.where(Job.status == status)
+        if task_type is not None:
+            query = query.where(Job.task_type == task_type)
+        if created_after is not None:
+            query = query.where(Job.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(Job.created_at < created_before)
+        if cursor is not None:
+            position = tuple_(Job.created_at, Job.job_id)
+            last = decode_job_cursor(cursor)
+            query = query.where(position < last if newest_first else position > last)
+
+        if newest_first:
+            query = query.order_by(Job.created_at.desc(), Job.job_id.desc())
+        else:
+            query = query.order_by(Job.created_at, Job.job_id)
 
         with self.session_scope(auto_commit=False) as session:
-            results = session.query(Job).filter_by(status=status.value).limit(limit).order_by(Job.created_at.desc()).all()
-        return results
-
-
-
+            # One extra row tells whether another page follows
+            jobs = session.execute(query.limit(limit + 1)).scalars().all()
+        next_cursor = None
+        if len(jobs) > limit:
+            jobs = jobs[:limit]
+            next_cursor = encode_job_cursor(jobs[-1])
+        return jobs, next_cursor
+
+
+def encode_job_cursor(job: Job) -> str:
+    """Opaque page cursor pointing just past ``job``"""
+    position = json.dumps([job.created_at.isoformat(), job.job_id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_job_cursor(cursor: str) -> Tuple[datetime, str]:
+    """``(created_at, job_id)`` from a cursor made by ``encode_job_cursor``"""
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(job_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid job cursor: {cursor!r}") from e
@@ -0,0 +1,107 @@
+"""JobStateBuffer - write-behind buffer for job progress.
+
+Tasks report progress many times per job (per OCR page, per file of a bulk
+job). Writing each report is a separate SQLite write transaction competing
+for the single write lock. The buffer instead keeps the latest progress per
+job in memory and writes all of them in one batched transaction when the
+flush interval has passed.
+
+Only progress is buffered. Status transitions are written straight away by
+JobOperationsController (terminal ones must be durable the moment the task
+reports them) and take any buffered progress for the job with them.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import Flask
+
+from src.config import Config
+from src.jobs.job_operations import JobOperations
+
+logger = logging.getLogger(__name__)
+
+
+class JobStateBuffer:
+    """Coalesces progress updates per job and flushes them in batches."""
+
+    def __init__(self, job_operations: JobOperations, app: Optional[Flask] = None,
+                 flush_interval: Optional[float] = None):
+        """
+        Args:
+            job_operations: Used for the batched writes
+            app: Flask app; lets a timer flush in the background (without
+                one, flushes happen on the next report after the interval)
+            flush_interval: Seconds between flushes; 0 writes every report
+                through. Defaults to Config.JOB_PROGRESS_FLUSH_SECONDS.
+        """
+        self.job_operations = job_operations
+        self.app = app
+        self.flush_interval = Config.JOB_PROGRESS_FLUSH_SECONDS if flush_interval is None else flush_interval
+        self._pending: Dict[str, float] = {}
+        self._first_pending_at: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    def record_progress(self, job_id: str, progress: float):
+        """Remember the latest progress for a job; flushes when due."""
+        with self._lock:
+            self._pending[job_id] = progress
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            due = time.monotonic() - self._first_pending_at >= self.flush_interval
+            if not due:
+                self._schedule_timer()
+        if due:
+            self.flush()
+
+    def take(self, job_id: str) -> Optional[float]:
+        """Remove and return a job's buffered progress (for a status write)."""
+        with self._lock:
+            return self._pending.pop(job_id, None)
+
+    def flush(self) -> int:
+        """Write all buffered progress in one transaction.
+
+        Returns:
+            Number of jobs updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._first_pending_at = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        try:
+            return self.job_operations.write_progress_batch(pending)
+        except Exception as e:
+            logger.warning(f"Failed to flush progress for {len(pending)} jobs, will retry: {e}")
+            with self._lock:
+                for job_id, progress in pending.items():
+                    # Keep anything newer that arrived meanwhile
+                    self._pending.setdefault(job_id, progress)
+                if self._first_pending_at is None:
+                    self._first_pending_at = time.monotonic()
+            return 0
+
+    def _schedule_timer(self):
+        """Start the background flush timer (lock held)."""
+        if self.app is None or self._timer is not None:
+            return
+        self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        with self.app.app_context():
+            self.flush()
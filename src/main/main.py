@@ -5,6 +5,7 @@ from flask import Flask, jsonify, request
 from sqlalchemy import text
 
 from src.services import ServiceRegistry
+from src.config import Config
 from src.config.config import get_config, validate_current_config, ConfigValidationError
 from src.database import init_database
 
@@ -130,7 +131,23 @@ def initialize_extensions(app: Flask):
 
     # Initialize database FIRST
     from src.models import db
+    from src.database.sqlite_profile import init_sqlite_profile, configure_sqlite_engine
+    from src.database.postgres_profile import init_postgres_profile
+    init_sqlite_profile(app)
+    init_postgres_profile(app)
     db.init_app(app)
+    if Config.SQLITE_PROFILE_ENABLED:
+        configure_sqlite_engine(db.engine)
+
+    # Move large job results off the jobs row, keep the polling cache in
+    # step with jobs updated through the ORM, and unlink released blobs
+    # only once their rows are committed away
+    from src.models.job_result import register_job_result_hooks
+    from src.services.job_status_cache import register_job_status_cache_hooks
+    from src.services.file_management_service import register_blob_cleanup_hooks
+    register_job_result_hooks()
+    register_job_status_cache_hooks()
+    register_blob_cleanup_hooks()
 
     # Initialize Celery with Flask app context
     from src.celery_app import make_celery, set_celery_app
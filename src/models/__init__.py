@@ -1,5 +1,9 @@
 # src/models/__init__.py
 from src.models.base import db
 from src.models.job import Job, JobStatus, TaskType  # This ensures the model is registered with SQLAlchemy
+from src.models.file_blob import FileBlob
+from src.models.stored_file import StoredFile
+from src.models.job_result import JobResult
+from src.models.cleanup_cursor import CleanupCursor
 
-__all__ = ['db', 'Job', 'JobStatus', 'TaskType']
\ No newline at end of file
+__all__ = ['db', 'Job', 'JobStatus', 'TaskType', 'FileBlob', 'StoredFile', 'JobResult', 'CleanupCursor']
\ No newline at end of file
@@ -0,0 +1,20 @@
+from datetime import datetime
+from src.models.base import db
+
+
+class CleanupCursor(db.Model):
+    """Where the incremental cleanup of an upload folder stopped
+
+    One row per upload folder, written by CleanupEngine after every batch so
+    a run in another worker process, or after a restart, resumes from the
+    same phase and keyset position.
+    """
+    __tablename__ = 'cleanup_cursors'
+
+    scope = db.Column(db.String(1024), primary_key=True)  # absolute upload folder
+    phase = db.Column(db.String(16), nullable=False)
+    position = db.Column(db.Text, nullable=True)  # JSON-encoded keyset position
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<CleanupCursor {self.scope} {self.phase}>'
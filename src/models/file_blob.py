@@ -0,0 +1,32 @@
+from datetime import datetime
+from src.models.base import db
+
+
+class FileBlob(db.Model):
+    """Reference-counted content-addressed file blob
+
+    One row per distinct file content stored by FileManagementService in
+    content-addressed mode; the file itself lives under the ``blobs`` tree.
+    """
+    __tablename__ = 'file_blobs'
+
+    digest = db.Column(db.String(64), primary_key=True)  # SHA-256 hex of the content
+    extension = db.Column(db.String(16), nullable=False, default='')
+    size_bytes = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_referenced_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        """Convert blob record to dictionary for JSON serialization"""
+        return {
+            'digest': self.digest,
+            'extension': self.extension,
+            'size_bytes': self.size_bytes,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_referenced_at': self.last_referenced_at.isoformat() if self.last_referenced_at else None,
+        }
+
+    def __repr__(self):
+        return f'<FileBlob {self.digest[:12]} refs={self.ref_count}>'
@@ -1,8 +1,12 @@
 from datetime import datetime, timezone
 from enum import Enum
 from sqlalchemy import Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from src.models.base import db, BaseModel
 
+# JSON everywhere, stored as binary JSONB on PostgreSQL
+JSON_TYPE = db.JSON().with_variant(JSONB(), 'postgresql')
+
 class JobStatus(Enum):
     """Job status enum"""
     PENDING = 'pending'
@@ -24,6 +28,47 @@ class TaskType(Enum):
     AI_INVOICE_EXTRACTION = 'ai_invoice_extraction'
     AI_BANK_STATEMENT_EXTRACTION = 'ai_bank_statement_extraction'
     
+# Columns a status projection is built from
+STATUS_COLUMNS = ('job_id', 'task_type', 'status', 'progress', 'error', 'result', 'created_at', 'updated_at')
+
+
+def utc_isoformat(value):
+    """ISO timestamp as naive UTC, like the column defaults
+
+    ``mark_as_*`` and the status writers set aware UTC datetimes; until the
+    row is reloaded those would serialise with ``+00:00`` next to a naive
+    ``created_at``.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def status_projection(values) -> dict:
+    """Compact status view of a job row (mapping of STATUS_COLUMNS)
+
+    Leaves out ``input_data``; ``result`` is only included once the job has
+    completed, which is when pollers need it.
+    """
+    status = values['status']
+    projection = {
+        'job_id': values['job_id'],
+        'task_type': values.get('task_type'),
+        'status': status,
+        'progress': values.get('progress'),
+        'error': values.get('error'),
+        'created_at': utc_isoformat(values.get('created_at')),
+        'updated_at': utc_isoformat(values.get('updated_at')),
+        'is_completed': status in (JobStatus.COMPLETED.value, JobStatus.FAILED.value),
+        'is_successful': status == JobStatus.COMPLETED.value,
+    }
+    if status == JobStatus.COMPLETED.value:
+        projection['result'] = values.get('result')
+    return projection
+
+
 class Job(BaseModel):
     """Generic job tracking model"""
     __tablename__ = 'jobs'
@@ -34,10 +79,12 @@ class Job(BaseModel):
     task_type = db.Column(db.String(50), nullable=False)  # 'compress', 'convert', 'ocr', etc.
     status = db.Column(db.String(50), nullable=False, default=JobStatus.PENDING.value)
     # Input/output data
-    input_data = db.Column(db.JSON)  # Store input parameters
-    result = db.Column(db.JSON)  # Store output results
+    input_data = db.Column(JSON_TYPE)  # Store input parameters
+    result = db.Column(JSON_TYPE)  # Store output results
     # Error handling
     error = db.Column(db.Text)  # Error message if job failed
+    # Progress percentage (0-100) reported by long-running tasks
+    progress = db.Column(db.Float, default=0.0)
     
     # Add database constraints and indexes for data integrity
     __table_args__ = (
@@ -49,10 +96,11 @@ class Job(BaseModel):
             'created_at <= updated_at',
             name='valid_timestamps'
         ),
-        # Add indexes for common queries
-        Index('idx_job_status_created', 'status', 'created_at'),
+        # Add indexes for common queries; job_id completes the keyset
+        # (created_at, job_id) that listings page on
+        Index('idx_job_status_created_id', 'status', 'created_at', 'job_id'),
         Index('idx_job_updated', 'updated_at'),
-        Index('idx_job_task_type', 'task_type'),
+        Index('idx_job_type_created_id', 'task_type', 'created_at', 'job_id'),
     )
 
     def __init__(self, task_type=None, input_data=None, job_id=None):
@@ -132,12 +180,25 @@ class Job(BaseModel):
             'status': self.status,
             'input_data': self.input_data,
             'result': self.result,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'error': self.error,            
+            'created_at': utc_isoformat(self.created_at),
+            'updated_at': utc_isoformat(self.updated_at),
+            'error': self.error,
+            'progress': self.progress,
             'is_completed': self.is_completed(),
             'is_successful': self.is_successful()
         }
 
+    def get_full_result(self):
+        """Result including any part offloaded to the job_results table"""
+        from src.models.job_result import JobResult, is_offloaded
+        if not is_offloaded(self.result):
+            return self.result
+        stored = db.session.get(JobResult, self.job_id)
+        return stored.data if stored is not None else self.result
+
+    def to_status_dict(self):
+        """Compact status projection for polling (see status_projection)"""
+        return status_projection({column: getattr(self, column) for column in STATUS_COLUMNS})
+
     def __repr__(self):
         return f'<Job {self.job_id} {self.task_type} {self.status}>'
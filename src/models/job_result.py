@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.config import Config
+from src.models.base import db
+from src.models.job import JSON_TYPE, Job
+
+# Key marking a Job.result as a summary of an offloaded result
+OFFLOAD_KEY = '_offloaded'
+
+# Top-level result values up to this size stay in the summary
+SUMMARY_VALUE_MAX_BYTES = 512
+
+
+class JobResult(db.Model):
+    """Full result of a job whose result is too large for the jobs row
+
+    The jobs row keeps a summary (the small top-level values, e.g. output
+    paths) plus an ``_offloaded`` marker, so polls, listings and cleanup
+    never load large results. Read the full result with
+    ``Job.get_full_result()``.
+    """
+    __tablename__ = 'job_results'
+
+    job_id = db.Column(db.String(255), db.ForeignKey('jobs.job_id', ondelete='CASCADE'), primary_key=True)
+    data = db.Column(JSON_TYPE, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<JobResult {self.job_id} {self.size_bytes}B>'
+
+
+def encoded_size(value: Any) -> int:
+    """Size of ``value`` as stored (compact JSON)"""
+    return len(json.dumps(value, default=str, separators=(',', ':')).encode())
+
+
+def is_offloaded(result: Any) -> bool:
+    return isinstance(result, dict) and OFFLOAD_KEY in result
+
+
+def split_result(result: Any, max_inline_bytes: Optional[int] = None) -> Tuple[Any, Optional[Any]]:
+    """Decide where a job result is stored
+
+    Returns:
+        ``(inline, full)``: the value for Job.result, and the full result to
+        store as a JobResult (None when the result fits inline)
+    """
+    max_inline_bytes = max_inline_bytes or Config.JOB_RESULT_INLINE_MAX_BYTES
+    if result is None or is_offloaded(result):
+        return result, None
+    size = encoded_size(result)
+    if size <= max_inline_bytes:
+        return result, None
+
+    summary, offloaded_keys = {}, []
+    if isinstance(result, dict):
+        for key, value in result.items():
+            if encoded_size(value) <= SUMMARY_VALUE_MAX_BYTES:
+                summary[key] = value
+            else:
+                offloaded_keys.append(key)
+    summary[OFFLOAD_KEY] = {'size_bytes': size, 'keys': offloaded_keys}
+    return summary, result
+
+
+def register_job_result_hooks():
+    """Offload large results of Job objects before they are flushed
+
+    Covers code that sets ``Job.result`` directly (``mark_as_completed``
+    and friends); the compare-and-set path in JobOperations offloads
+    explicitly.
+    """
+    if event.contains(Session, 'before_flush', _offload_large_results):
+        return
+    event.listen(Session, 'before_flush', _offload_large_results)
+
+
+def _offload_large_results(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Job):
+            continue
+        if obj not in session.new and not inspect(obj).attrs.result.history.has_changes():
+            continue
+        inline, full = split_result(obj.result)
+        if full is not None:
+            obj.result = inline
+            session.merge(JobResult(job_id=obj.job_id, data=full, size_bytes=inline[OFFLOAD_KEY]['size_bytes']))
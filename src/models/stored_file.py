@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import Index
+from src.models.base import db
+
+
+class StoredFile(db.Model):
+    """Index entry for a file written by FileManagementService
+
+    Recorded at write time so cleanup and statistics can query expiry and
+    sizes instead of walking the upload folder.
+    """
+    __tablename__ = 'stored_files'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    path = db.Column(db.String(1024), nullable=False, unique=True)
+    kind = db.Column(db.String(16), nullable=False)  # 'inputs', 'temp', 'results' or 'legacy'
+    size_bytes = db.Column(db.BigInteger)  # None until known (paths handed out before writing)
+    job_id = db.Column(db.String(255))  # Owning job, if known
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_stored_file_expires', 'expires_at'),
+        Index('idx_stored_file_created', 'created_at'),
+        Index('idx_stored_file_job', 'job_id'),
+    )
+
+    def to_dict(self):
+        """Convert index entry to dictionary for JSON serialization"""
+        return {
+            'path': self.path,
+            'kind': self.kind,
+            'size_bytes': self.size_bytes,
+            'job_id': self.job_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
+
+    def __repr__(self):
+        return f'<StoredFile {self.kind} {self.path}>'
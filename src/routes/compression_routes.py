@@ -10,12 +10,20 @@ from src.tasks.tasks import compress_task, bulk_compress_task
 from src.utils.response_helpers import success_response, error_response
 from src.utils.security_utils import validate_file
 from src.main import job_operations_controller
+from src.services.service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
 
 compression_bp = Blueprint('compression', __name__)
 # CORS(compression_bp, resources={r"/api": {"origins": ["https://www.pdfsmaller.site"]}})
 
+
+@compression_bp.before_request
+def _disk_budget_guard():
+    """Refuse uploads with 503 + Retry-After while storage is full"""
+    if request.method == 'POST' and request.content_length:
+        ServiceRegistry.get_file_management_service().disk_budget.admit(request.content_length)
+
 # Updated tasks.py - Ensure proper error handling
 
 # Fix for compression_routes.py - create job BEFORE enqueueing task
@@ -1,18 +1,34 @@
+import hashlib
+import json
 import os
 import logging
-from flask import Blueprint, send_file
+from datetime import datetime
+from flask import Blueprint, Response, request, stream_with_context
+from src.config import Config
 from src.models.job import Job, JobStatus
 from src.utils.response_helpers import error_response, success_response
-from pathlib import Path
+from src.services.service_registry import ServiceRegistry
 jobs_bp = Blueprint('jobs', __name__)
 logger = logging.getLogger(__name__)
 # ----------------------------  status  ----------------------------
 @jobs_bp.route('/jobs/<job_id>', methods=['GET', 'POST'])
 def get_job_status(job_id):
-    """Get job status by ID"""
+    """Get job status by ID
+
+    Serves the compact status projection from the job status cache (read
+    through to the database on a miss). ``?view=full`` returns the full job
+    record, including ``input_data`` and any offloaded result, from the
+    database.
+    """
     try:
-        job = Job.query.filter_by(job_id=job_id).first()
-        if not job:
+        if request.args.get('view') == 'full':
+            job = Job.query.filter_by(job_id=job_id).first()
+            job_data = job.to_dict() if job else None
+            if job_data:
+                job_data['result'] = job.get_full_result()
+        else:
+            job_data = ServiceRegistry.get_job_status_cache().get_status(job_id)
+        if not job_data:
             return error_response(
                 message='Job not found',
                 error_code='JOB_NOT_FOUND',
@@ -20,11 +36,11 @@ def get_job_status(job_id):
             )
         
         # Add monitoring metrics
-        job_data = job.to_dict()
+        created_at, updated_at = job_data.get('created_at'), job_data.get('updated_at')
         job_data['monitoring'] = {
-            'created_at_iso': job.created_at.isoformat() if job.created_at else None,
-            'updated_at_iso': job.updated_at.isoformat() if job.updated_at else None,
-            'processing_duration_seconds': (job.updated_at - job.created_at).total_seconds() if job.updated_at and job.created_at else None
+            'created_at_iso': created_at,
+            'updated_at_iso': updated_at,
+            'processing_duration_seconds': (datetime.fromisoformat(updated_at) - datetime.fromisoformat(created_at)).total_seconds() if updated_at and created_at else None
         }
         
         return success_response(
@@ -41,30 +57,117 @@ def get_job_status(job_id):
 
 
 
+@jobs_bp.route('/jobs/status', methods=['GET', 'POST'])
+def get_job_statuses():
+    """Get the status of many jobs at once
+
+    Job IDs come from ``?ids=a,b,c`` or a JSON body ``{"job_ids": [...]}``
+    (at most Config.JOB_STATUS_BATCH_MAX). All are looked up with one cache
+    round-trip plus one ``IN (...)`` query for the misses. ``?view=status``
+    includes ``result`` for completed jobs; the default compact view leaves
+    it out.
+
+    Responses carry an ETag of the statuses; a request whose If-None-Match
+    matches gets 304 Not Modified.
+    """
+    body = request.get_json(silent=True) or {}
+    job_ids = body.get('job_ids') if request.method == 'POST' else None
+    if job_ids is None:
+        job_ids = [job_id for job_id in request.args.get('ids', '').split(',') if job_id]
+    if not isinstance(job_ids, list) or not job_ids or not all(isinstance(job_id, str) for job_id in job_ids):
+        return error_response(
+            message='Provide job IDs as ?ids=a,b,c or a JSON body {"job_ids": [...]}',
+            error_code='INVALID_JOB_IDS',
+            status_code=400
+        )
+    job_ids = list(dict.fromkeys(job_ids))
+    if len(job_ids) > Config.JOB_STATUS_BATCH_MAX:
+        return error_response(
+            message=f'At most {Config.JOB_STATUS_BATCH_MAX} job IDs per request',
+            error_code='TOO_MANY_JOB_IDS',
+            status_code=400
+        )
+
+    try:
+        found = ServiceRegistry.get_job_status_cache().get_statuses(job_ids)
+    except Exception as e:
+        logger.error(f"Error retrieving job statuses: {str(e)}")
+        return error_response(
+            message='Failed to retrieve job statuses',
+            error_code='JOB_STATUS_ERROR',
+            status_code=500
+        )
+
+    compact = request.args.get('view') != 'status'
+    jobs = [{key: value for key, value in found[job_id].items() if not (compact and key == 'result')}
+            for job_id in job_ids if job_id in found]
+    data = {'jobs': jobs, 'not_found': [job_id for job_id in job_ids if job_id not in found]}
+
+    etag = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response, _ = success_response(message='Job statuses retrieved successfully', data=data)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@jobs_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Get a job's full result
+
+    Large results are kept out of the jobs row; status responses then carry
+    a summary with an ``_offloaded`` marker, and this returns the whole
+    result.
+    """
+    try:
+        job = Job.query.filter_by(job_id=job_id).first()
+        if not job:
+            return error_response(
+                message='Job not found',
+                error_code='JOB_NOT_FOUND',
+                status_code=404
+            )
+        return success_response(
+            message='Job result retrieved successfully',
+            data={'job_id': job.job_id, 'status': job.status, 'result': job.get_full_result()}
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving job result: {str(e)}", extra={'job_id': job_id})
+        return error_response(
+            message='Failed to retrieve job result',
+            error_code='JOB_STATUS_ERROR',
+            status_code=500
+        )
+
+
+# ----------------------------  events  ----------------------------
+@jobs_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream a job's status and progress as server-sent events until it finishes"""
+    broker = ServiceRegistry.get_job_event_broker()
+    if broker.cache.get_status(job_id) is None:
+        return error_response(
+            message='Job not found',
+            error_code='JOB_NOT_FOUND',
+            status_code=404
+        )
+    return Response(
+        stream_with_context(broker.stream(job_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 # ----------------------------  download  ----------------------------
 @jobs_bp.route('/jobs/<job_id>/download', methods=['GET','POST'])
 def download_job_result(job_id):
-    job = Job.query.filter_by(job_id=job_id).first()
-    if not job:
-        return error_response(message="Job not found", status_code=404)
-    if not job.is_completed():
-        return error_response(message="Job not completed yet", status_code=400)
-    if not job.result or "output_path" not in job.result:
-        return error_response(message="No result file available", status_code=404)
-    # This is running in UBuntu should the path be like this.
-    # ./uploads/dev/results/compressed_a55865f3-935f-4dc1-83af-fd78ca4b4730_COR14.1A.pdf"
-    #  or should it be a complete path. hint when its like this even though the file exist it is not sending the file
-    raw_path = job.result["output_path"]
-    path = (Path.cwd() / raw_path).resolve()
-    if not path.is_file():
-        return error_response(message="Result file not found on disk", status_code=404)
-
-    fname = job.result.get("original_filename", "result")
-    mime  = job.result.get("mime_type", "application/octet-stream")
-    # return error_response(message=f"DEBUG : MIME: {mime} FNAME : {fname} - {path}", status_code=404)
-    return send_file(
-        str(path),
-        as_attachment=True,
-        download_name=fname,
-        mimetype=mime
-    )
\ No newline at end of file
+    """Download a completed job's result from wherever it is stored"""
+    return ServiceRegistry.get_file_management_service().get_job_download_response(job_id)
+
+
+@jobs_bp.route('/jobs/<job_id>/download/archive', methods=['GET'])
+def download_job_archive(job_id):
+    """Stream a ZIP of a bulk job's individual results, built on the fly"""
+    return ServiceRegistry.get_file_management_service().get_job_archive_stream_response(job_id)
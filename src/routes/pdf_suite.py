@@ -16,6 +16,7 @@ from werkzeug.exceptions import UnsupportedMediaType, RequestEntityTooLarge
 
 from src.main import job_operations_controller, service_registry
 from src.models import JobStatus, TaskType, Job
+from src.services.service_registry import ServiceRegistry
 from src.tasks.tasks import (
     convert_pdf_task,
     conversion_preview_task,
@@ -148,6 +149,9 @@ def _content_length_guard():
     cl = request.content_length or 0
     if cl > MAX_FILE_SIZE:
         raise RequestEntityTooLarge()
+    if request.method == "POST" and cl:
+        # 503 + Retry-After when storage is full even after early eviction
+        ServiceRegistry.get_file_management_service().disk_budget.admit(cl)
 
 # --------------------------------------------------------------------------- #
 # CONVERSION
@@ -1,6 +1,7 @@
 import logging
 import os
 import subprocess
+import uuid
 from typing import Dict, Any, Optional
 from src.models import TaskType, JobStatus, Job
 
@@ -35,7 +36,7 @@ class CompressionService:
 
             # Save input file using file service
             file_id, input_file_path = self.file_service.save_file(
-                file_data, original_filename or 'input.pdf'
+                file_data, original_filename or 'input.pdf', job_id=job_id
             )
             logger.debug(f"Saved input file: {input_file_path}")
 
@@ -43,7 +44,7 @@ class CompressionService:
             compression_level = settings.get('compression_level', 'medium')
             image_quality = settings.get('image_quality', 80)
             output_filename = f"compressed_{file_id}.pdf"
-            output_path = self.file_service.create_output_path(output_filename)
+            output_path = self.file_service.create_output_path(output_filename, job_id=job_id)
             logger.debug(f"Output path: {output_path}")
 
             # Perform compression
@@ -100,6 +101,8 @@ class CompressionService:
             raise FileNotFoundError(f"Input file not found: {input_path}")
 
         gs_setting = compression_settings.get(compression_level, '/default')
+        # Ghostscript writes to a temporary name; it is renamed into place once verified
+        partial_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
 
         command = [
             self.GHOSTSCRIPT_BINARY,
@@ -126,26 +129,32 @@ class CompressionService:
             '-dNOPAUSE',
             '-dQUIET',
             '-dBATCH',
-            f'-sOutputFile={output_path}',
+            f'-sOutputFile={partial_path}',
             input_path
         ]
 
         logger.info(f"Executing Ghostscript compression with level {compression_level}")
-        # Running Compression
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-
-        if result.returncode != 0:
-            logger.error(f"Ghostscript error: {result.stderr}")
-            raise Exception(f"Ghostscript failed: {result.stderr}")
-
-        # Verify output file
-        if not self.file_service.file_exists(output_path) or self.file_service.get_file_size(output_path) == 0:
-            raise Exception("Compression failed: Output file is empty or doesn't exist")
+        try:
+            # Running Compression
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                timeout=300
+            )
+
+            if result.returncode != 0:
+                logger.error(f"Ghostscript error: {result.stderr}")
+                raise Exception(f"Ghostscript failed: {result.stderr}")
+
+            # Verify output file
+            if not self.file_service.file_exists(partial_path) or self.file_service.get_file_size(partial_path) == 0:
+                raise Exception("Compression failed: Output file is empty or doesn't exist")
+
+            os.replace(partial_path, output_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
 
     def process_compression_job(self, job_id: str, file_data: bytes) -> Dict[str, Any]:
         """
@@ -264,7 +273,7 @@ class CompressionService:
 
         try:
             # Create temporary file using FileManagementService
-            file_id, temp_file_path = self.file_service.save_file(file_data, "analysis_temp.pdf")
+            file_id, temp_file_path = self.file_service.save_file(file_data, "analysis_temp.pdf", kind="temp")
 
             # Use pdfinfo to analyze PDF
             result = subprocess.run(
@@ -3,7 +3,6 @@ Conversion Service – Job-Oriented Architecture
 Handles PDF → Word, Text, HTML, Images, Excel
 Refactored to match compression service patterns
 """
-import io
 import json
 import logging
 import re
@@ -59,7 +58,8 @@ class ConversionService:
     # MAIN ENTRY POINT - Matches compression service pattern
     # --------------------------------------------------------------------------
     def process_conversion_job(self, job_id: str, file_data: bytes, target_format: str,
-                                original_filename: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+                               original_filename: str,
+                               options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Process conversion job with job status management - main entry point."""
         from src.main import job_operations_controller
         try:
@@ -69,7 +69,10 @@ class ConversionService:
                 raise ValueError(f"Job {job_id} not found")
 
             try:
-                input_data = json.loads(job.input_data) if isinstance(job.input_data, str) else (job.input_data or {})
+                input_data = job.input_data
+                if isinstance(input_data, str):
+                    input_data = json.loads(input_data)
+                input_data = input_data or {}
                 original_filename = input_data.get('original_filename') or original_filename
             except Exception:
                 logger.exception('Could not parse job.input_data, using defaults')
@@ -82,7 +85,8 @@ class ConversionService:
                 file_data=file_data,
                 target_format=target_format,
                 options=options or {},
-                original_filename=original_filename
+                original_filename=original_filename,
+                job_id=job_id
             )
             return result
 
@@ -102,8 +106,13 @@ class ConversionService:
 
     def convert_pdf_data(self, file_data: bytes, target_format: str, 
                         options: Optional[Dict[str, Any]] = None,
-                        original_filename: Optional[str] = None) -> Dict[str, Any]:
-        """Convert PDF to target format - internal method."""
+                        original_filename: Optional[str] = None,
+                        job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Convert PDF to target format - internal method.
+
+        Result files are indexed against ``job_id``, so they are kept as
+        long as the job is.
+        """
         options = options or {}
         
         if target_format.casefold() not in [val.casefold() for val in self.supported_formats]:
@@ -117,7 +126,8 @@ class ConversionService:
             # Save temporary PDF file
             temp_pdf_id, temp_pdf_path = self.file_service.save_file(
                 file_data, 
-                original_filename or "temp.pdf"
+                original_filename or "temp.pdf",
+                kind="temp"
             )
             
             # Extract content from PDF
@@ -125,15 +135,17 @@ class ConversionService:
 
             # Select appropriate converter
             if target_format == "docx":
-                result = self._convert_to_docx(pdf_content, options)
+                result = self._convert_to_docx(pdf_content, options, job_id)
             elif target_format == "txt":
-                result = self._convert_to_txt(pdf_content, options)
+                result = self._convert_to_txt(pdf_content, options, job_id)
             elif target_format == "html":
-                result = self._convert_to_html(pdf_content, options)
+                result = self._convert_to_html(pdf_content, options, job_id)
             elif target_format == "images":
-                result = self._convert_to_images_with_pdf(temp_pdf_path, pdf_content, options)
+                result = self._convert_to_images_with_pdf(
+                    temp_pdf_path, pdf_content, options, job_id
+                )
             elif target_format == "xlsx":
-                result = self._convert_to_xlsx(pdf_content, options)
+                result = self._convert_to_xlsx(pdf_content, options, job_id)
             else:
                 raise ValueError(f"Unsupported format: {target_format}")
             
@@ -170,7 +182,9 @@ class ConversionService:
 
         temp_pdf_id: Optional[str] = None
         try:
-            temp_pdf_id, temp_pdf_path = self.file_service.save_file(file_data, "preview.pdf")
+            temp_pdf_id, temp_pdf_path = self.file_service.save_file(
+                file_data, "preview.pdf", kind="temp"
+            )
             pdf_content = self._extract_pdf_content(Path(temp_pdf_path))
             
             return {
@@ -189,7 +203,9 @@ class ConversionService:
         finally:
             if temp_pdf_id and self.file_service:
                 try:
-                    self.file_service.delete_file(self.file_service.get_file_path(temp_pdf_id))
+                    self.file_service.delete_file(
+                        self.file_service.get_file_path(temp_pdf_id, kind="temp")
+                    )
                 except Exception as e:
                     logger.warning(f"Failed to cleanup temp file: {e}")
 
@@ -296,7 +312,8 @@ class ConversionService:
     # --------------------------------------------------------------------------
     # CONVERTERS
     # --------------------------------------------------------------------------
-    def _convert_to_docx(self, content: Dict[str, Any], opts: Dict[str, Any]) -> Dict[str, Any]:
+    def _convert_to_docx(self, content: Dict[str, Any], opts: Dict[str, Any],
+                         job_id: Optional[str] = None) -> Dict[str, Any]:
         """Convert to DOCX format."""
         if not DOCX_AVAILABLE:
             raise RuntimeError("python-docx not installed")
@@ -333,25 +350,23 @@ class ConversionService:
                         if col_idx < max_cols:
                             table.cell(row_idx, col_idx).text = str(cell_data)
 
-        # Save to bytes
-        docx_buffer = io.BytesIO()
-        doc.save(docx_buffer)
-        docx_data = docx_buffer.getvalue()
-        docx_buffer.close()
-
-        # Save using file service
-        filename = f"converted_{self._secure_filename(content.get('metadata',{}).get('title') or 'document')}.docx"
-        file_id, file_path = self.file_service.save_file(docx_data, filename)
+        # Stream straight to the result file
+        file_prefix = self._secure_filename(content.get("metadata", {}).get("title") or "document")
+        filename = f"converted_{file_prefix}.docx"
+        file_path = self.file_service.create_output_path(filename, job_id=job_id)
+        with self.file_service.open_output(file_path) as f:
+            doc.save(f)
         
         return {
             "success": True,
             "output_path": file_path,
             "filename": filename,
             "mime_type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "file_size": len(docx_data),
+            "file_size": self.file_service.get_file_size(file_path),
         }
 
-    def _convert_to_xlsx(self, content: Dict[str, Any], opts: Dict[str, Any]) -> Dict[str, Any]:
+    def _convert_to_xlsx(self, content: Dict[str, Any], opts: Dict[str, Any],
+                         job_id: Optional[str] = None) -> Dict[str, Any]:
         """Convert to Excel format."""
         if not OPENPYXL_AVAILABLE:
             raise RuntimeError("openpyxl not installed")
@@ -391,24 +406,22 @@ class ConversionService:
             ws = wb.create_sheet(title="Content")
             ws.cell(row=1, column=1, value=content.get("text", "No content extracted"))
 
-        # Save to bytes
-        xlsx_buffer = io.BytesIO()
-        wb.save(xlsx_buffer)
-        xlsx_data = xlsx_buffer.getvalue()
-        xlsx_buffer.close()
-
+        # Stream straight to the result file
         filename = f"converted_{file_prefix}.xlsx"
-        file_id, file_path = self.file_service.save_file(xlsx_data, filename)
+        file_path = self.file_service.create_output_path(filename, job_id=job_id)
+        with self.file_service.open_output(file_path) as f:
+            wb.save(f)
         
         return {
             "success": True,
             "output_path": file_path,
             "filename": filename,
             "mime_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "file_size": len(xlsx_data),
+            "file_size": self.file_service.get_file_size(file_path),
         }
 
-    def _convert_to_txt(self, content: Dict[str, Any], opts: Dict[str, Any]) -> Dict[str, Any]:
+    def _convert_to_txt(self, content: Dict[str, Any], opts: Dict[str, Any],
+                        job_id: Optional[str] = None) -> Dict[str, Any]:
         """Convert to text format."""
         quality = opts.get("quality", "medium")
         text = content["text"]
@@ -417,10 +430,13 @@ class ConversionService:
             text = re.sub(r"\s+", " ", text)
             text = re.sub(r"\n\s*\n", "\n\n", text)
             
-        filename = f"converted_{self._secure_filename(content.get('metadata',{}).get('title') or 'document')}.txt"
+        file_prefix = self._secure_filename(content.get("metadata", {}).get("title") or "document")
+        filename = f"converted_{file_prefix}.txt"
         text_data = text.encode('utf-8')
         
-        file_id, file_path = self.file_service.save_file(text_data, filename)
+        file_id, file_path = self.file_service.save_file(
+            text_data, filename, kind="results", job_id=job_id
+        )
         
         return {
             "success": True,
@@ -430,13 +446,17 @@ class ConversionService:
             "file_size": len(text_data),
         }
 
-    def _convert_to_html(self, content: Dict[str, Any], opts: Dict[str, Any]) -> Dict[str, Any]:
+    def _convert_to_html(self, content: Dict[str, Any], opts: Dict[str, Any],
+                         job_id: Optional[str] = None) -> Dict[str, Any]:
         """Convert to HTML format."""
         html = self._generate_html_content(content, opts)
-        filename = f"converted_{self._secure_filename(content.get('metadata',{}).get('title') or 'document')}.html"
+        file_prefix = self._secure_filename(content.get("metadata", {}).get("title") or "document")
+        filename = f"converted_{file_prefix}.html"
         html_data = html.encode('utf-8')
         
-        file_id, file_path = self.file_service.save_file(html_data, filename)
+        file_id, file_path = self.file_service.save_file(
+            html_data, filename, kind="results", job_id=job_id
+        )
         
         return {
             "success": True,
@@ -446,7 +466,9 @@ class ConversionService:
             "file_size": len(html_data),
         }
 
-    def _convert_to_images_with_pdf(self, pdf_path: str, content: Dict[str, Any], opts: Dict[str, Any]) -> Dict[str, Any]:
+    def _convert_to_images_with_pdf(self, pdf_path: str, content: Dict[str, Any],
+                                    opts: Dict[str, Any],
+                                    job_id: Optional[str] = None) -> Dict[str, Any]:
         """Convert PDF to images."""
         if not PDF_LIBS_AVAILABLE:
             raise RuntimeError("PDF libraries not installed")
@@ -471,7 +493,9 @@ class ConversionService:
                     img_data = pix.tobytes("png")
                     
                     filename = f"page_{page_num + 1}.png"
-                    file_id, file_path = self.file_service.save_file(img_data, filename)
+                    file_id, file_path = self.file_service.save_file(
+                        img_data, filename, kind="results", job_id=job_id
+                    )
                     image_files.append(file_path)
                     total_size += len(img_data)
 
@@ -510,8 +534,10 @@ class ConversionService:
             
         parts = [
             "<!DOCTYPE html><html><head>",
-            "<meta charset='utf-8'><meta name='viewport' content='width=device-width,initial-scale=1'>",
-            f"<title>{content.get('metadata', {}).get('title', 'Converted PDF')}</title>{css}</head><body>",
+            "<meta charset='utf-8'>",
+            "<meta name='viewport' content='width=device-width,initial-scale=1'>",
+            f"<title>{content.get('metadata', {}).get('title', 'Converted PDF')}</title>",
+            f"{css}</head><body>",
         ]
         
         if content.get("metadata", {}).get("title"):
@@ -689,8 +715,11 @@ class ConversionService:
                 missing_optional.append("images")
                 
             if missing_optional:
-                health_status['status'] = 'degraded' if health_status['status'] == 'healthy' else health_status['status']
-                health_status['errors'].append(f"Optional libraries missing: {', '.join(missing_optional)}")
+                if health_status['status'] == 'healthy':
+                    health_status['status'] = 'degraded'
+                health_status['errors'].append(
+                    f"Optional libraries missing: {', '.join(missing_optional)}"
+                )
                 
             # Check file service
             if not self.file_service:
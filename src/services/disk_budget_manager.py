@@ -0,0 +1,208 @@
+"""Disk budget manager for FileManagementService
+
+Keeps the upload folder within a configured disk budget:
+
+- tracks bytes used per storage tier (inputs, temp, results, blobs) from the
+  file index, plus the free space left on the volume
+- admits new work only while it fits, raising StorageCapacityError (503 with
+  Retry-After) instead of letting an upload fill the disk mid-processing
+- under pressure, evicts finished jobs early, soonest-to-expire first
+  according to the retention policy, before refusing anything
+"""
+import logging
+import shutil
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from src.config import Config
+from src.models import Job, JobResult
+from src.models.base import db
+from src.utils.exceptions import StorageCapacityError
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def parse_tier_budgets(spec: str) -> Dict[str, int]:
+    """Parse 'results=4096,temp=1024' (MB) into per-tier byte budgets"""
+    budgets = {}
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        tier, _, megabytes = part.partition('=')
+        budgets[tier.strip()] = int(float(megabytes) * MB)
+    return budgets
+
+
+class DiskBudgetManager:
+    """Admission control and early eviction for stored files"""
+
+    # Jobs whose files may be evicted early; running jobs are never touched
+    EVICTABLE_STATUSES = ('completed', 'failed')
+
+    # An upload needs room for itself, a working copy and its result
+    WORKING_SET_FACTOR = 3
+
+    # Usage figures are reused for this long to keep admission checks cheap
+    USAGE_CACHE_SECONDS = 5
+
+    def __init__(self, service, total_budget_bytes: Optional[int] = None,
+                 tier_budgets: Optional[Dict[str, int]] = None, min_free_bytes: Optional[int] = None,
+                 retry_after_seconds: Optional[int] = None, eviction_batch: Optional[int] = None):
+        """
+        Args:
+            service: FileManagementService whose storage is managed
+            total_budget_bytes: Budget for all tiers together (0 = unlimited)
+            tier_budgets: Per-tier budgets in bytes
+            min_free_bytes: Free space to always leave on the volume
+            retry_after_seconds: Retry-After sent with refusals
+            eviction_batch: Most jobs evicted per pressure check
+        """
+        self.service = service
+        self.total_budget_bytes = Config.DISK_BUDGET_MB * MB if total_budget_bytes is None else total_budget_bytes
+        self.tier_budgets = parse_tier_budgets(Config.DISK_TIER_BUDGETS_MB) if tier_budgets is None else tier_budgets
+        self.min_free_bytes = Config.DISK_MIN_FREE_MB * MB if min_free_bytes is None else min_free_bytes
+        self.retry_after_seconds = retry_after_seconds or Config.DISK_RETRY_AFTER_SECONDS
+        self.eviction_batch = eviction_batch or Config.CLEANUP_BATCH_SIZE
+        self._usage: Optional[Dict[str, int]] = None
+        self._usage_at = 0.0
+        self._evict_lock = threading.Lock()
+
+    # ------------------------------------------------------------------ usage
+
+    def usage(self, refresh: bool = False) -> Dict[str, int]:
+        """Bytes used per tier (cached briefly)"""
+        if refresh or self._usage is None or time.monotonic() - self._usage_at > self.USAGE_CACHE_SECONDS:
+            self._usage = self.service.bytes_by_tier()
+            self._usage_at = time.monotonic()
+        return self._usage
+
+    def free_bytes(self) -> int:
+        return shutil.disk_usage(self.service.upload_folder).free
+
+    def check(self, incoming_bytes: int = 0, tier: str = 'inputs', refresh: bool = False) -> Dict[str, Any]:
+        """Would ``incoming_bytes`` more in ``tier`` stay within every limit?
+
+        Returns:
+            Dict with ``ok``, the limit hit (``reason``), ``shortfall_bytes``
+            and the current figures
+        """
+        usage = self.usage(refresh=refresh)
+        used = sum(usage.values())
+        free = self.free_bytes()
+        status = {
+            'ok': True,
+            'reason': None,
+            'shortfall_bytes': 0,
+            'used_bytes': used,
+            'free_bytes': free,
+            'tiers': dict(usage),
+        }
+
+        shortfalls = []
+        if self.total_budget_bytes:
+            shortfalls.append(('total_budget', used + incoming_bytes - self.total_budget_bytes))
+        if self.tier_budgets.get(tier):
+            shortfalls.append((f'{tier}_budget', usage.get(tier, 0) + incoming_bytes - self.tier_budgets[tier]))
+        shortfalls.append(('min_free_space', self.min_free_bytes - (free - incoming_bytes)))
+
+        reason, shortfall = max(shortfalls, key=lambda item: item[1])
+        if shortfall > 0:
+            status.update(ok=False, reason=reason, shortfall_bytes=shortfall)
+        return status
+
+    # -------------------------------------------------------------- admission
+
+    def admit(self, incoming_bytes: int, tier: str = 'inputs'):
+        """Make sure a new upload fits, evicting early if needed
+
+        Raises:
+            StorageCapacityError: Still no room after eviction
+        """
+        needed = incoming_bytes * self.WORKING_SET_FACTOR
+        status = self.check(needed, tier)
+        if status['ok']:
+            return
+
+        # Evicting results helps with everything but another tier's own budget
+        if status['reason'] in ('total_budget', 'min_free_space', 'results_budget'):
+            self.evict(status['shortfall_bytes'])
+            status = self.check(needed, tier, refresh=True)
+            if status['ok']:
+                return
+
+        logger.warning(f"Refusing new work: {status['reason']} short by {status['shortfall_bytes'] / MB:.1f}MB")
+        raise StorageCapacityError(
+            reason=status['reason'],
+            retry_after=self.retry_after_seconds,
+            details={'shortfall_mb': round(status['shortfall_bytes'] / MB, 2)}
+        )
+
+    def relieve_pressure(self) -> Dict[str, Any]:
+        """Evict early if storage is already over budget (for periodic runs)"""
+        status = self.check(refresh=True)
+        if status['ok']:
+            return {'jobs_evicted': 0, 'space_freed_mb': 0.0}
+        return self.evict(status['shortfall_bytes'])
+
+    # --------------------------------------------------------------- eviction
+
+    def evict(self, bytes_needed: int) -> Dict[str, Any]:
+        """Remove finished jobs before their retention ends, soonest-to-expire first
+
+        At most ``eviction_batch`` jobs are removed per call so a pressure
+        spike caused by something else on the volume can't wipe every result.
+        """
+        summary = {'jobs_evicted': 0, 'space_freed_mb': 0.0}
+        if not self.service._index_available() or not self._evict_lock.acquire(blocking=False):
+            return summary
+
+        try:
+            retention = self.service.DEFAULT_RETENTION_PERIODS
+            candidates = []
+            for status in self.EVICTABLE_STATUSES:
+                jobs = Job.query.filter_by(status=status).order_by(Job.created_at, Job.job_id) \
+                    .limit(self.eviction_batch).all()
+                candidates.extend((job.created_at + timedelta(hours=retention[status]), job) for job in jobs)
+            candidates.sort(key=lambda item: item[0])
+
+            evicted = []
+            for _, job in candidates[:self.eviction_batch]:
+                if summary['space_freed_mb'] * MB >= bytes_needed:
+                    break
+                summary['space_freed_mb'] += self.service._cleanup_job_files(job)
+                evicted.append(job.job_id)
+
+            if evicted:
+                from src.services.service_registry import ServiceRegistry
+                ServiceRegistry.get_job_archive().archive_jobs(db.session, evicted)
+                db.session.execute(db.delete(JobResult).where(JobResult.job_id.in_(evicted)))
+                db.session.execute(db.delete(Job).where(Job.job_id.in_(evicted)))
+                db.session.commit()
+                ServiceRegistry.get_job_status_cache().delete_many(evicted)
+                summary['jobs_evicted'] = len(evicted)
+                self._usage = None
+                logger.warning(f"Disk pressure: evicted {len(evicted)} finished jobs early, "
+                               f"freed {summary['space_freed_mb']:.2f}MB")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Early eviction failed: {str(e)}")
+        finally:
+            self._evict_lock.release()
+
+        return summary
+
+    def status(self) -> Dict[str, Any]:
+        """Current usage and limits, for health checks"""
+        status = self.check(refresh=True)
+        return {
+            'status': 'healthy' if status['ok'] else 'degraded',
+            'reason': status['reason'],
+            'used_mb': round(status['used_bytes'] / MB, 2),
+            'free_mb': round(status['free_bytes'] / MB, 2),
+            'tiers_mb': {tier: round(size / MB, 2) for tier, size in status['tiers'].items()},
+            'total_budget_mb': round(self.total_budget_bytes / MB, 2) if self.total_budget_bytes else None,
+            'tier_budgets_mb': {tier: round(size / MB, 2) for tier, size in self.tier_budgets.items()},
+            'min_free_mb': round(self.min_free_bytes / MB, 2),
+        }
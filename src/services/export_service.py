@@ -16,6 +16,7 @@ except ImportError:
     pd = None
 
 from src.utils.exceptions import ExportError
+from src.utils.file_utils import atomic_write
 from src.config import Config
 
 logger = logging.getLogger(__name__)
@@ -160,7 +161,7 @@ class ExportService:
             }
             
             # Write to file
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with atomic_write(output_path, 'w', encoding='utf-8') as f:
                 json.dump(export_data, f, indent=2, ensure_ascii=False)
             
             file_size = os.path.getsize(output_path)
@@ -232,7 +233,7 @@ class ExportService:
             
             # Create Excel writer
             # noinspection PyUnresolvedReferences
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            with atomic_write(output_path) as f, pd.ExcelWriter(f, engine='openpyxl') as writer:
                 # Invoice summary sheet
                 self._create_invoice_summary_sheet(invoice_data, writer)
                 
@@ -280,7 +281,7 @@ class ExportService:
             }
             
             # Write to file
-            with open(output_path, 'w', encoding='utf-8') as f:
+            with atomic_write(output_path, 'w', encoding='utf-8') as f:
                 json.dump(export_data, f, indent=2, ensure_ascii=False)
             
             file_size = os.path.getsize(output_path)
@@ -313,7 +314,7 @@ class ExportService:
             # Extract transactions for CSV
             transactions = statement_data.get('data', {}).get('transactions', [])
             
-            with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
+            with atomic_write(output_path, 'w', newline='', encoding='utf-8') as csvfile:
                 if transactions:
                     # Get all possible fieldnames from transactions
                     fieldnames = set()
@@ -362,7 +363,7 @@ class ExportService:
             
             # Create Excel writer
             # noinspection PyUnresolvedReferences
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            with atomic_write(output_path) as f, pd.ExcelWriter(f, engine='openpyxl') as writer:
                 # Account summary sheet
                 self._create_statement_summary_sheet(statement_data, writer)
                 
@@ -390,7 +391,7 @@ class ExportService:
         """Create invoice summary CSV file."""
         data = invoice_data.get('data', {})
         
-        with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
+        with atomic_write(output_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
             
             # Write header
@@ -420,7 +421,7 @@ class ExportService:
         """Create detailed invoice CSV with line items."""
         line_items = invoice_data.get('data', {}).get('line_items', [])
         
-        with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
+        with atomic_write(output_path, 'w', newline='', encoding='utf-8') as csvfile:
             if line_items:
                 # Get all possible fieldnames from line items
                 fieldnames = set()
@@ -8,23 +8,38 @@ into a unified service that handles all file-related operations including:
 - File downloads for job results
 """
 
+import hashlib
+import itertools
+import json
 import logging
 import os
+import re
+import threading
 import time
 import uuid
 import zipfile
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Iterator, Iterable, Optional, Callable, IO, Union
+from urllib.parse import quote
 
-from flask import send_file
+from flask import Response, request, send_file, has_app_context, stream_with_context
+from sqlalchemy import and_, delete, event, or_, select, update
+from sqlalchemy.orm import Session
 
 from src.config import Config
-from src.models import Job
+from src.models import CleanupCursor, Job, FileBlob, JobResult, StoredFile
 from src.models.base import db
-from src.utils.db_transaction import safe_db_operation
+from src.database.sqlite_profile import incremental_vacuum
+from src.models.job_result import is_offloaded
 from src.utils.response_helpers import error_response
 from src.utils.db_transaction import db_transaction
+from src.utils.file_utils import atomic_write, copy_stream
+from src.utils.zip_utils import ZipEntry, iter_zip_stream, unique_arcname, zip_compression_for
+from src.services.storage_backends import StorageBackend, create_storage_backend
+from src.services.disk_budget_manager import DiskBudgetManager
+from src.services.scratch_space import ScratchSpace, create_scratch_space
 
 logger = logging.getLogger(__name__)
 
@@ -42,33 +57,153 @@ class FileManagementService:
     
     # File cleanup settings
     TEMP_FILE_MAX_AGE_HOURS = 1  # Clean up temp files after 1 hour
+    PROCESSING_SAFETY_BUFFER_HOURS = 2  # Extra grace before removing processing jobs
     
-    def __init__(self, upload_folder: str = None):
+    # Storage layout: <upload_folder>/<kind>/<aa>/<bb>/<filename>, where aa/bb
+    # are taken from a hash of the filename so no directory grows unbounded
+    STORAGE_KINDS = ('inputs', 'temp', 'results')
+    BLOB_KIND = 'blobs'  # content-addressed files, named <sha256><ext>
+    SHARD_DEPTH = 2
+    SHARD_WIDTH = 2
+    
+    # Job fields that may reference stored files
+    RESULT_PATH_KEYS = ('output_path', 'result_path', 'file_path', 'temp_path')
+    INPUT_PATH_KEYS = ('input_path', 'upload_path', 'original_path')
+    
+    # Index entries removed per commit during indexed cleanup
+    INDEX_CLEANUP_BATCH = 500
+    
+    _UUID_NAME = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\.')
+    _DIGEST = re.compile(r'^[0-9a-f]{64}$')
+    
+    def __init__(self, upload_folder: str = None, content_addressed: Optional[bool] = None,
+                 storage: Optional[StorageBackend] = None, scratch: Optional[ScratchSpace] = None):
         """Initialize the file management service
         
         Args:
             upload_folder: Directory to store uploaded files. Defaults to Config.UPLOAD_FOLDER.
+            content_addressed: Deduplicate saved files by content. Defaults to
+                Config.CONTENT_ADDRESSED_STORAGE.
+            storage: Backend that published results live in. Defaults to the
+                one selected by Config.STORAGE_BACKEND.
+            scratch: RAM-backed space for 'temp' files. Defaults to
+                Config.SCRATCH_DIR (disabled when unset).
         """
         self.upload_folder = upload_folder or Config.UPLOAD_FOLDER
+        if content_addressed is None:
+            content_addressed = Config.CONTENT_ADDRESSED_STORAGE
+        self.content_addressed = content_addressed
+        self.storage = storage or create_storage_backend(self.upload_folder)
+        self.scratch = scratch if scratch is not None else create_scratch_space()
+        self.cleanup_engine = CleanupEngine(self)
+        self.disk_budget = DiskBudgetManager(self)
         os.makedirs(self.upload_folder, exist_ok=True)
         logger.info(f"FileManagementService initialized with upload folder: {self.upload_folder}")
     
+    # ========================= STORAGE LAYOUT =========================
+    
+    def shard_path(self, filename: str, kind: str = 'results', create: bool = True) -> str:
+        """Get the sharded path for a file in one of the storage trees
+        
+        Args:
+            filename: Bare file name
+            kind: Storage tree ('inputs', 'temp' or 'results')
+            create: Create the shard directory if it does not exist
+            
+        Returns:
+            Full file path
+        """
+        if kind not in self.STORAGE_KINDS and kind != self.BLOB_KIND:
+            raise ValueError(f"Unknown storage kind: {kind}")
+        
+        digest = hashlib.sha256(filename.encode('utf-8')).hexdigest()
+        shards = [digest[i * self.SHARD_WIDTH:(i + 1) * self.SHARD_WIDTH] for i in range(self.SHARD_DEPTH)]
+        directory = os.path.join(self.upload_folder, kind, *shards)
+        if create:
+            os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+    
+    def iter_stored_files(self, kinds: Iterable[str] = STORAGE_KINDS,
+                          include_legacy: bool = True) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (path, stat) for every stored file
+        
+        Walks the storage trees with ``os.scandir`` so each file is stat'ed
+        once. ``include_legacy`` also yields files left flat in the upload
+        folder by the pre-sharding layout.
+        
+        Args:
+            kinds: Storage trees to walk
+            include_legacy: Include files directly inside the upload folder
+        """
+        stack = [os.path.join(self.upload_folder, kind) for kind in kinds]
+        if include_legacy:
+            try:
+                with os.scandir(self.upload_folder) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                return
+        
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+    
     # ========================= FILE STORAGE OPERATIONS =========================
     
-    def save_file(self, file_data: bytes, original_filename: str = None) -> Tuple[str, str]:
+    def save_file(self, file_data: bytes, original_filename: str = None, kind: str = 'inputs',
+                  job_id: Optional[str] = None, fsync: bool = False, commit: bool = True) -> Tuple[str, str]:
         """Save file data to disk with a unique filename
         
+        The file is written to a temporary name and renamed into place, so
+        readers never see a partial file. In content-addressed mode the data
+        is stored once per distinct content and the returned ID is its
+        SHA-256 digest; ``kind`` is ignored.
+        
+        'temp' files go to the scratch space (tmpfs) when one is configured
+        and has room; ``get_file_path`` and ``delete_file`` find them there.
+        
         Args:
             file_data: Binary file data to save
             original_filename: Original filename (used for extension)
+            kind: Storage tree ('inputs', 'temp' or 'results')
+            job_id: Owning job, recorded in the file index
+            fsync: Flush the file to disk before returning
+            commit: Commit the index/blob changes (pass False to join an
+                enclosing transaction)
             
         Returns:
             Tuple of (unique_id, file_path)
         """
-        try:
-            # Generate unique ID and create safe filename
-            unique_id = str(uuid.uuid4())
+        return self.save_stream(file_data, original_filename, kind=kind, job_id=job_id, fsync=fsync,
+                                commit=commit)
+    
+    def save_stream(self, source: Union[bytes, IO[bytes], Iterable[bytes]], original_filename: str = None,
+                    kind: str = 'inputs', job_id: Optional[str] = None, fsync: bool = False,
+                    commit: bool = True) -> Tuple[str, str]:
+        """Save data from a file-like object or chunk iterator without buffering it
+        
+        Args:
+            source: Bytes, a binary file-like object (e.g. an upload stream) or
+                an iterable of byte chunks
+            original_filename: Original filename (used for extension)
+            kind: Storage tree ('inputs', 'temp' or 'results')
+            job_id: Owning job, recorded in the file index
+            fsync: Flush the file to disk before returning
+            commit: Commit the index/blob changes (pass False to join an
+                enclosing transaction)
             
+        Returns:
+            Tuple of (unique_id, file_path)
+        """
+        try:
             # Get file extension from original filename or default to .pdf
             extension = '.pdf'
             if original_filename:
@@ -76,16 +211,31 @@ class FileManagementService:
                 if ext:
                     extension = ext
             
+            if kind == 'temp' and self.scratch and isinstance(source, (bytes, bytearray)):
+                unique_id = str(uuid.uuid4())
+                file_path = self.scratch.write(f"{unique_id}{extension}", source, fsync=fsync)
+                if file_path:
+                    logger.debug(f"Scratch file saved: {file_path} ({len(source)} bytes)")
+                    return unique_id, file_path
+            
+            if self.content_addressed:
+                if isinstance(source, (bytes, bytearray)):
+                    return self.store_blob(bytes(source), extension, fsync=fsync, commit=commit)
+                return self.store_blob_stream(source, extension, fsync=fsync, commit=commit)
+            
+            # Generate unique ID and create safe filename
+            unique_id = str(uuid.uuid4())
+            
             # Create filename and path
             filename = f"{unique_id}{extension}"
-            file_path = os.path.join(self.upload_folder, filename)
+            file_path = self.shard_path(filename, kind)
             
             # Save file
-            with open(file_path, 'wb') as f:
-                f.write(file_data)
+            with atomic_write(file_path, fsync=fsync) as f:
+                file_size = copy_stream(source, f)
             
-            file_size = len(file_data)
             logger.info(f"File saved: {filename} ({file_size} bytes)")
+            self.index_file(file_path, kind, job_id=job_id, size_bytes=file_size, commit=commit)
             
             return unique_id, file_path
             
@@ -93,21 +243,66 @@ class FileManagementService:
             logger.error(f"Error saving file {original_filename}: {str(e)}")
             raise
     
-    def get_file_path(self, file_id: str, extension: str = '.pdf') -> str:
+    @contextmanager
+    def open_output(self, file_path: str, mode: str = 'wb', fsync: bool = False, **open_kwargs) -> Iterator[IO]:
+        """Stream a file handed out by ``create_output_path`` into place atomically
+        
+        Example::
+        
+            path = file_service.create_output_path("report.docx", job_id=job_id)
+            with file_service.open_output(path) as f:
+                document.save(f)
+        
+        Args:
+            file_path: Destination path
+            mode: 'wb' for binary or 'w' for text
+            fsync: Flush the file to disk before returning
+            **open_kwargs: Passed to open() (e.g. encoding)
+        
+        Yields:
+            Open file object to write to
+        """
+        with atomic_write(file_path, mode=mode, fsync=fsync, **open_kwargs) as f:
+            yield f
+        self.index_file(file_path, self._kind_of(file_path), size_bytes=os.path.getsize(file_path))
+    
+    def get_file_path(self, file_id: str, extension: str = '.pdf', kind: str = 'inputs') -> str:
         """Get the full path for a file based on its ID
         
         Args:
             file_id: Unique file identifier
             extension: File extension (default: .pdf)
+            kind: Storage tree the file was saved to (default: inputs)
             
         Returns:
             Full file path
         """
         filename = f"{file_id}{extension}"
-        return os.path.join(self.upload_folder, filename)
-
-    def create_output_path(self, filename: str):
-        return os.path.join(self.upload_folder, filename)
+        if kind == 'temp' and self.scratch:
+            scratch_path = self.scratch.path_for(filename)
+            if os.path.exists(scratch_path):
+                return scratch_path
+        if self.content_addressed and self._DIGEST.match(file_id):
+            kind = self.BLOB_KIND
+        return self.shard_path(filename, kind, create=False)
+
+    def create_output_path(self, filename: str, kind: str = 'results', job_id: Optional[str] = None) -> str:
+        """Get a sharded path for a new result (or temp) file, creating its directory
+        
+        The path is indexed straight away in a short transaction of its own,
+        so the entry neither depends on nor commits whatever is pending on
+        the caller's session. Its size is filled in by
+        ``reconcile_file_index``, which also indexes the file should this
+        fail.
+        """
+        file_path = self.shard_path(filename, kind)
+        if self._index_available():
+            try:
+                with Session(db.engine) as session, session.begin():
+                    self._upsert_index_entry(session, file_path, kind, job_id)
+            except Exception as e:
+                logger.warning(f"Could not index file {file_path}: {str(e)}")
+        return file_path
 
     @staticmethod
     def file_exists(file_path: str) -> bool:
@@ -136,28 +331,457 @@ class FileManagementService:
         except OSError as e:
             raise e
 
-    @staticmethod
-    def delete_file(file_path: str) -> bool:
+    def delete_file(self, file_path: str, commit: bool = True) -> bool:
         """Delete a file safely
+        
+        Content-addressed blobs are released instead, and only removed from
+        disk once nothing references them.
+        
         Args:
             file_path: Path to the file to delete
+            commit: Commit a blob reference change (pass False to join an
+                enclosing transaction)
         Returns:
-            True if file was deleted successfully, False otherwise
+            True if file was deleted (or blob released) successfully, False otherwise
         """
         try:
+            digest = self._blob_digest(file_path)
+            if digest:
+                self.release_blob(digest, commit=commit)
+                return True
+            if self.scratch and self.scratch.contains(file_path):
+                # Scratch files are never indexed
+                try:
+                    os.remove(file_path)
+                    return True
+                except FileNotFoundError:
+                    return False
             if os.path.exists(file_path):
                 os.remove(file_path)
                 logger.debug(f"File deleted: {file_path}")
+                self._unindex_file(file_path)
                 return True
             return False
         except Exception as e:
             logger.error(f"Error deleting file {file_path}: {str(e)}")
             return False
     
+    # ========================= CONTENT-ADDRESSED BLOBS =========================
+    
+    def store_blob(self, file_data: bytes, extension: str = '', fsync: bool = False,
+                   commit: bool = True) -> Tuple[str, str]:
+        """Store data once per distinct content and take a reference to it
+        
+        Args:
+            file_data: Binary file data to store
+            extension: Extension for the blob file name if it is new
+            fsync: Flush a newly written blob to disk before returning
+            commit: Commit the reference (pass False to join an enclosing
+                transaction)
+            
+        Returns:
+            Tuple of (sha256_digest, file_path)
+        """
+        digest = hashlib.sha256(file_data).hexdigest()
+        
+        def materialize(path: str):
+            with atomic_write(path, fsync=fsync) as f:
+                f.write(file_data)
+        
+        return self._store_blob(digest, extension, len(file_data), materialize, commit)
+    
+    def store_blob_stream(self, source: Union[IO[bytes], Iterable[bytes]], extension: str = '',
+                          fsync: bool = False, commit: bool = True) -> Tuple[str, str]:
+        """Store streamed data as a blob, hashing it while it is staged to disk
+        
+        Args:
+            source: Binary file-like object or iterable of byte chunks
+            extension: Extension for the blob file name if it is new
+            fsync: Flush a newly written blob to disk before returning
+            commit: Commit the reference (pass False to join an enclosing
+                transaction)
+            
+        Returns:
+            Tuple of (sha256_digest, file_path)
+        """
+        hasher = hashlib.sha256()
+        staging_path = self.shard_path(f"{uuid.uuid4()}{extension}.part", 'temp')
+        try:
+            with open(staging_path, 'wb') as f:
+                size = copy_stream(source, f, on_chunk=hasher.update)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            return self._store_blob(hasher.hexdigest(), extension, size,
+                                    lambda path: os.replace(staging_path, path), commit)
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+    
+    def _store_blob(self, digest: str, extension: str, size_bytes: int,
+                    materialize: Callable[[str], None], commit: bool) -> Tuple[str, str]:
+        """Reference an existing blob or materialize and register a new one
+        
+        The reference is taken in the caller's transaction. Registering a new
+        blob can't conflict with another worker storing the same content
+        (``INSERT ... ON CONFLICT DO NOTHING``), so nothing is rolled back
+        here; the session is only committed, or rolled back on error, when
+        ``commit`` is set.
+        """
+        try:
+            blob_extension = self._reference_blob(digest)
+            if blob_extension is None:
+                path = self.shard_path(f"{digest}{extension}", self.BLOB_KIND)
+                materialize(path)
+                if self._register_blob(digest, extension, size_bytes):
+                    if commit:
+                        db.session.commit()
+                    logger.info(f"Blob stored: {digest} ({size_bytes} bytes)")
+                    return digest, path
+                # Another worker stored the same content first
+                blob_extension = self._reference_blob(digest)
+                if blob_extension != extension:
+                    os.remove(path)
+            
+            if commit:
+                db.session.commit()
+            path = self.shard_path(f"{digest}{blob_extension}", self.BLOB_KIND)
+            if not os.path.exists(path):
+                materialize(path)
+            logger.info(f"Blob referenced: {digest} ({size_bytes} bytes)")
+            return digest, path
+        
+        except Exception as e:
+            if commit:
+                db.session.rollback()
+            logger.error(f"Error storing blob {digest}: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _register_blob(digest: str, extension: str, size_bytes: int) -> bool:
+        """Insert a blob row with one reference; False if the digest is already stored"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        now = datetime.utcnow()
+        statement = insert(FileBlob).values(
+            digest=digest, extension=extension, size_bytes=size_bytes, ref_count=1,
+            created_at=now, last_referenced_at=now
+        ).on_conflict_do_nothing(index_elements=[FileBlob.digest])
+        return db.session.execute(statement).rowcount == 1
+    
+    def release_blob(self, digest: str, commit: bool = True) -> float:
+        """Drop a reference to a blob, deleting it when none remain
+        
+        Args:
+            digest: SHA-256 digest of the blob
+            commit: Commit the reference change (pass False to join an
+                enclosing transaction)
+            
+        Returns:
+            Space freed in MB
+        """
+        space_freed_mb = 0.0
+        try:
+            db.session.execute(
+                update(FileBlob).where(FileBlob.digest == digest).values(ref_count=FileBlob.ref_count - 1)
+            )
+            orphan = db.session.execute(
+                select(FileBlob.extension, FileBlob.size_bytes).where(
+                    FileBlob.digest == digest, FileBlob.ref_count <= 0)
+            ).first()
+            
+            if orphan:
+                db.session.execute(delete(FileBlob).where(FileBlob.digest == digest, FileBlob.ref_count <= 0))
+                path = self.shard_path(f"{digest}{orphan.extension}", self.BLOB_KIND, create=False)
+                if os.path.exists(path):
+                    # Unlinked by the after_commit hook, so a rollback keeps the file
+                    db.session().info.setdefault(_RELEASED_BLOBS_KEY, []).append(path)
+                    space_freed_mb = orphan.size_bytes / (1024 * 1024)
+                logger.debug(f"Blob released: {digest}")
+            
+            if commit:
+                db.session.commit()
+            return space_freed_mb
+        
+        except Exception as e:
+            if commit:
+                db.session.rollback()
+            logger.error(f"Error releasing blob {digest}: {str(e)}")
+            raise
+    
+    def _reference_blob(self, digest: str) -> Optional[str]:
+        """Increment a blob's reference count; returns its extension, or None if it is not stored"""
+        bumped = db.session.execute(
+            update(FileBlob).where(FileBlob.digest == digest).values(
+                ref_count=FileBlob.ref_count + 1, last_referenced_at=datetime.utcnow())
+        ).rowcount
+        if not bumped:
+            return None
+        return db.session.execute(select(FileBlob.extension).where(FileBlob.digest == digest)).scalar_one()
+    
+    def _blob_digest(self, file_path: str) -> Optional[str]:
+        """Return the digest if the path is a blob in this service's blob tree"""
+        blob_root = os.path.join(os.path.realpath(self.upload_folder), self.BLOB_KIND) + os.sep
+        if not os.path.realpath(file_path).startswith(blob_root):
+            return None
+        digest = os.path.basename(file_path)[:64]
+        return digest if self._DIGEST.match(digest) else None
+    
+    # ========================= FILE INDEX =========================
+    
+    def index_file(self, file_path: str, kind: str, job_id: Optional[str] = None,
+                   size_bytes: Optional[int] = None, created_at: Optional[datetime] = None,
+                   commit: bool = True) -> bool:
+        """Record (or refresh) a stored file in the file index
+        
+        Needs an application context; without one the file is simply not
+        indexed and is picked up by ``reconcile_file_index`` later.
+        
+        Args:
+            file_path: Path of the stored file
+            kind: Storage tree the file belongs to
+            job_id: Owning job, if known
+            size_bytes: File size, if known
+            created_at: Creation time (default: now); expiry is derived from it
+            commit: Commit immediately (pass False to join an enclosing transaction)
+            
+        Returns:
+            True if the file was indexed
+        """
+        if not self._index_available():
+            return False
+        
+        try:
+            self._upsert_index_entry(db.session, file_path, kind, job_id, size_bytes, created_at)
+            if commit:
+                db.session.commit()
+            return True
+        
+        except Exception as e:
+            if commit:
+                db.session.rollback()
+            logger.warning(f"Could not index file {file_path}: {str(e)}")
+            return False
+    
+    def _upsert_index_entry(self, session: Session, file_path: str, kind: str, job_id: Optional[str] = None,
+                            size_bytes: Optional[int] = None, created_at: Optional[datetime] = None):
+        path = os.path.abspath(file_path)
+        created_at = created_at or datetime.utcnow()
+        entry = session.query(StoredFile).filter_by(path=path).first()
+        if entry is None:
+            entry = StoredFile(path=path, kind=kind)
+            session.add(entry)
+        entry.kind = kind
+        entry.size_bytes = size_bytes
+        entry.job_id = job_id or entry.job_id
+        entry.created_at = created_at
+        entry.expires_at = created_at + self._file_ttl(kind, job_owned=entry.job_id is not None)
+    
+    def reconcile_file_index(self) -> Dict[str, Any]:
+        """Bring the file index in line with what is on disk
+        
+        Indexes files written without going through the service, fills in
+        sizes for paths handed out by ``create_output_path`` and drops entries
+        whose files are gone. This is the only full directory walk, so run it
+        rarely.
+        
+        Returns:
+            Reconciliation summary dictionary
+        """
+        summary = {'files_added': 0, 'sizes_updated': 0, 'entries_removed': 0, 'errors': []}
+        if not self._index_available():
+            summary['errors'].append("File index requires an application context")
+            return summary
+        
+        try:
+            entries = {entry.path: entry for entry in StoredFile.query.filter(self._index_scope())}
+            
+            for file_path, stat in self.iter_stored_files(include_legacy=False):
+                path = os.path.abspath(file_path)
+                entry = entries.pop(path, None)
+                if entry is None:
+                    self.index_file(path, self._kind_of(path), size_bytes=stat.st_size,
+                                    created_at=datetime.utcfromtimestamp(stat.st_mtime), commit=False)
+                    summary['files_added'] += 1
+                elif entry.size_bytes != stat.st_size:
+                    entry.size_bytes = stat.st_size
+                    summary['sizes_updated'] += 1
+            
+            for entry in entries.values():
+                db.session.delete(entry)
+                summary['entries_removed'] += 1
+            
+            db.session.commit()
+            logger.info(f"File index reconciled: {summary['files_added']} added, "
+                        f"{summary['sizes_updated']} sizes updated, {summary['entries_removed']} removed")
+        
+        except Exception as e:
+            db.session.rollback()
+            error_msg = f"Error reconciling file index: {str(e)}"
+            logger.error(error_msg)
+            summary['errors'].append(error_msg)
+        
+        return summary
+    
+    def _file_ttl(self, kind: str, job_owned: bool = False) -> timedelta:
+        """Retention period for a file of the given kind
+        
+        Inputs and results of a job must outlive the job itself (the jobs
+        phase of cleanup removes them together with it), so they are kept
+        at least as long as the longest job retention. The expiry is only a
+        backstop for files whose job went away some other way.
+        """
+        if kind in ('temp', 'legacy'):
+            return timedelta(hours=self.TEMP_FILE_MAX_AGE_HOURS)
+        max_age = Config.MAX_FILE_AGE
+        ttl = max_age if isinstance(max_age, timedelta) else timedelta(hours=max_age)
+        if job_owned:
+            longest_retention = max(self._retention_periods().values()) + self.PROCESSING_SAFETY_BUFFER_HOURS
+            ttl = max(ttl, timedelta(hours=longest_retention))
+        return ttl
+    
+    def _kind_of(self, file_path: str) -> str:
+        """Storage tree a path belongs to, or 'legacy' for flat files"""
+        relative = os.path.relpath(file_path, self.upload_folder).split(os.sep)
+        return relative[0] if len(relative) > 1 and relative[0] in self.STORAGE_KINDS else 'legacy'
+    
+    @staticmethod
+    def _index_available() -> bool:
+        return has_app_context()
+    
+    def _index_scope(self):
+        """Filter restricting index queries to this service's upload folder"""
+        return StoredFile.path.startswith(os.path.abspath(self.upload_folder) + os.sep, autoescape=True)
+    
+    def _unindex_file(self, file_path: str):
+        if not self._index_available():
+            return
+        try:
+            StoredFile.query.filter_by(path=os.path.abspath(file_path)).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not remove {file_path} from file index: {str(e)}")
+    
+    def _remove_indexed_files(self, conditions: List[Any], summary: Dict[str, Any]):
+        """Delete the files behind index entries matching all conditions, in batches
+        
+        Entries whose file could not be removed are kept for the next run.
+        """
+        last_id = 0
+        while True:
+            last_id, count = self._remove_indexed_batch(conditions, last_id, self.INDEX_CLEANUP_BATCH, summary)
+            if count < self.INDEX_CLEANUP_BATCH:
+                break
+    
+    def _remove_indexed_batch(self, conditions: List[Any], after_id: int, limit: int,
+                              summary: Dict[str, Any]) -> Tuple[int, int]:
+        """Delete one batch of indexed files with ids above ``after_id``
+        
+        Removed entries are dropped with a single DELETE and committed, so
+        each batch holds the database write lock only briefly.
+        
+        Returns:
+            (last id seen, entries examined)
+        """
+        batch = db.session.execute(
+            select(StoredFile.id, StoredFile.path, StoredFile.size_bytes)
+            .where(*conditions, StoredFile.id > after_id)
+            .order_by(StoredFile.id).limit(limit)
+        ).all()
+        
+        removed = []
+        for entry_id, path, size_bytes in batch:
+            try:
+                if size_bytes is None and os.path.exists(path):
+                    size_bytes = os.path.getsize(path)
+                os.remove(path)
+                summary['files_deleted'] += 1
+                summary['space_freed_mb'] += (size_bytes or 0) / (1024 * 1024)
+                logger.debug(f"Deleted expired file: {path}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                error_msg = f"Could not delete file {path}: {str(e)}"
+                logger.warning(error_msg)
+                summary['errors'].append(error_msg)
+                continue
+            removed.append(entry_id)
+        
+        if removed:
+            db.session.execute(delete(StoredFile).where(StoredFile.id.in_(removed)))
+        db.session.commit()
+        return (batch[-1][0] if batch else after_id), len(batch)
+    
+    @staticmethod
+    def _remove_files_older_than(files: Iterable[Tuple[str, os.stat_result]], cutoff_time: float,
+                                 summary: Dict[str, Any]):
+        """Delete scanned files last modified before cutoff_time (epoch seconds)"""
+        for file_path, stat in files:
+            if stat.st_mtime >= cutoff_time:
+                continue
+            try:
+                os.remove(file_path)
+                summary['files_deleted'] += 1
+                summary['space_freed_mb'] += stat.st_size / (1024 * 1024)
+                logger.debug(f"Deleted old file: {file_path}")
+            except OSError as e:
+                error_msg = f"Could not delete file {file_path}: {str(e)}"
+                logger.warning(error_msg)
+                summary['errors'].append(error_msg)
+    
+    # ========================= PUBLISHED RESULTS =========================
+    
+    def storage_key(self, file_path: str) -> Optional[str]:
+        """Object key for a file under the upload folder, or None if it lives elsewhere"""
+        root = os.path.abspath(self.upload_folder)
+        path = os.path.abspath(file_path)
+        if not path.startswith(root + os.sep):
+            return None
+        return os.path.relpath(path, root).replace(os.sep, '/')
+    
+    def publish_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Hand a job's output file to the storage backend
+        
+        Records the object key as ``output_key`` so any node can serve the
+        download. With the local backend the file is already in place and is
+        left untouched; remote backends take the file (multipart upload) and
+        the worker's copy is dropped along with ``output_path``.
+        
+        Args:
+            result: Job result dictionary
+        Returns:
+            Result dictionary to store on the job
+        """
+        output_path = result.get('output_path')
+        if not output_path or result.get('output_key') or not os.path.isfile(output_path):
+            return result
+        key = self.storage_key(output_path)
+        if key is None:
+            return result
+        
+        published = dict(result, output_key=key)
+        if self.storage.is_local:
+            return published
+        
+        digest = self._blob_digest(output_path)
+        if digest:
+            # Blobs are shared, so upload a copy and drop this reference
+            with open(output_path, 'rb') as f:
+                self.storage.put_stream(key, f)
+            self.release_blob(digest)
+        else:
+            self.storage.put_file(key, output_path)
+            self._unindex_file(output_path)
+        published.pop('output_path')
+        logger.info(f"Published result {key} to {type(self.storage).__name__}")
+        return published
+    
     # ========================= FILE DOWNLOAD OPERATIONS =========================
 
-    @staticmethod
-    def get_job_download_response(job_id: str):
+    def get_job_download_response(self, job_id: str):
         """Get Flask response for downloading job result file
         Args:
             job_id: Job identifier
@@ -175,36 +799,100 @@ class FileManagementService:
                 return error_response(message="Job not completed yet", status_code=400)
             
             # Check if result file exists
-            if not job.result or "output_path" not in job.result:
+            if not job.result or not (job.result.get("output_key") or job.result.get("output_path")):
                 return error_response(message="No result file available", status_code=404)
             
+            # Get file metadata
+            filename = job.result.get("original_filename", "result")
+            mime_type = job.result.get("mime_type", "application/octet-stream")
+            
+            # Published results are served from the storage backend; remote
+            # objects are streamed through without touching local disk
+            key = job.result.get("output_key")
+            if key and not self.storage.is_local:
+                logger.info(f"Streaming download for job {job_id}: {filename}")
+                return self._stream_object_response(key, filename, mime_type)
+            
             # Resolve file path
-            raw_path = job.result["output_path"]
-            path = (Path.cwd() / raw_path).resolve()
+            if key:
+                local_path = self.storage.local_path(key)
+                path = Path(local_path) if local_path else None
+            else:
+                path = (Path.cwd() / job.result["output_path"]).resolve()
             
-            if not path.is_file():
+            if path is None or not path.is_file():
                 logger.warning(f"Result file not found on disk: {path}")
                 return error_response(message="Result file not found on disk", status_code=404)
             
-            # Get file metadata
-            filename = job.result.get("original_filename", "result")
-            mime_type = job.result.get("mime_type", "application/octet-stream")
+            # Let nginx send the file so the worker is free immediately
+            if Config.DOWNLOAD_MODE == 'accel':
+                accel_key = key or self.storage_key(str(path))
+                if accel_key:
+                    logger.info(f"Handing download for job {job_id} to nginx: {accel_key}")
+                    return self._accel_redirect_response(accel_key, filename, mime_type)
             
             logger.info(f"Serving download for job {job_id}: {filename}")
             
+            # conditional=True answers Range, If-Range and If-None-Match
+            # requests with 206/304 instead of resending the whole file
             return send_file(
                 str(path),
                 as_attachment=True,
                 download_name=filename,
-                mimetype=mime_type
+                mimetype=mime_type,
+                conditional=True,
+                etag=True
             )
             
         except Exception as e:
             logger.error(f"Error preparing download for job {job_id}: {str(e)}")
             return error_response(message="Error preparing file download", status_code=500)
 
-    @staticmethod
-    def is_download_available(job_id: str) -> bool:
+    def _accel_redirect_response(self, key: str, filename: str, mime_type: str) -> Response:
+        """Empty response telling nginx to serve a key from its internal location"""
+        response = Response(mimetype=mime_type)
+        response.headers['X-Accel-Redirect'] = f"{Config.ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(key)}"
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+        return response
+    
+    def _stream_object_response(self, key: str, filename: str, mime_type: str) -> Response:
+        """Stream a stored object, honouring Range, If-Range and If-None-Match"""
+        size = self.storage.size(key)
+        if size is None:
+            logger.warning(f"Result object not found in storage: {key}")
+            return error_response(message="Result file not found in storage", status_code=404)
+        
+        # Result keys are unique per job output, so key and size identify the content
+        etag = hashlib.sha1(f"{key}:{size}".encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        status, start, end = 200, 0, size - 1
+        byte_range = request.range
+        if_range = request.if_range
+        range_applies = not (if_range.etag or if_range.date) or if_range.etag == etag
+        if byte_range is not None and range_applies and \
+                byte_range.units == 'bytes' and len(byte_range.ranges) == 1:
+            bounds = byte_range.range_for_length(size)
+            if bounds is None:
+                response = Response(status=416)
+                response.headers['Content-Range'] = f"bytes */{size}"
+                return response
+            status, start, end = 206, bounds[0], bounds[1] - 1
+        
+        body = self.storage.iter_range(key, start, end) if end >= start else iter(())
+        response = Response(stream_with_context(body), status=status, mimetype=mime_type)
+        response.headers['Content-Length'] = str(end - start + 1)
+        response.headers['Accept-Ranges'] = 'bytes'
+        if status == 206:
+            response.headers['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response.set_etag(etag)
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+        return response
+    
+    def is_download_available(self, job_id: str) -> bool:
         """Check if download is available for a job
         Args:
             job_id: Job identifier
@@ -216,6 +904,10 @@ class FileManagementService:
             if not job or not job.is_completed() or not job.result:
                 return False
             
+            key = job.result.get("output_key")
+            if key:
+                return self.storage.exists(key)
+            
             output_path = job.result.get("output_path")
             if not output_path:
                 return False
@@ -243,60 +935,119 @@ class FileManagementService:
             Exception: If archive creation fails
         """
         try:
-            # Create archive filename with job ID
-            archive_filename = f"processed_files_{job_id}.zip"
-            archive_path = os.path.join(self.upload_folder, archive_filename)
-            
-            # Create ZIP archive
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            with self.open_result_archive(job_id) as archive:
+                archive.open()
                 for file_info in processed_files:
-                    # Get file path from the processed file info
-                    file_path = file_info.get('output_path') or file_info.get('file_path')
-                    if not file_path or not os.path.exists(file_path):
-                        logger.warning(f"Skipping missing file: {file_path}")
-                        continue
-                    
-                    # Get original filename or create one from file info
-                    original_filename = file_info.get('original_filename') or file_info.get('filename')
-                    if not original_filename:
-                        # Generate filename from path
-                        original_filename = os.path.basename(file_path)
-                    
-                    # Add file to archive with original filename
-                    zipf.write(file_path, original_filename)
-                    logger.debug(f"Added file to archive: {original_filename}")
-            
-            # Verify archive was created successfully
-            if not os.path.exists(archive_path):
-                raise Exception("Archive file was not created")
-            
-            archive_size = os.path.getsize(archive_path)
-            logger.info(f"Created result archive for job {job_id}: {archive_path} ({archive_size} bytes)")
-            
-            return archive_path
+                    archive.add(file_info)
+            
+            archive_size = os.path.getsize(archive.path)
+            logger.info(f"Created result archive for job {job_id}: {archive.path} ({archive_size} bytes)")
+            
+            return archive.path
             
         except Exception as e:
             logger.error(f"Error creating result archive for job {job_id}: {str(e)}")
-            # Clean up partial archive if it exists
-            # noinspection PyUnboundLocalVariable
-            if 'archive_path' in locals() and os.path.exists(archive_path):
-                try:
-                    os.remove(archive_path)
-                except OSError as e:
-                    pass
             raise
     
+    def open_result_archive(self, job_id: str) -> 'ResultArchiveWriter':
+        """Start a job's result archive that files are appended to as they finish
+        
+        Use as a context manager; the archive only appears at its final path
+        once it is closed without error.
+        """
+        return ResultArchiveWriter(self, job_id)
+    
+    def get_job_archive_stream_response(self, job_id: str):
+        """Stream a ZIP of a bulk job's individual results, built at request time
+        
+        Args:
+            job_id: Job identifier
+        Returns:
+            Flask streaming response or error response
+        """
+        try:
+            job = Job.query.filter_by(job_id=job_id).first()
+            if not job:
+                return error_response(message="Job not found", status_code=404)
+            if not job.is_completed():
+                return error_response(message="Job not completed yet", status_code=400)
+            
+            result = job.get_full_result() if is_offloaded(job.result) else job.result
+            files = (result or {}).get('processed_files_info') or []
+            names: set = set()
+            entries = [entry._replace(arcname=unique_arcname(entry.arcname, names))
+                       for entry in map(self._archive_entry, files) if entry]
+            if not entries:
+                return error_response(message="No result files available", status_code=404)
+            
+            logger.info(f"Streaming archive of {len(entries)} files for job {job_id}")
+            response = Response(stream_with_context(iter_zip_stream(entries)), mimetype='application/zip')
+            response.headers.set('Content-Disposition', 'attachment', filename=f"processed_files_{job_id}.zip")
+            return response
+        
+        except Exception as e:
+            logger.error(f"Error preparing archive stream for job {job_id}: {str(e)}")
+            return error_response(message="Error preparing archive download", status_code=500)
+    
+    def _archive_entry(self, file_info: Dict[str, Any]) -> Optional[ZipEntry]:
+        """Lazy ZipEntry for a processed file, read from storage or local disk"""
+        key = file_info.get('output_key')
+        file_path = file_info.get('output_path') or file_info.get('file_path')
+        name = file_info.get('original_filename') or file_info.get('filename')
+        
+        if key and not self.storage.is_local:
+            size = self.storage.size(key)
+            if size is None:
+                logger.warning(f"Skipping missing object: {key}")
+                return None
+            return ZipEntry(name or key.rsplit('/', 1)[-1], self.storage.iter_range(key), size)
+        
+        if key:
+            file_path = self.storage.local_path(key) or file_path
+        if not file_path or not os.path.isfile(file_path):
+            logger.warning(f"Skipping missing file: {file_path}")
+            return None
+        stat = os.stat(file_path)
+        return ZipEntry(name or os.path.basename(file_path), _iter_file(file_path), stat.st_size, stat.st_mtime)
+    
     # ========================= CLEANUP OPERATIONS =========================
+    def run_cleanup(self) -> Dict[str, Any]:
+        """Run one time-boxed pass of the incremental cleanup engine
+        
+        Expired jobs, expired indexed files and old legacy files are removed
+        in small batches; a run that hits its time budget resumes from the
+        same place next time. See CleanupEngine.
+        
+        Finished jobs are also evicted ahead of their retention period while
+        storage is over its disk budget (see DiskBudgetManager).
+        
+        Returns:
+            Cleanup summary dictionary
+        """
+        summary = self.cleanup_engine.run()
+        eviction = self.disk_budget.relieve_pressure()
+        summary['jobs_evicted'] = eviction['jobs_evicted']
+        summary['space_freed_mb'] = summary.get('space_freed_mb', 0) + eviction['space_freed_mb']
+        if self.scratch:
+            leaked = self.scratch.cleanup(self.TEMP_FILE_MAX_AGE_HOURS * 3600)
+            summary['files_deleted'] = summary.get('files_deleted', 0) + leaked['files_deleted']
+            summary['space_freed_mb'] += leaked['space_freed_mb']
+        return summary
+    
     def cleanup_old_files(self, max_age_hours: int = None) -> Dict[str, Any]:
-        """Remove files older than specified age from upload folder
+        """Remove old files from the upload folder
+
+        Uses the file index when available: without ``max_age_hours`` files
+        past their recorded expiry are removed, otherwise files created more
+        than ``max_age_hours`` ago. Falls back to scanning the storage trees.
 
         Args:
-            max_age_hours: Maximum age in hours (default: from config)
+            max_age_hours: Maximum age in hours (default: per-kind retention)
 
         Returns:
             Cleanup summary dictionary
         """
-        max_age = max_age_hours or Config.MAX_FILE_AGE
+        max_age = timedelta(hours=max_age_hours) if max_age_hours else self._file_ttl('results')
 
         cleanup_summary = {
             'files_deleted': 0,
@@ -310,45 +1061,29 @@ class FileManagementService:
                 return cleanup_summary
 
             # Calculate cutoff time (current time minus max age in seconds)
-            cutoff_time = time.time() - (max_age * 3600)
-
-            for filename in os.listdir(self.upload_folder):
-                file_path = os.path.join(self.upload_folder, filename)
-
-                # Skip directories
-                if os.path.isdir(file_path):
-                    continue
-
-                try:
-                    # Check file modification time
-                    file_mtime = os.path.getmtime(file_path)
+            cutoff_time = time.time() - max_age.total_seconds()
 
-                    if file_mtime < cutoff_time:
-                        # Get file size before deletion
-                        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-
-                        # Delete the file
-                        os.remove(file_path)
+            if self._index_available():
+                # Flat files from the pre-sharding layout are never indexed
+                self._remove_files_older_than(self.iter_stored_files(kinds=()), cutoff_time, cleanup_summary)
 
-                        # Update cleanup summary
-                        cleanup_summary['files_deleted'] += 1
-                        cleanup_summary['space_freed_mb'] += file_size_mb
-
-                        logger.debug(f"Deleted old file: {file_path} ({file_size_mb:.2f}MB)")
-
-                except OSError as e:
-                    error_msg = f"Could not delete file {file_path}: {str(e)}"
-                    logger.warning(error_msg)
-                    cleanup_summary['errors'].append(error_msg)
-                    continue
+                if max_age_hours:
+                    expired = StoredFile.created_at < datetime.utcnow() - max_age
+                else:
+                    expired = self._expired_files_filter()
+                self._remove_indexed_files([self._index_scope(), expired], cleanup_summary)
+            else:
+                self._remove_files_older_than(self.iter_stored_files(), cutoff_time, cleanup_summary)
 
             if cleanup_summary['files_deleted'] > 0:
                 logger.info(f"Cleanup completed: {cleanup_summary['files_deleted']} files deleted, "
-                            f"{cleanup_summary['space_freed_mb']:.2f}MB freed for files older than {max_age} hours")
+                            f"{cleanup_summary['space_freed_mb']:.2f}MB freed for files older than {max_age}")
             else:
-                logger.info(f"No files found older than {max_age} hours to clean up")
+                logger.info(f"No files found older than {max_age} to clean up")
 
         except Exception as e:
+            if self._index_available():
+                db.session.rollback()
             error_msg = f"Error during file cleanup: {str(e)}"
             logger.error(error_msg)
             cleanup_summary['errors'].append(error_msg)
@@ -358,6 +1093,10 @@ class FileManagementService:
     def cleanup_expired_jobs(self) -> Dict[str, Any]:
         """Clean up expired jobs and their associated files
         
+        Runs the jobs phase of the cleanup engine to the end, batch by
+        batch, without a time budget; the engine's stored cursor is left
+        alone. See CleanupEngine.
+        
         Returns:
             Summary of cleanup operations
         """
@@ -369,34 +1108,16 @@ class FileManagementService:
         }
         
         try:
-            # Get all jobs that need cleanup
-            expired_jobs = self._get_expired_jobs()
-            
-            for job in expired_jobs:
-                try:
-                    space_freed = self._cleanup_job_files(job)
-                    cleanup_summary['total_space_freed_mb'] += space_freed
-                    
-                    # Delete the job record
-                    db.session.delete(job)
-                    cleanup_summary['jobs_cleaned'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error cleaning up job {job.job_id}: {str(e)}"
-                    logger.error(error_msg)
-                    cleanup_summary['errors'].append(error_msg)
-            
-            # Use safe database operation for cleanup commit
-            def commit_cleanup():
-                logger.info(f"Job cleanup completed: {cleanup_summary['jobs_cleaned']} jobs cleaned, "
-                           f"{cleanup_summary['total_space_freed_mb']:.2f}MB freed")
-            
-            safe_db_operation(
-                commit_cleanup,
-                "cleanup_expired_jobs_commit",
-                max_retries=2,
-                default_return=None
-            )
+            engine = CleanupEngine(self)
+            summary = {'jobs_cleaned': 0, 'jobs_archived': 0, 'files_deleted': 0, 'space_freed_mb': 0.0}
+            try:
+                while not engine._jobs_batch(summary):
+                    pass
+            finally:
+                cleanup_summary['jobs_cleaned'] = summary['jobs_cleaned']
+                cleanup_summary['total_space_freed_mb'] = summary['space_freed_mb']
+            logger.info(f"Job cleanup completed: {cleanup_summary['jobs_cleaned']} jobs cleaned, "
+                        f"{cleanup_summary['total_space_freed_mb']:.2f}MB freed")
             
         except Exception as e:
             db.session.rollback()
@@ -422,36 +1143,26 @@ class FileManagementService:
             if not os.path.exists(self.upload_folder):
                 return cleanup_summary
             
-            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=self.TEMP_FILE_MAX_AGE_HOURS)
+            cutoff_time = time.time() - self.TEMP_FILE_MAX_AGE_HOURS * 3600
             
-            for filename in os.listdir(self.upload_folder):
-                file_path = os.path.join(self.upload_folder, filename)
-                
-                try:
-                    # Skip directories
-                    if os.path.isdir(file_path):
-                        continue
-                    
-                    # Check if file is old enough to delete
-                    file_mtime = datetime.fromtimestamp(os.path.getmtime(file_path))
-                    
-                    if file_mtime < cutoff_time:
-                        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-                        os.remove(file_path)
-                        cleanup_summary['files_deleted'] += 1
-                        cleanup_summary['space_freed_mb'] += file_size_mb
-                        logger.debug(f"Deleted temp file: {file_path}")
-                
-                except Exception as e:
-                    error_msg = f"Error deleting temp file {file_path}: {str(e)}"
-                    logger.warning(error_msg)
-                    cleanup_summary['errors'].append(error_msg)
+            if self._index_available():
+                # Flat files from the pre-sharding layout, then expired temp entries
+                self._remove_files_older_than(self.iter_stored_files(kinds=()), cutoff_time, cleanup_summary)
+                self._remove_indexed_files(
+                    [self._index_scope(), StoredFile.kind == 'temp', StoredFile.expires_at <= datetime.utcnow()],
+                    cleanup_summary
+                )
+            else:
+                self._remove_files_older_than(self.iter_stored_files(kinds=('temp',)), cutoff_time,
+                                              cleanup_summary)
             
             if cleanup_summary['files_deleted'] > 0:
                 logger.info(f"Temp cleanup: {cleanup_summary['files_deleted']} files deleted, "
                            f"{cleanup_summary['space_freed_mb']:.2f}MB freed")
         
         except Exception as e:
+            if self._index_available():
+                db.session.rollback()
             error_msg = f"Error during temp file cleanup: {str(e)}"
             logger.error(error_msg)
             cleanup_summary['errors'].append(error_msg)
@@ -479,30 +1190,18 @@ class FileManagementService:
             for status, count in status_counts:
                 stats['jobs_by_status'][status] = count
             
-            # Get expired jobs
-            expired_jobs = self._get_expired_jobs()
-            stats['expired_jobs'] = len(expired_jobs)
-            
-            # Calculate estimated space to free
-            for job in expired_jobs:
-                if job.input_data and isinstance(job.input_data, dict):
-                    if 'file_size' in job.input_data:
-                        stats['estimated_space_to_free_mb'] += job.input_data['file_size'] / (1024 * 1024)
-                    elif 'total_size' in job.input_data:
-                        stats['estimated_space_to_free_mb'] += job.input_data['total_size'] / (1024 * 1024)
+            # Expired jobs and the indexed size of their files, counted in SQL
+            stats['expired_jobs'] = self._count_expired_jobs()
+            expired_ids = select(Job.job_id).where(self._expired_jobs_filter())
+            expired_bytes = db.session.scalar(
+                select(db.func.coalesce(db.func.sum(StoredFile.size_bytes), 0))
+                .where(StoredFile.job_id.in_(expired_ids))
+            )
+            stats['estimated_space_to_free_mb'] = (expired_bytes or 0) / (1024 * 1024)
             
             # Get upload folder statistics
             if os.path.exists(self.upload_folder):
-                total_size = 0
-                file_count = 0
-                for filename in os.listdir(self.upload_folder):
-                    file_path = os.path.join(self.upload_folder, filename)
-                    if os.path.isfile(file_path):
-                        total_size += os.path.getsize(file_path)
-                        file_count += 1
-                
-                stats['upload_folder_size_mb'] = total_size / (1024 * 1024)
-                stats['upload_folder_file_count'] = file_count
+                stats.update(self._folder_statistics())
             
             # Get jobs by age categories
             now = datetime.now(timezone.utc)
@@ -549,49 +1248,180 @@ class FileManagementService:
                 'estimated_space_to_free_mb': 0
             }
     
-    # ========================= PRIVATE HELPER METHODS =========================
-    def _get_expired_jobs(self) -> List[Job]:
-        """Get all jobs that have expired based on retention policies
+    def _folder_statistics(self) -> Dict[str, Any]:
+        """File counts and sizes, aggregated from the file index when available"""
+        if self._index_available():
+            now = datetime.utcnow()
+            rows = db.session.query(
+                StoredFile.kind,
+                db.func.count(StoredFile.id),
+                db.func.coalesce(db.func.sum(StoredFile.size_bytes), 0),
+                db.func.sum(db.case((StoredFile.expires_at <= now, 1), else_=0))
+            ).filter(self._index_scope()).group_by(StoredFile.kind).all()
+            blob_count, blob_bytes = db.session.query(
+                db.func.count(FileBlob.digest),
+                db.func.coalesce(db.func.sum(FileBlob.size_bytes), 0)
+            ).one()
+            
+            files_by_kind = {kind: count for kind, count, _, _ in rows}
+            if blob_count:
+                files_by_kind[self.BLOB_KIND] = blob_count
+            return {
+                'upload_folder_file_count': sum(files_by_kind.values()),
+                'upload_folder_size_mb': (sum(size for _, _, size, _ in rows) + blob_bytes) / (1024 * 1024),
+                'files_by_kind': files_by_kind,
+                'expired_files': sum(expired or 0 for _, _, _, expired in rows),
+            }
+        
+        total_size = 0
+        file_count = 0
+        for _, stat in self.iter_stored_files(kinds=self.STORAGE_KINDS + (self.BLOB_KIND,)):
+            total_size += stat.st_size
+            file_count += 1
+        return {'upload_folder_file_count': file_count, 'upload_folder_size_mb': total_size / (1024 * 1024)}
+    
+    def bytes_by_tier(self) -> Dict[str, int]:
+        """Bytes stored per storage tier (inputs, temp, results, blobs)"""
+        usage = {kind: 0 for kind in self.STORAGE_KINDS + (self.BLOB_KIND,)}
+        if self._index_available():
+            rows = db.session.query(
+                StoredFile.kind, db.func.coalesce(db.func.sum(StoredFile.size_bytes), 0)
+            ).filter(self._index_scope()).group_by(StoredFile.kind).all()
+            for kind, size in rows:
+                usage[kind] = usage.get(kind, 0) + int(size)
+            usage[self.BLOB_KIND] += int(db.session.query(
+                db.func.coalesce(db.func.sum(FileBlob.size_bytes), 0)
+            ).scalar())
+            return usage
         
+        for kind in usage:
+            usage[kind] = sum(stat.st_size for _, stat in self.iter_stored_files(kinds=(kind,), include_legacy=False))
+        return usage
+    
+    # ========================= STORAGE MIGRATION =========================
+    def migrate_to_sharded_layout(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Move flat files from the upload folder into the sharded layout
+        
+        Files referenced as job outputs go to the results tree, job inputs and
+        uploaded files (UUID names) to the inputs tree, anything else to
+        results. Job result/input_data paths are rewritten to the new
+        locations. Safe to re-run: already-sharded files are left alone.
+        
+        Args:
+            dry_run: Report what would move without touching files or jobs
+            
         Returns:
-            List of expired Job objects
+            Migration summary dictionary
         """
-        try:
-            expired_jobs = []
-            with db_transaction() as transaction:
-                # Get jobs older than retention period based on status
-                for status, retention_hours in self.DEFAULT_RETENTION_PERIODS.items():
-                    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=retention_hours)
-
-                    # Query jobs with this status that are older than cutoff
-                    jobs = transaction.query(Job).filter_by(status=status).filter(
-                        Job.created_at < cutoff_time).all()
-
-                    # Safety check: skip processing jobs that might still be active
-                    if status == 'processing':
-                        # Add extra buffer for processing jobs to prevent race conditions
-                        safe_cutoff = datetime.now(timezone.utc) - timedelta(hours=retention_hours + 2)
-                        jobs = [job for job in jobs if job.created_at < safe_cutoff]
-                        
-                        # Log when we're skipping processing jobs due to safety buffer
-                        skipped_count = len([j for j in transaction.query(Job).filter_by(status='processing').filter(
-                            Job.created_at >= safe_cutoff, Job.created_at < cutoff_time).all()])
-                        if skipped_count > 0:
-                            logger.info(f"Safety buffer: Skipping {skipped_count} processing jobs to prevent race conditions")
-
-                    expired_jobs.extend(jobs)
-
-                # Remove duplicates (in case a job matches multiple criteria)
-                unique_jobs = list({job.job_id: job for job in expired_jobs}.values())
-
-                return unique_jobs
+        summary = {'files_moved': 0, 'jobs_updated': 0, 'errors': [], 'dry_run': dry_run}
+        upload_root = os.path.realpath(self.upload_folder)
+        
+        # Index job path references by resolved path
+        references: Dict[str, List[Tuple[Job, str, str]]] = {}
+        for job in Job.query.all():
+            for field, keys in (('result', self.RESULT_PATH_KEYS), ('input_data', self.INPUT_PATH_KEYS)):
+                data = getattr(job, field)
+                if not isinstance(data, dict):
+                    continue
+                for key in keys:
+                    value = data.get(key)
+                    if isinstance(value, str) and value:
+                        references.setdefault(os.path.realpath(value), []).append((job, field, key))
+        
+        moves = {}
+        for file_path, stat in self.iter_stored_files(kinds=()):
+            filename = os.path.basename(file_path)
+            refs = references.get(os.path.realpath(file_path), [])
+            if any(field == 'result' for _, field, _ in refs):
+                kind = 'results'
+            elif refs or self._UUID_NAME.match(filename):
+                kind = 'inputs'
+            else:
+                kind = 'results'
             
-        except Exception as e:
-            logger.error(f"Error getting expired jobs: {str(e)}")
-            return []
+            target = self.shard_path(filename, kind, create=not dry_run)
+            if not dry_run:
+                try:
+                    os.replace(file_path, target)
+                except OSError as e:
+                    error_msg = f"Could not move {file_path}: {str(e)}"
+                    logger.warning(error_msg)
+                    summary['errors'].append(error_msg)
+                    continue
+                self.index_file(target, kind, job_id=refs[0][0].job_id if refs else None,
+                                size_bytes=stat.st_size, created_at=datetime.utcfromtimestamp(stat.st_mtime),
+                                commit=False)
+            moves[os.path.realpath(file_path)] = target
+            summary['files_moved'] += 1
+        
+        # Rewrite job references; JSON columns need a new dict to be flagged dirty
+        updated = {}
+        for old_path, target in moves.items():
+            for job, field, key in references.get(old_path, []):
+                data = dict(updated.get((job.job_id, field), getattr(job, field)))
+                data[key] = target
+                updated[(job.job_id, field)] = data
+                if not dry_run:
+                    setattr(job, field, data)
+        
+        job_ids = {job_id for job_id, _ in updated}
+        summary['jobs_updated'] = len(job_ids)
+        
+        if not dry_run and moves:
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                error_msg = f"Failed to update job paths and file index: {str(e)}"
+                logger.error(error_msg)
+                summary['errors'].append(error_msg)
+        
+        logger.info(f"Storage migration{' (dry run)' if dry_run else ''}: {summary['files_moved']} files moved "
+                    f"under {upload_root}, {summary['jobs_updated']} jobs updated")
+        return summary
+    
+    # ========================= PRIVATE HELPER METHODS =========================
+    def _count_expired_jobs(self) -> int:
+        """Number of jobs past their retention; removing them is left to CleanupEngine"""
+        return db.session.scalar(select(db.func.count()).select_from(Job).where(self._expired_jobs_filter()))
+    
+    def _retention_periods(self) -> Dict[str, float]:
+        """Hours each status is kept in the jobs table
+        
+        With job archival on, completed and failed jobs move to the archive
+        after JOB_ARCHIVE_AFTER_HOURS instead.
+        """
+        periods = dict(self.DEFAULT_RETENTION_PERIODS)
+        if Config.JOB_ARCHIVE_ENABLED:
+            for status in ('completed', 'failed'):
+                periods[status] = Config.JOB_ARCHIVE_AFTER_HOURS
+        return periods
+    
+    def _expired_jobs_filter(self, now: Optional[datetime] = None):
+        """SQL condition matching jobs past their status's retention period
+        
+        Processing jobs get an extra safety buffer so that jobs which are
+        still running are never removed from under their worker.
+        """
+        now = now or datetime.now(timezone.utc)
+        conditions = []
+        for status, retention_hours in self._retention_periods().items():
+            if status == 'processing':
+                retention_hours += self.PROCESSING_SAFETY_BUFFER_HOURS
+            conditions.append(and_(Job.status == status, Job.created_at < now - timedelta(hours=retention_hours)))
+        return or_(*conditions)
+
+    def _expired_files_filter(self, now: Optional[datetime] = None):
+        """SQL condition matching index entries the files phase may remove
+        
+        Files of a job that still exists are left to the jobs phase, which
+        removes them with the job; only temp files go on their own expiry.
+        """
+        now = now or datetime.utcnow()
+        job_exists = select(Job.job_id).where(Job.job_id == StoredFile.job_id).exists()
+        return and_(StoredFile.expires_at <= now, or_(StoredFile.kind == 'temp', ~job_exists))
 
-    @staticmethod
-    def _cleanup_job_files(job: Job) -> float:
+    def _cleanup_job_files(self, job: Job) -> float:
         """Clean up files associated with a job
         Args:
             job: Job object to clean up files for
@@ -602,38 +1432,29 @@ class FileManagementService:
         files_deleted = 0
         
         try:
-            # List of file paths to clean up
-            file_paths = []
-            
-            # Check result data for file paths
-            if job.result and isinstance(job.result, dict):
-                # Check for various possible file path fields in result
-                for path_key in ['output_path', 'result_path', 'file_path', 'temp_path']:
-                    if path_key in job.result and job.result[path_key]:
-                        file_path = job.result[path_key]
-                        if os.path.exists(file_path):
-                            file_paths.append(file_path)
-                
-                # Check for temp_files array
-                if 'temp_files' in job.result and isinstance(job.result['temp_files'], list):
-                    for temp_file in job.result['temp_files']:
-                        if os.path.exists(temp_file):
-                            file_paths.append(temp_file)
-            
-            # Check input data for file paths
-            if job.input_data and isinstance(job.input_data, dict):
-                for path_key in ['input_path', 'upload_path', 'original_path']:
-                    if path_key in job.input_data and job.input_data[path_key]:
-                        file_path = job.input_data[path_key]
-                        if os.path.exists(file_path):
-                            file_paths.append(file_path)
+            # Files indexed against the job at write time; their entries go
+            # with the job in the caller's transaction
+            indexed = self._indexed_job_files(job.job_id)
+            file_paths = [entry.path for entry in indexed]
+            if indexed:
+                db.session.execute(delete(StoredFile).where(StoredFile.job_id == job.job_id))
+            
+            # Older jobs fall back to the paths recorded in their data
+            if not indexed:
+                file_paths = self._recorded_job_file_paths(job)
             
             # Remove duplicates
             file_paths = list(set(file_paths))
             
-            # Delete files and calculate space freed
+            # Delete files and calculate space freed; shared blobs are only
+            # deleted once their last reference is released
             for file_path in file_paths:
                 try:
+                    digest = self._blob_digest(file_path)
+                    if digest:
+                        space_freed_mb += self.release_blob(digest, commit=False)
+                        files_deleted += 1
+                        continue
                     if os.path.exists(file_path):
                         file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
                         os.remove(file_path)
@@ -644,6 +1465,17 @@ class FileManagementService:
                 except Exception as e:
                     logger.warning(f"Could not delete file {file_path}: {str(e)}")
             
+            # Results published to a remote backend have no local copy
+            key = job.result.get('output_key') if isinstance(job.result, dict) else None
+            if key and not self.storage.is_local:
+                try:
+                    size = self.storage.size(key)
+                    if size is not None and self.storage.delete(key):
+                        space_freed_mb += size / (1024 * 1024)
+                        files_deleted += 1
+                except Exception as e:
+                    logger.warning(f"Could not delete stored object {key}: {str(e)}")
+            
             if files_deleted > 0:
                 logger.info(f"Cleaned up {files_deleted} files for job {job.job_id}, "
                            f"freed {space_freed_mb:.2f}MB")
@@ -653,6 +1485,46 @@ class FileManagementService:
         
         return space_freed_mb
     
+    def _indexed_job_files(self, job_id: str) -> List[StoredFile]:
+        """Index entries owned by a job (empty without an application context)"""
+        if not self._index_available():
+            return []
+        try:
+            return StoredFile.query.filter_by(job_id=job_id).all()
+        except Exception as e:
+            logger.warning(f"File index lookup failed for job {job_id}: {str(e)}")
+            return []
+    
+    @staticmethod
+    def _recorded_job_file_paths(job: Job) -> List[str]:
+        """Existing files referenced from a job's result and input data"""
+        file_paths = []
+        
+        # Check result data for file paths
+        if job.result and isinstance(job.result, dict):
+            # Check for various possible file path fields in result
+            for path_key in FileManagementService.RESULT_PATH_KEYS:
+                if path_key in job.result and job.result[path_key]:
+                    file_path = job.result[path_key]
+                    if os.path.exists(file_path):
+                        file_paths.append(file_path)
+            
+            # Check for temp_files array
+            if 'temp_files' in job.result and isinstance(job.result['temp_files'], list):
+                for temp_file in job.result['temp_files']:
+                    if os.path.exists(temp_file):
+                        file_paths.append(temp_file)
+        
+        # Check input data for file paths
+        if job.input_data and isinstance(job.input_data, dict):
+            for path_key in FileManagementService.INPUT_PATH_KEYS:
+                if path_key in job.input_data and job.input_data[path_key]:
+                    file_path = job.input_data[path_key]
+                    if os.path.exists(file_path):
+                        file_paths.append(file_path)
+        
+        return file_paths
+    
     # ========================= UTILITY METHODS =========================
     
     def get_service_status(self) -> Dict[str, Any]:
@@ -667,14 +1539,15 @@ class FileManagementService:
                 'upload_folder_exists': os.path.exists(self.upload_folder),
                 'retention_periods': self.DEFAULT_RETENTION_PERIODS,
                 'temp_file_max_age_hours': self.TEMP_FILE_MAX_AGE_HOURS,
+                'content_addressed': self.content_addressed,
+                'storage_backend': type(self.storage).__name__,
+                'scratch': self.scratch.status() if self.scratch else None,
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
             
             # Add folder statistics if folder exists
             if os.path.exists(self.upload_folder):
-                file_count = len([f for f in os.listdir(self.upload_folder) 
-                                if os.path.isfile(os.path.join(self.upload_folder, f))])
-                status['upload_folder_file_count'] = file_count
+                status['upload_folder_file_count'] = self._folder_statistics()['upload_folder_file_count']
             
             return status
             
@@ -826,9 +1699,8 @@ class FileManagementService:
                 cleanup_check['details']['total_jobs'] = stats.get('total_jobs', 0)
 
                 # Test expired jobs query
-                expired_jobs = self._get_expired_jobs()
+                cleanup_check['details']['expired_jobs_count'] = self._count_expired_jobs()
                 cleanup_check['details']['expired_jobs_query'] = True
-                cleanup_check['details']['expired_jobs_count'] = len(expired_jobs)
 
             except Exception as e:
                 cleanup_check['status'] = 'unhealthy'
@@ -836,6 +1708,15 @@ class FileManagementService:
                 health_status['errors'].append(f"Cleanup capability check failed: {str(e)}")
 
             health_status['checks']['cleanup'] = cleanup_check
+            
+            # Check 5: Disk budget (degraded while new uploads would be refused)
+            try:
+                disk_check = {'name': 'disk_budget', **self.disk_budget.status()}
+            except Exception as e:
+                disk_check = {'name': 'disk_budget', 'status': 'unhealthy', 'error': str(e)}
+                health_status['errors'].append(f"Disk budget check failed: {str(e)}")
+            
+            health_status['checks']['disk_budget'] = disk_check
 
             # Determine overall status
             for check_name, check_result in health_status['checks'].items():
@@ -863,4 +1744,293 @@ class FileManagementService:
             health_status['checks'] = {}
             logger.error(f"Health check failed: {str(e)}")
 
-        return health_status
\ No newline at end of file
+        return health_status
+
+
+def _iter_file(file_path: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """Read a file in chunks, opening it only when iteration starts"""
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class ResultArchiveWriter:
+    """A job's result ZIP, appended to as each file finishes
+    
+    The archive file is created on the first successful add, written through
+    an atomic temp file and moved into place on close. Already-compressed
+    formats (PDF, PNG, JPEG...) are stored rather than deflated again.
+    """
+    
+    def __init__(self, service: FileManagementService, job_id: str):
+        self.service = service
+        self.job_id = job_id
+        self.path: Optional[str] = None
+        self.entries = 0
+        self._names: set = set()
+        self._stack: Optional[ExitStack] = None
+        self._zip: Optional[zipfile.ZipFile] = None
+    
+    def open(self):
+        """Create the archive now rather than on the first add"""
+        if self._zip is None:
+            self.path = self.service.create_output_path(f"processed_files_{self.job_id}.zip", job_id=self.job_id)
+            self._stack = ExitStack()
+            output = self._stack.enter_context(self.service.open_output(self.path))
+            self._zip = zipfile.ZipFile(output, 'w')
+    
+    def add(self, file_info: Dict[str, Any]) -> bool:
+        """Append a processed file; returns False if its output is missing"""
+        file_path = file_info.get('output_path') or file_info.get('file_path')
+        if not file_path or not os.path.exists(file_path):
+            logger.warning(f"Skipping missing file: {file_path}")
+            return False
+        
+        self.open()
+        name = file_info.get('original_filename') or file_info.get('filename') or os.path.basename(file_path)
+        arcname = unique_arcname(name, self._names)
+        compress_type, level = zip_compression_for(arcname)
+        self._zip.write(file_path, arcname, compress_type=compress_type, compresslevel=level)
+        self.entries += 1
+        logger.debug(f"Added file to archive: {arcname}")
+        return True
+    
+    def close(self) -> Optional[str]:
+        """Finish the archive and move it into place; returns its path"""
+        if self._zip is not None:
+            self._zip.close()
+            self._stack.close()
+            self._zip = None
+        return self.path
+    
+    def abort(self):
+        """Discard a partially written archive"""
+        if self._zip is not None:
+            try:
+                self._zip.close()
+            finally:
+                # Raising into atomic_write discards its temp file
+                error = RuntimeError("archive aborted")
+                self._stack.__exit__(type(error), error, None)
+                self._zip = None
+                self.service._unindex_file(self.path)
+        self.path = None
+    
+    def __enter__(self) -> 'ResultArchiveWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class CleanupEngine:
+    """Incremental cleanup of expired jobs and files
+    
+    Replaces separate full sweeps with one pass over everything that has
+    expired, in phases:
+    
+    1. jobs: jobs past their status retention, together with their files
+    2. files: file index entries past their expiry (temp and results)
+    3. legacy: flat files left over from the pre-sharding layout
+    
+    Work is done in batches of ``batch_size``, each committed on its own with
+    set-based deletes so SQLite is never write-locked for long. A run stops
+    once its time budget is spent; the cursor (phase and keyset position)
+    is stored in the cleanup_cursors table after every batch, so the next
+    run carries on where this one stopped, whichever process it runs in.
+    Losing the cursor only costs a rescan of the current phase.
+    """
+    
+    PHASES = ('jobs', 'files', 'legacy')
+    
+    def __init__(self, service: FileManagementService, batch_size: Optional[int] = None,
+                 time_budget_seconds: Optional[float] = None):
+        self.service = service
+        self.batch_size = batch_size or Config.CLEANUP_BATCH_SIZE
+        self.time_budget_seconds = time_budget_seconds or Config.CLEANUP_TIME_BUDGET_SECONDS
+        self.cursor: Dict[str, Any] = {'phase': self.PHASES[0], 'position': None}
+        self._lock = threading.Lock()
+    
+    def run(self) -> Dict[str, Any]:
+        """Process expirations until everything is done or the time budget runs out
+        
+        Returns:
+            Summary with counts, whether a full cycle completed and the cursor
+        """
+        summary = {
+            'jobs_cleaned': 0,
+            'jobs_archived': 0,
+            'files_deleted': 0,
+            'space_freed_mb': 0.0,
+            'batches': 0,
+            'complete': False,
+            'errors': []
+        }
+        
+        if not self.service._index_available():
+            summary['errors'].append("Cleanup needs an application context")
+            return summary
+        if not self._lock.acquire(blocking=False):
+            summary['errors'].append("Cleanup already running")
+            return summary
+        
+        try:
+            deadline = time.monotonic() + self.time_budget_seconds
+            self._load_cursor()
+            phases_finished = 0
+            while phases_finished < len(self.PHASES) and time.monotonic() < deadline:
+                phase = self.cursor['phase']
+                try:
+                    finished = getattr(self, f'_{phase}_batch')(summary)
+                except Exception as e:
+                    db.session.rollback()
+                    error_msg = f"Cleanup phase {phase} failed: {str(e)}"
+                    logger.error(error_msg)
+                    summary['errors'].append(error_msg)
+                    finished = True
+                summary['batches'] += 1
+                
+                if finished:
+                    phases_finished += 1
+                    next_phase = self.PHASES[(self.PHASES.index(phase) + 1) % len(self.PHASES)]
+                    self.cursor = {'phase': next_phase, 'position': None}
+                self._save_cursor()
+            
+            summary['complete'] = phases_finished == len(self.PHASES)
+            if summary['jobs_cleaned'] and Config.SQLITE_INCREMENTAL_VACUUM_PAGES:
+                # Deleted job rows leave free pages; hand some back to the filesystem
+                try:
+                    summary['pages_vacuumed'] = incremental_vacuum(db.engine, Config.SQLITE_INCREMENTAL_VACUUM_PAGES)
+                except Exception as e:
+                    logger.warning(f"Incremental vacuum failed: {str(e)}")
+            summary['cursor'] = {'phase': self.cursor['phase'], 'position': str(self.cursor['position'])
+                                 if self.cursor['position'] is not None else None}
+            
+            if summary['jobs_cleaned'] or summary['files_deleted']:
+                logger.info(f"Cleanup run: {summary['jobs_cleaned']} jobs ({summary['jobs_archived']} archived), "
+                            f"{summary['files_deleted']} files, "
+                            f"{summary['space_freed_mb']:.2f}MB freed in {summary['batches']} batches"
+                            f"{'' if summary['complete'] else ' (resuming next run)'}")
+        finally:
+            self._lock.release()
+        
+        return summary
+    
+    def _scope(self) -> str:
+        return os.path.abspath(self.service.upload_folder)
+    
+    def _load_cursor(self):
+        """Pick up the cursor stored by the last run, if any"""
+        try:
+            row = db.session.get(CleanupCursor, self._scope())
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not load cleanup cursor: {str(e)}")
+            return
+        if row is None or row.phase not in self.PHASES:
+            return
+        position = json.loads(row.position) if row.position else None
+        if row.phase == 'jobs' and position is not None:
+            position = (datetime.fromisoformat(position[0]), position[1])
+        self.cursor = {'phase': row.phase, 'position': position}
+    
+    def _save_cursor(self):
+        position = self.cursor['position']
+        if self.cursor['phase'] == 'jobs' and position is not None:
+            position = [position[0].isoformat(), position[1]]
+        try:
+            db.session.merge(CleanupCursor(
+                scope=self._scope(),
+                phase=self.cursor['phase'],
+                position=json.dumps(position) if position is not None else None,
+                updated_at=datetime.utcnow(),
+            ))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not store cleanup cursor: {str(e)}")
+    
+    def _jobs_batch(self, summary: Dict[str, Any]) -> bool:
+        """Remove one batch of expired jobs and their files; True when none are left"""
+        query = Job.query.filter(self.service._expired_jobs_filter())
+        if self.cursor['position'] is not None:
+            created_at, job_id = self.cursor['position']
+            query = query.filter(or_(Job.created_at > created_at,
+                                     and_(Job.created_at == created_at, Job.job_id > job_id)))
+        jobs = query.order_by(Job.created_at, Job.job_id).limit(self.batch_size).all()
+        if not jobs:
+            return True
+        
+        from src.services.service_registry import ServiceRegistry
+        for job in jobs:
+            summary['space_freed_mb'] += self.service._cleanup_job_files(job)
+        job_ids = [job.job_id for job in jobs]
+        self.cursor['position'] = (jobs[-1].created_at, jobs[-1].job_id)
+        
+        summary['jobs_archived'] += ServiceRegistry.get_job_archive().archive_jobs(db.session, job_ids)
+        db.session.execute(delete(JobResult).where(JobResult.job_id.in_(job_ids)))
+        db.session.execute(delete(Job).where(Job.job_id.in_(job_ids)))
+        db.session.commit()
+        ServiceRegistry.get_job_status_cache().delete_many(job_ids)
+        summary['jobs_cleaned'] += len(job_ids)
+        return len(jobs) < self.batch_size
+    
+    def _files_batch(self, summary: Dict[str, Any]) -> bool:
+        """Remove one batch of expired indexed files; True when none are left"""
+        conditions = [self.service._index_scope(), self.service._expired_files_filter()]
+        last_id, count = self.service._remove_indexed_batch(conditions, self.cursor['position'] or 0,
+                                                            self.batch_size, summary)
+        self.cursor['position'] = last_id
+        return count < self.batch_size
+    
+    def _legacy_batch(self, summary: Dict[str, Any]) -> bool:
+        """Remove up to one batch of old flat files; True when none are left"""
+        cutoff_time = time.time() - self.service._file_ttl('legacy').total_seconds()
+        expired = itertools.islice(
+            ((path, stat) for path, stat in self.service.iter_stored_files(kinds=())
+             if stat.st_mtime < cutoff_time),
+            self.batch_size
+        )
+        expired = list(expired)
+        deleted_before = summary['files_deleted']
+        self.service._remove_files_older_than(expired, cutoff_time, summary)
+        # Files that can't be deleted would otherwise be retried forever
+        return len(expired) < self.batch_size or summary['files_deleted'] == deleted_before
+
+
+# ------------------------------------------------------------- ORM commit hook
+
+_RELEASED_BLOBS_KEY = 'released_blob_paths'
+
+
+def register_blob_cleanup_hooks():
+    """Unlink blob files released by ``release_blob`` once their rows are gone for good
+
+    Until the enclosing transaction commits, a rollback can bring the blob row
+    (and the references to it) back, so the file has to stay on disk.
+    """
+    if event.contains(Session, 'after_commit', _unlink_released_blobs):
+        return
+    event.listen(Session, 'after_commit', _unlink_released_blobs)
+    event.listen(Session, 'after_soft_rollback', _discard_released_blobs)
+
+
+def _unlink_released_blobs(session):
+    for path in session.info.pop(_RELEASED_BLOBS_KEY, ()):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete released blob {path}: {e}")
+
+
+def _discard_released_blobs(session, previous_transaction):
+    session.info.pop(_RELEASED_BLOBS_KEY, None)
@@ -0,0 +1,137 @@
+"""Job history archive
+
+With JOB_ARCHIVE_ENABLED, jobs removed from the jobs table by cleanup are
+copied here first instead of being dropped, so the hot table only holds
+recent jobs while their history is kept. Archives are partitioned by the
+UTC day a job was created:
+
+- ``ndjson``: one gzipped file per day, ``<JOB_ARCHIVE_DIR>/jobs-YYYY-MM-DD.ndjson.gz``.
+  Each batch is appended as its own gzip member; gzip readers treat
+  concatenated members as one stream.
+- ``table``: one table per day, ``jobs_archive_YYYYMMDD``, with the columns
+  of the jobs table, created on first use.
+
+Archived jobs carry their full result (offloaded results are folded back
+in). Table archives are written in the caller's transaction, so a job is
+either archived and deleted or neither. NDJSON batches are written before
+the caller commits its delete; if that commit fails the batch is archived
+again by the next run, so readers should keep the last record per job_id.
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Column, MetaData, Table, inspect, select
+from sqlalchemy.orm import Session
+
+from src.config import Config
+from src.models.job import Job
+from src.models.job_result import JobResult
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class JobArchive:
+    """Moves job rows into per-day archives; see the module docstring"""
+
+    BACKENDS = ('ndjson', 'table')
+    TABLE_PREFIX = 'jobs_archive_'
+
+    def __init__(self, backend: Optional[str] = None, directory: Optional[str] = None,
+                 enabled: Optional[bool] = None):
+        self.enabled = Config.JOB_ARCHIVE_ENABLED if enabled is None else enabled
+        self.backend = (backend or Config.JOB_ARCHIVE_BACKEND).lower()
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Unknown job archive backend {self.backend!r}, expected one of {self.BACKENDS}")
+        self.directory = directory or Config.JOB_ARCHIVE_DIR
+        self._tables: Dict[str, Table] = {}
+        self._lock = threading.Lock()
+
+    def archive_jobs(self, session: Session, job_ids: Sequence[str]) -> int:
+        """Copy jobs to their day's archive; the caller deletes them afterwards
+
+        Returns:
+            Number of jobs archived (0 when archiving is disabled)
+        """
+        if not self.enabled or not job_ids:
+            return 0
+        rows = [dict(row) for row in session.execute(
+            select(Job.__table__).where(Job.job_id.in_(job_ids))
+        ).mappings()]
+        full_results = dict(session.execute(
+            select(JobResult.job_id, JobResult.data).where(JobResult.job_id.in_(job_ids))
+        ).all())
+
+        partitions = defaultdict(list)
+        for row in rows:
+            if row['job_id'] in full_results:
+                row['result'] = full_results[row['job_id']]
+            partitions[(row['created_at'] or datetime.utcnow()).date()].append(row)
+        for day, day_rows in sorted(partitions.items()):
+            if self.backend == 'table':
+                self._write_table(session, day, day_rows)
+            else:
+                self._write_ndjson(day, day_rows)
+        logger.debug(f"Archived {len(rows)} jobs ({self.backend}, {len(partitions)} days)")
+        return len(rows)
+
+    def path_for(self, day: date) -> str:
+        """NDJSON archive file of ``day``"""
+        return os.path.join(self.directory, f"jobs-{day.isoformat()}.ndjson.gz")
+
+    def table_name(self, day: date) -> str:
+        return f"{self.TABLE_PREFIX}{day.strftime('%Y%m%d')}"
+
+    def iter_day(self, session: Session, day: date) -> Iterator[Dict[str, Any]]:
+        """Archived jobs created on ``day``, in archive order
+
+        NDJSON records have datetimes as ISO strings, as in ``Job.to_dict()``.
+        """
+        if self.backend == 'table':
+            name = self.table_name(day)
+            if not inspect(session.connection()).has_table(name):
+                return
+            table = self._table(name)
+            for row in session.execute(select(table).order_by(table.c.created_at, table.c.job_id)).mappings():
+                yield dict(row)
+            return
+
+        path = self.path_for(day)
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                yield json.loads(line)
+
+    def _write_ndjson(self, day: date, rows: List[Dict[str, Any]]):
+        payload = ''.join(json.dumps(row, default=_json_default, separators=(',', ':')) + '\n' for row in rows)
+        os.makedirs(self.directory, exist_ok=True)
+        # One append per batch, so concurrent writers never interleave members
+        with self._lock, open(self.path_for(day), 'ab') as fh:
+            fh.write(gzip.compress(payload.encode('utf-8')))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _write_table(self, session: Session, day: date, rows: List[Dict[str, Any]]):
+        table = self._table(self.table_name(day))
+        table.create(session.connection(), checkfirst=True)
+        session.execute(table.insert(), rows)
+
+    def _table(self, name: str) -> Table:
+        with self._lock:
+            if name not in self._tables:
+                columns = [Column(column.name, column.type, primary_key=column.primary_key,
+                                  nullable=column.nullable) for column in Job.__table__.columns]
+                self._tables[name] = Table(name, MetaData(), *columns)
+            return self._tables[name]
@@ -0,0 +1,165 @@
+"""Server-sent events for job status and progress
+
+``GET /jobs/<job_id>/events`` keeps a connection open per watching client
+and pushes the job's status projection whenever it changes, instead of the
+client polling ``GET /jobs/<job_id>``.
+
+Changes arrive over Redis pub/sub: JobStatusCache publishes every status
+write and progress report on ``jobevents:<job_id>``. Each worker process
+holds ONE pattern subscription (``jobevents:*``) read by a background
+listener, which hands messages to the local subscribers of that job. So a
+node with thousands of open streams still uses one Redis connection per
+process for them, not one per client.
+
+Streams are mostly idle, so they need a worker that parks connections
+cheaply (gunicorn's gevent worker, see gunicorn_events_conf.py); a sync
+worker would be pinned by a single stream.
+
+If Redis is unavailable, streams fall back to re-reading the status every
+heartbeat.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config import Config
+from src.models.base import db
+from src.models.job import JobStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED.value, JobStatus.FAILED.value)
+
+
+def format_event(data: Dict[str, Any], event: str = 'status') -> str:
+    """One SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class JobEventBroker:
+    """Fans job events from one Redis subscription out to local subscribers"""
+
+    # Wait after a failed subscription before reconnecting
+    RECONNECT_SECONDS = 5
+
+    def __init__(self, cache):
+        """
+        Args:
+            cache: JobStatusCache; its Redis client is used for the subscription
+        """
+        self.cache = cache
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self.connected = False
+
+    # ------------------------------------------------------------ subscribers
+
+    def subscribe(self, job_id: str) -> queue.Queue:
+        """Queue that receives the job's event payloads (dicts)"""
+        events = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(events)
+            self._start_listener()
+        return events
+
+    def unsubscribe(self, job_id: str, events: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, job_id: str, payload: Dict[str, Any]):
+        """Hand a payload to every local subscriber of the job"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for events in subscribers:
+            events.put(payload)
+
+    # --------------------------------------------------------------- listener
+
+    def _start_listener(self):
+        """Start the Redis listener on first use (lock held)"""
+        if self._listener is not None or not self.cache.enabled:
+            return
+        self._listener = threading.Thread(target=self._listen, name='job-event-listener', daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        prefix = self.cache.CHANNEL_PREFIX
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.cache.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{prefix}*")
+                self.connected = True
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message['type'] == 'pmessage':
+                        self.dispatch(message['channel'][len(prefix):], json.loads(message['data']))
+            except Exception as e:
+                logger.warning(f"Job event subscription lost, streams will poll: {e}")
+            finally:
+                self.connected = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(self.RECONNECT_SECONDS)
+
+    # ----------------------------------------------------------------- stream
+
+    def stream(self, job_id: str, heartbeat_seconds: Optional[float] = None,
+               max_seconds: Optional[float] = None) -> Iterator[str]:
+        """SSE messages for a job until it finishes (or max_seconds passes)
+
+        The first message is the current status; after that one message per
+        change, with comment lines as heartbeats in between. Browsers'
+        EventSource reconnects by itself when a stream ends early.
+
+        Yields nothing if the job does not exist.
+        """
+        heartbeat_seconds = heartbeat_seconds or Config.JOB_EVENTS_HEARTBEAT_SECONDS
+        max_seconds = max_seconds or Config.JOB_EVENTS_MAX_SECONDS
+
+        # Subscribe before reading, so a change in between isn't missed
+        events = self.subscribe(job_id)
+        try:
+            current = self._read_status(job_id)
+            if current is None:
+                return
+            yield f"retry: {int(heartbeat_seconds * 1000)}\n\n"
+            yield format_event(current)
+
+            deadline = time.monotonic() + max_seconds
+            while current['status'] not in TERMINAL_STATUSES and time.monotonic() < deadline:
+                try:
+                    update = dict(current, **events.get(timeout=heartbeat_seconds))
+                except queue.Empty:
+                    update = current if self.connected else self._read_status(job_id)
+                    if update is None:
+                        return
+                if update != current:
+                    current = update
+                    yield format_event(current)
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(job_id, events)
+
+    def _read_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        status = self.cache.get_status(job_id)
+        # A cache miss reads the database; don't hold a pooled connection
+        # for the life of the stream
+        db.session.remove()
+        return status
@@ -0,0 +1,242 @@
+"""Redis-backed cache of job status projections
+
+Frontends poll ``GET /jobs/<job_id>`` about once a second. Serving those
+polls from Redis keeps them off SQLite entirely:
+
+- every status change writes the job's compact projection (see
+  ``status_projection``) to ``jobstatus:<job_id>``: explicitly for the
+  compare-and-set path, and from an ORM commit hook for code that updates
+  Job objects directly
+- progress reports update just the ``progress`` field, so progress that is
+  still buffered for the database (JobStateBuffer) is already visible
+- a poll that misses reads the job once and populates the entry with
+  HSETNX, so a read-through can never overwrite a newer status write
+- status and progress writes are also published on ``jobevents:<job_id>``
+  for the server-sent events stream (see ``job_events``)
+
+Redis being unreachable is never an error: the cache backs off for a while
+and callers fall back to the database.
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.config import Config
+from src.models.job import Job, STATUS_COLUMNS, status_projection
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatusCache:
+    """Read-through cache of job status projections in Redis"""
+
+    KEY_PREFIX = 'jobstatus:'
+    CHANNEL_PREFIX = 'jobevents:'
+
+    # After a Redis error, skip the cache for this long
+    BACKOFF_SECONDS = 30
+
+    def __init__(self, client=None, ttl_seconds: Optional[int] = None, enabled: Optional[bool] = None):
+        """
+        Args:
+            client: Redis client (decode_responses=True). Defaults to one for
+                Config.REDIS_URL, created on first use.
+            ttl_seconds: Lifetime of an entry after its last write
+            enabled: Defaults to Config.JOB_STATUS_CACHE_ENABLED
+        """
+        self._client = client
+        self.ttl_seconds = ttl_seconds or Config.JOB_STATUS_CACHE_TTL_SECONDS
+        if enabled is None:
+            enabled = Config.JOB_STATUS_CACHE_ENABLED
+        self.enabled = enabled and (client is not None or REDIS_AVAILABLE)
+        self._down_until = 0.0
+
+    @property
+    def client(self):
+        if self._client is None:
+            timeout = Config.JOB_STATUS_CACHE_TIMEOUT_SECONDS
+            self._client = redis.from_url(Config.REDIS_URL, decode_responses=True,
+                                          socket_timeout=timeout, socket_connect_timeout=timeout)
+        return self._client
+
+    def key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}{job_id}"
+
+    def channel(self, job_id: str) -> str:
+        return f"{self.CHANNEL_PREFIX}{job_id}"
+
+    # ------------------------------------------------------------------ reads
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cached projection, or None on a miss (or when Redis is unavailable)"""
+        return self.get_many([job_id]).get(job_id)
+
+    def get_many(self, job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Cached projections for the job IDs that are in the cache (one round-trip)"""
+        job_ids = list(job_ids)
+        if not job_ids or not self._available():
+            return {}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for job_id in job_ids:
+                pipe.hgetall(self.key(job_id))
+            entries = pipe.execute()
+        except Exception as e:
+            self._failed(e)
+            return {}
+
+        found = {}
+        for job_id, entry in zip(job_ids, entries):
+            if entry and 'data' in entry:
+                projection = json.loads(entry['data'])
+                if entry.get('progress') not in (None, ''):
+                    projection['progress'] = float(entry['progress'])
+                found[job_id] = projection
+        return found
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Projection for a job, reading it from the database on a miss
+
+        Returns:
+            The projection, or None if the job does not exist
+        """
+        return self.get_statuses([job_id]).get(job_id)
+
+    def get_statuses(self, job_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Projections for many jobs: one Redis round-trip, then one query for the misses"""
+        job_ids = list(dict.fromkeys(job_ids))
+        found = self.get_many(job_ids)
+        missing = [job_id for job_id in job_ids if job_id not in found]
+        if missing:
+            columns = [getattr(Job, column) for column in STATUS_COLUMNS]
+            rows = Job.query.with_entities(*columns).filter(Job.job_id.in_(missing)).all()
+            loaded = [status_projection(row._mapping) for row in rows]
+            self.populate_many(loaded)
+            found.update((projection['job_id'], projection) for projection in loaded)
+        return found
+
+    # ----------------------------------------------------------------- writes
+
+    def set(self, projection: Dict[str, Any]):
+        """Store a job's projection after a status change (overwrites)"""
+        self.set_many([projection])
+
+    def set_many(self, projections: Iterable[Dict[str, Any]]):
+        self._write(projections, overwrite=True)
+
+    def populate_many(self, projections: Iterable[Dict[str, Any]]):
+        """Store projections read from the database, never replacing newer entries"""
+        self._write(projections, overwrite=False)
+
+    def set_progress(self, job_id: str, progress: float):
+        """Update only the progress of a job's entry"""
+        if not self._available():
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(self.key(job_id), 'progress', progress)
+            pipe.expire(self.key(job_id), self.ttl_seconds)
+            pipe.publish(self.channel(job_id), json.dumps({'job_id': job_id, 'progress': progress}))
+            pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    def delete_many(self, job_ids: Iterable[str]):
+        """Drop entries for deleted jobs"""
+        keys = [self.key(job_id) for job_id in job_ids]
+        if not keys or not self._available():
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception as e:
+            self._failed(e)
+
+    def _write(self, projections: Iterable[Dict[str, Any]], overwrite: bool):
+        projections = list(projections)
+        if not projections or not self._available():
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for projection in projections:
+                key = self.key(projection['job_id'])
+                data = json.dumps({k: v for k, v in projection.items() if k != 'progress'}, default=str)
+                progress = projection.get('progress')
+                progress = '' if progress is None else progress
+                if overwrite:
+                    pipe.hset(key, mapping={'data': data, 'progress': progress})
+                    pipe.publish(self.channel(projection['job_id']), json.dumps(projection, default=str))
+                else:
+                    pipe.hsetnx(key, 'data', data)
+                    pipe.hsetnx(key, 'progress', progress)
+                pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            self._failed(e)
+
+    # ----------------------------------------------------------------- health
+
+    def _available(self) -> bool:
+        return self.enabled and time.monotonic() >= self._down_until
+
+    def _failed(self, error: Exception):
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"Job status cache unavailable, using the database for "
+                           f"{self.BACKOFF_SECONDS}s: {error}")
+        self._down_until = time.monotonic() + self.BACKOFF_SECONDS
+
+
+# ------------------------------------------------------------- ORM commit hook
+
+_PENDING_KEY = 'job_status_cache_pending'
+
+
+def register_job_status_cache_hooks():
+    """Write projections of Job objects whose status or progress changed, once committed
+
+    Covers code that updates Job instances directly (``mark_as_completed``
+    and friends); bulk UPDATE statements don't go through the ORM and write
+    the cache themselves.
+    """
+    if event.contains(Session, 'after_flush', _collect_changed_jobs):
+        return
+    event.listen(Session, 'after_flush', _collect_changed_jobs)
+    event.listen(Session, 'after_commit', _publish_changed_jobs)
+    event.listen(Session, 'after_soft_rollback', _discard_changed_jobs)
+
+
+def _collect_changed_jobs(session, flush_context):
+    # Runs before attribute history is reset, so changes are still visible
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Job):
+            continue
+        attrs = inspect(obj).attrs
+        if obj not in session.new and not (attrs.status.history.has_changes()
+                                           or attrs.progress.history.has_changes()):
+            continue
+        try:
+            session.info.setdefault(_PENDING_KEY, {})[obj.job_id] = obj.to_status_dict()
+        except Exception as e:
+            logger.debug(f"Skipping cache update for job {getattr(obj, 'job_id', None)}: {e}")
+
+
+def _publish_changed_jobs(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        from src.services.service_registry import ServiceRegistry
+        ServiceRegistry.get_job_status_cache().set_many(pending.values())
+
+
+def _discard_changed_jobs(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
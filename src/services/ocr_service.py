@@ -4,16 +4,29 @@ Returns *disk* meta only – no file_data bytes – to match conversion service.
 """
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import logging
+import math
 import os
 import re
+import shutil
+import time
 import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from celery.exceptions import SoftTimeLimitExceeded
 
 from src.services.file_management_service import FileManagementService
+from src.utils.image_preprocessing import (
+    map_boxes_to_source, preprocess_for_ocr, preprocessing_available
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,13 +49,159 @@ except ImportError:  # pragma: no cover
 # ------------------------------------------------------------------------------
 
 
+class SearchablePDFBuilder:
+    """Build a searchable PDF one page at a time.
+
+    Each output page shows the original page (or scan image) and carries an
+    invisible text layer (render mode 3) with only the words recognised on
+    that page, placed on their Tesseract word boxes.  Output size therefore
+    grows linearly with page count and search hits land on the right spot.
+    """
+
+    FONT_NAME = "helv"
+
+    def __init__(self) -> None:
+        if not PDF_LIBS_AVAILABLE:
+            raise RuntimeError("PyMuPDF unavailable")
+        self.doc = fitz.open()
+        self._font = fitz.Font(self.FONT_NAME)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.doc)
+
+    def add_pdf_page(self, src_doc: Any, page_number: int, page_ocr: Dict[str, Any]) -> None:
+        """Copy ``src_doc[page_number]`` and overlay its OCR words."""
+        rect = src_doc.load_page(page_number).rect
+        page = self.doc.new_page(width=rect.width, height=rect.height)
+        page.show_pdf_page(page.rect, src_doc, page_number)
+        self._add_text_layer(page, page_ocr)
+
+    def add_image_page(self, image: Any, page_ocr: Dict[str, Any], dpi: int = 300) -> None:
+        """Add a scanned image as a page sized from its pixel dimensions.
+
+        ``image`` is encoded image bytes, or a PIL image in ``L`` or ``RGB``
+        mode (a decoded TIFF frame), which is inserted from its raw samples.
+        """
+        width = page_ocr["width"] * 72.0 / dpi
+        height = page_ocr["height"] * 72.0 / dpi
+        page = self.doc.new_page(width=width, height=height)
+        if isinstance(image, (bytes, bytearray)):
+            page.insert_image(page.rect, stream=image)
+        else:
+            colorspace = fitz.csGRAY if image.mode == "L" else fitz.csRGB
+            pixmap = fitz.Pixmap(colorspace, image.width, image.height, image.tobytes(), False)
+            page.insert_image(page.rect, pixmap=pixmap)
+        self._add_text_layer(page, page_ocr)
+
+    def save(self, out: Any) -> None:
+        """Write the PDF to a path or binary file object and close the document."""
+        try:
+            self.doc.save(out if hasattr(out, "write") else str(out), garbage=3, deflate=True)
+        finally:
+            self.doc.close()
+
+    def _add_text_layer(self, page: Any, page_ocr: Dict[str, Any]) -> None:
+        words = page_ocr.get("words") or []
+        if not words or not page_ocr.get("width") or not page_ocr.get("height"):
+            return
+
+        # word boxes are in rendered-pixel space; map them onto the page
+        sx = page.rect.width / page_ocr["width"]
+        sy = page.rect.height / page_ocr["height"]
+        writer = fitz.TextWriter(page.rect)
+        for x0, y0, x1, y1, text in words:
+            box_w, box_h = (x1 - x0) * sx, (y1 - y0) * sy
+            if box_w <= 0 or box_h <= 0:
+                continue
+            # size the glyphs so the word spans its box horizontally
+            natural = self._font.text_length(text, fontsize=box_h)
+            fontsize = box_h * box_w / natural if natural else box_h
+            baseline = fitz.Point(x0 * sx, y1 * sy + self._font.descender * fontsize)
+            writer.append(baseline, text, font=self._font, fontsize=fontsize)
+        writer.write_text(page, render_mode=3)
+
+
+class OCRCheckpointStore:
+    """Page-level OCR checkpoints kept on disk.
+
+    Every recognised page (text + word boxes) is written as its own JSON file
+    under ``<root>/<key>/``, where the key combines the document's SHA-256
+    with the settings that change the result.  A retried or re-run job with
+    the same input finds the finished pages and resumes at the first gap.
+    """
+
+    def __init__(self, root: str, key: str):
+        self.path = os.path.join(root, key)
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def make_key(
+        file_data: bytes, lang: str, quality: str, dpi: int, preprocess: bool = False
+    ) -> str:
+        digest = hashlib.sha256(file_data).hexdigest()
+        suffix = "_pre" if preprocess else ""
+        return re.sub(r"[^\w.-]", "_", f"{digest}_{lang}_{quality}_{dpi}{suffix}")
+
+    def _page_path(self, page_number: int) -> str:
+        return os.path.join(self.path, f"page_{page_number:05d}.json")
+
+    def load(self, page_number: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._page_path(page_number), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, page_number: int, page_ocr: Dict[str, Any]) -> None:
+        # write-then-rename so a killed worker never leaves a torn page behind
+        final_path = self._page_path(page_number)
+        tmp_path = f"{final_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(page_ocr, f, ensure_ascii=False)
+        os.replace(tmp_path, final_path)
+
+    def completed_pages(self) -> int:
+        try:
+            return sum(1 for name in os.listdir(self.path) if name.endswith(".json"))
+        except OSError:
+            return 0
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @staticmethod
+    def purge_stale(root: str, max_age_hours: float) -> int:
+        """Remove checkpoint folders untouched for ``max_age_hours``."""
+        if not os.path.isdir(root):
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+        return removed
+
+
 class OCRService:
     """OCR for PDFs and images – crash-hardened, 100 % sync, disk-only output."""
 
+    # Checkpoints of abandoned jobs are purged after this many hours
+    CHECKPOINT_MAX_AGE_HOURS = 24
+    # Wall-clock budget (seconds) for the sample OCR run behind a preview
+    PREVIEW_TIME_BUDGET = 10.0
+    PREVIEW_SAMPLE_PAGES = 2
+    # Limits for a ZIP batch of images (member count, total extracted bytes)
+    BATCH_MAX_FILES = 500
+    BATCH_MAX_BYTES = 512 * 1024 * 1024
+
     def __init__(self, file_service: Optional[FileManagementService] = None):
         self.file_service = file_service or FileManagementService()
 
-        self.supported_formats = ("pdf", "png", "jpg", "jpeg", "tiff", "bmp")
+        self.supported_formats = ("pdf", "png", "jpg", "jpeg", "tiff", "tif", "bmp", "zip")
+        self.batch_image_formats = ("png", "jpg", "jpeg", "tiff", "tif", "bmp")
         self.supported_languages = [
             "eng", "spa", "fra", "deu", "ita", "por", "rus", "jpn", "kor", "chi_sim", "ara", "hin"
         ]
@@ -50,6 +209,10 @@ class OCRService:
         self.output_formats = ("searchable_pdf", "text", "json")
         self.default_quality = "balanced"
         self.default_lang = "eng"
+        self.render_dpi = 300
+        # Pages OCR'd at once per job; each is its own Tesseract process
+        self.page_workers = min(2, os.cpu_count() or 1)
+        self.checkpoint_root = os.path.join(self.file_service.upload_folder, "ocr_checkpoints")
 
         if OCR_LIBS_AVAILABLE:
             self._configure_tesseract()
@@ -62,20 +225,38 @@ class OCRService:
         file_data: bytes,
         options: Optional[Dict[str, Any]] = None,
         original_filename: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        job_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """PDF/image → OCR result.  Never returns bytes; only disk meta."""
+        """PDF/image → OCR result.  Never returns bytes; only disk meta.
+
+        Pages (PDF pages, TIFF frames, batch images) are checkpointed as they
+        are recognised, so calling this again with the same bytes and settings
+        skips every finished page.
+        ``progress_callback(done, total)`` is invoked after each page.
+        The output file is indexed against ``job_id``, so it is kept as long
+        as the job is.
+
+        Errors are returned as ``success: False``, except
+        ``SoftTimeLimitExceeded``: an interrupted run is re-raised so the task
+        can retry and resume from the checkpoint.
+        """
         options = options or {}
         ext = self._get_extension(original_filename)
         if ext not in self.supported_formats:
             raise ValueError(f"Unsupported format {ext}")
 
         temp_file: Optional[Path] = None
+        checkpoint: Optional[OCRCheckpointStore] = None
         try:
             temp_file = self._save_file_data(file_data, original_filename)
+            checkpoint = self._checkpoint_for(file_data, options)
             if ext == "pdf":
-                result = self._process_pdf_ocr(temp_file, options)
+                process = self._process_pdf_ocr
             else:
-                result = self._process_image_ocr(temp_file, options)
+                process = self._process_image_ocr
+            result = process(temp_file, options, checkpoint, progress_callback, job_id)
+            checkpoint.clear()
 
             # ====  disk-only meta  ====
             out_path = Path(result["output_path"])
@@ -89,6 +270,11 @@ class OCRService:
                 "original_size": len(file_data),
             }
 
+        except SoftTimeLimitExceeded:
+            completed = checkpoint.completed_pages() if checkpoint else 0
+            logger.warning(f"OCR interrupted after {completed} pages")
+            raise
+
         except Exception as exc:
             logger.exception("OCR failed")
             # Clean up any temporary files
@@ -99,6 +285,7 @@ class OCRService:
                 "error": str(exc),
                 "original_filename": original_filename,
                 "original_size": len(file_data),
+                "pages_completed": checkpoint.completed_pages() if checkpoint else 0,
             }
         finally:
             if temp_file:
@@ -109,18 +296,38 @@ class OCRService:
         file_data: bytes,
         options: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Light-weight preview; never crashes."""
+        """Light-weight preview; never crashes.
+
+        One or two representative pages are OCR'd at the requested settings
+        within ``PREVIEW_TIME_BUDGET`` seconds (``options["time_budget"]`` may
+        lower it), and the measured seconds per page and Tesseract confidence
+        are extrapolated to the whole document.  Falls back to heuristic
+        estimates when nothing could be measured.
+        """
         options = options or {}
         temp_file: Optional[Path] = None
         try:
-            temp_file = self._save_file_data(file_data, "preview.pdf")
+            # The preview task only gets bytes; PIL sniffs the real image format
+            if file_data[:5] == b"%PDF-":
+                name = "preview.pdf"
+            elif file_data[:4] == b"PK\x03\x04":
+                name = "preview.zip"
+            else:
+                name = "preview.png"
+            temp_file = self._save_file_data(file_data, name)
             analysis = self._analyze_file_for_ocr(temp_file)
+            sample = self._measure_ocr_sample(temp_file, file_data, analysis, options)
+            if sample:
+                analysis["sample"] = sample
             return {
                 "success": True,
                 "original_size": len(file_data),
+                "page_count": analysis.get("page_count", 1),
                 "estimated_time": self._estimate_ocr_time(analysis, options),
                 "complexity": self._assess_ocr_complexity(analysis, options),
                 "estimated_accuracy": self._estimate_ocr_accuracy(analysis, options),
+                "estimate_method": "measured" if sample else "heuristic",
+                "sample": sample,
                 "recommendations": self._get_ocr_recommendations(analysis, options),
                 "supported_formats": self.output_formats,
                 "supported_languages": self.supported_languages,
@@ -151,7 +358,7 @@ class OCRService:
     def _save_file_data(self, data: bytes, name: Optional[str] = None) -> Path:
         """Save file data using file management service"""
         filename = name or f"temp_{uuid.uuid4().hex[:8]}.pdf"
-        file_id, file_path = self.file_service.save_file(data, filename)
+        file_id, file_path = self.file_service.save_file(data, filename, kind="temp")
         return Path(file_path)
 
     @staticmethod
@@ -189,11 +396,16 @@ class OCRService:
     def _analyze_file_for_ocr(self, file_path: Path) -> Dict[str, Any]:
         ext = self._get_extension(file_path.name)
         size = self.file_service.get_file_size(str(file_path))
-        base = {"file_type": ext, "file_size": size, "page_count": 1, "image_quality": "medium", "ocr_potential": "medium"}
+        base = {
+            "file_type": ext, "file_size": size, "page_count": 1,
+            "image_quality": "medium", "ocr_potential": "medium",
+        }
 
         if ext == "pdf" and PDF_LIBS_AVAILABLE:
             base.update(self._analyze_pdf_for_ocr(file_path))
-        elif ext != "pdf" and OCR_LIBS_AVAILABLE:
+        elif ext == "zip":
+            base.update(self._analyze_batch_for_ocr(file_path))
+        elif OCR_LIBS_AVAILABLE:
             base.update(self._analyze_image_for_ocr(file_path))
         return base
 
@@ -212,7 +424,10 @@ class OCRService:
 
             iq = self._assess_image_quality(total_images, page_count)
             op = self._assess_ocr_potential(text_len, total_images, page_count)
-            return {"page_count": page_count, "image_quality": iq, "ocr_potential": op, "total_images": total_images, "text_content": text_len}
+            return {
+                "page_count": page_count, "image_quality": iq, "ocr_potential": op,
+                "total_images": total_images, "text_content": text_len,
+            }
         except Exception as exc:
             logger.warning("PDF analysis failed: %s", exc)
             return {}
@@ -224,83 +439,502 @@ class OCRService:
                 size = self.file_service.get_file_size(str(img_path))
                 iq = self._assess_image_quality_by_resolution(w, h, size)
                 op = self._assess_image_ocr_potential(img.format, size)
-                return {"width": w, "height": h, "format": img.format, "image_quality": iq, "ocr_potential": op}
+                return {
+                    "page_count": getattr(img, "n_frames", 1),
+                    "width": w, "height": h, "format": img.format,
+                    "image_quality": iq, "ocr_potential": op,
+                }
         except Exception as exc:
             logger.warning("Image analysis failed: %s", exc)
             return {}
 
+    def _analyze_batch_for_ocr(self, zip_path: Path) -> Dict[str, Any]:
+        try:
+            with zipfile.ZipFile(zip_path) as archive:
+                members = self._batch_members(archive)
+            return {
+                "page_count": len(members), "image_count": len(members), "ocr_potential": "high"
+            }
+        except Exception as exc:
+            logger.warning("ZIP batch analysis failed: %s", exc)
+            return {}
+
+    @staticmethod
+    def _assess_image_quality(total_images: int, page_count: int) -> str:
+        """Scanned pages carry one image each; pure vector pages render crisply."""
+        return "medium" if total_images else "high"
+
+    @staticmethod
+    def _assess_ocr_potential(text_len: int, total_images: int, page_count: int) -> str:
+        """Low when the sampled pages already have a text layer."""
+        if text_len > 100:
+            return "low"
+        return "high" if total_images else "medium"
+
+    @staticmethod
+    def _assess_image_quality_by_resolution(width: int, height: int, size: int) -> str:
+        """Short side of ~2000 px is an A4 page at 240+ dpi."""
+        short_side = min(width, height)
+        if short_side >= 2000:
+            return "high"
+        if short_side >= 1000:
+            return "medium"
+        return "low"
+
+    @staticmethod
+    def _assess_image_ocr_potential(fmt: Optional[str], size: int) -> str:
+        """Lossless formats keep glyph edges sharp; JPEG artefacts hurt OCR."""
+        return "high" if (fmt or "").upper() in ("PNG", "TIFF", "BMP") else "medium"
+
+    def _measure_ocr_sample(
+        self,
+        file_path: Path,
+        file_data: bytes,
+        analysis: Dict[str, Any],
+        opts: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """OCR up to ``PREVIEW_SAMPLE_PAGES`` pages and time them.
+
+        Pages are spread over the document (a cover page is a poor sample).
+        The budget is a ``time.monotonic()`` deadline: it is checked before
+        each render and before preprocessing, Tesseract only gets what is
+        left as its timeout, and a further page is only started if it should
+        fit.  A page that overruns still yields a lower bound on seconds per
+        page.  Finished PDF pages
+        are checkpointed, so the real job does not OCR them again.  ZIP
+        batches are not sampled and keep the heuristic estimate.
+        """
+        if not OCR_LIBS_AVAILABLE:
+            return None
+        budget = self.PREVIEW_TIME_BUDGET
+        try:
+            budget = min(budget, float(opts.get("time_budget", budget)))
+        except (TypeError, ValueError):
+            pass
+
+        lang = opts.get("language", self.default_lang)
+        quality = opts.get("quality", self.default_quality)
+        preprocess = self._use_preprocessing(opts)
+        is_pdf = analysis.get("file_type") == "pdf"
+        if (is_pdf and not PDF_LIBS_AVAILABLE) or analysis.get("file_type") == "zip":
+            return None
+
+        page_count = max(1, int(analysis.get("page_count", 1)))
+        if is_pdf:
+            pages = sorted({page_count // 3, (2 * page_count) // 3})[: self.PREVIEW_SAMPLE_PAGES]
+        else:
+            pages = [0]
+        checkpoint = self._checkpoint_for(file_data, opts) if is_pdf else None
+
+        timings: List[float] = []
+        confidences: List[float] = []
+        budget_exceeded = False
+        started = time.monotonic()
+        deadline = started + budget
+        doc = fitz.open(file_path) if is_pdf else None
+        try:
+            for page_number in pages:
+                page_started = time.monotonic()
+                remaining = deadline - page_started
+                average = (page_started - started) / len(timings) if timings else 0
+                if remaining <= 0 or remaining < average:
+                    break
+                try:
+                    if doc is not None:
+                        image = self._render_page(doc[page_number], preprocess)
+                    else:
+                        image = file_path.read_bytes()
+                    page_ocr = self._perform_page_ocr(
+                        image, lang, quality, preprocess, deadline=deadline
+                    )
+                except TimeoutError:
+                    # Overran the whole budget: at least this slow per page
+                    timings.append(time.monotonic() - page_started)
+                    budget_exceeded = True
+                    break
+                timings.append(time.monotonic() - page_started)
+                if page_ocr.get("mean_confidence") is not None:
+                    confidences.append(page_ocr["mean_confidence"])
+                if checkpoint:
+                    checkpoint.save(page_number, page_ocr)
+        except Exception as exc:
+            logger.warning("OCR sample measurement failed: %s", exc)
+            return None
+        finally:
+            if doc is not None:
+                doc.close()
+
+        if not timings:
+            return None
+        return {
+            "pages_sampled": len(timings),
+            "seconds_per_page": round(sum(timings) / len(timings), 3),
+            "mean_confidence": (
+                round(sum(confidences) / len(confidences), 1) if confidences else None
+            ),
+            "budget_seconds": budget,
+            "budget_exceeded": budget_exceeded,
+        }
+
+    def _checkpoint_for(self, file_data: bytes, opts: Dict[str, Any]) -> OCRCheckpointStore:
+        """Checkpoint store keyed on the document and the settings that change its OCR."""
+        return OCRCheckpointStore(
+            self.checkpoint_root,
+            OCRCheckpointStore.make_key(
+                file_data,
+                opts.get("language", self.default_lang),
+                opts.get("quality", self.default_quality),
+                self.render_dpi,
+                self._use_preprocessing(opts),
+            ),
+        )
+
     # --------------------------------------------------------------------------
     # OCR PROCESSING – sync, disk-only
     # --------------------------------------------------------------------------
-    def _process_pdf_ocr(self, pdf_path: Path, opts: Dict[str, Any]) -> Dict[str, Any]:
+    def _process_pdf_ocr(
+        self,
+        pdf_path: Path,
+        opts: Dict[str, Any],
+        checkpoint: Optional[OCRCheckpointStore] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        job_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """PDF → searchable PDF **or** text/json on disk."""
         if not PDF_LIBS_AVAILABLE:
             raise RuntimeError("PyMuPDF unavailable")
 
-        output_format = opts.get("outputFormat", "searchable_pdf")
+        preprocess = self._use_preprocessing(opts)
+        doc = fitz.open(pdf_path)
+        try:
+            pages = (
+                (
+                    None,
+                    lambda page=page: self._render_page(page, preprocess),
+                    lambda builder, page_ocr, number=page.number: builder.add_pdf_page(
+                        doc, number, page_ocr
+                    ),
+                )
+                for page in doc
+            )
+            return self._ocr_pages(
+                pages, len(doc), pdf_path, opts, checkpoint, progress_callback, job_id
+            )
+        finally:
+            doc.close()
+
+    def _process_image_ocr(
+        self,
+        img_path: Path,
+        opts: Dict[str, Any],
+        checkpoint: Optional[OCRCheckpointStore] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        job_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Image, multi-frame TIFF or ZIP of images → searchable PDF / text / json on disk.
+
+        TIFF frames are decoded one at a time, only when a page needs them;
+        a ZIP batch is OCR'd member by member (in name order) into a single
+        combined result.
+        """
+        if not OCR_LIBS_AVAILABLE:
+            raise RuntimeError("OCR libs not installed")
+
+        if self._get_extension(img_path.name) == "zip":
+            with zipfile.ZipFile(img_path) as archive:
+                members = self._batch_members(archive)
+                page_count = sum(self._count_frames(archive, info) for info in members)
+                pages = (
+                    page
+                    for info in members
+                    for page in self._iter_image_pages(archive.read(info), info.filename)
+                )
+                return self._ocr_pages(
+                    pages, page_count, img_path, opts, checkpoint, progress_callback, job_id
+                )
+
+        img_bytes = img_path.read_bytes()
+        with Image.open(io.BytesIO(img_bytes)) as img:
+            page_count = getattr(img, "n_frames", 1)
+        pages = self._iter_image_pages(img_bytes)
+        return self._ocr_pages(
+            pages, page_count, img_path, opts, checkpoint, progress_callback, job_id
+        )
+
+    def _ocr_pages(
+        self,
+        pages: Iterable[Tuple[
+            Optional[str], Callable[[], Any], Callable[[SearchablePDFBuilder, Dict[str, Any]], None]
+        ]],
+        page_count: int,
+        source: Path,
+        opts: Dict[str, Any],
+        checkpoint: Optional[OCRCheckpointStore] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        job_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Page loop shared by PDFs, image frames and image batches.
+
+        ``pages`` yields ``(label, load_image, add_to_builder)`` per page.
+        Pages are loaded here, in order, and up to ``page_workers`` of them
+        are OCR'd at a time on a thread pool (Tesseract runs out of process,
+        so threads are enough).  Results are taken back in page order:
+        checkpoints, text-layer insertion and progress never run ahead of an
+        unfinished page, and every output page only carries the words
+        recognised on that page.  Pages already present in ``checkpoint``
+        are not loaded or OCR'd again.
+        """
+        output_format = self._get_output_format(opts)
         lang = opts.get("language", self.default_lang)
         quality = opts.get("quality", self.default_quality)
+        preprocess = self._use_preprocessing(opts)
+        builder = SearchablePDFBuilder() if output_format in ("searchable_pdf", "pdf") else None
+        workers = max(1, self.page_workers)
 
-        # ---------- 1.  run OCR on every page ----------
-        doc = fitz.open(pdf_path)
-        full_text = []
-        for page in doc:
-            # noinspection PyUnresolvedReferences
-            pix = page.get_pixmap(dpi=300)
-            img_bytes = pix.tobytes("png")
-            full_text.append(self._perform_image_ocr_bytes(img_bytes, lang, quality))
-        doc.close()
-        ocr_text = "\n".join(full_text)
-
-        # ---------- 2.  return the *correct* disk file ----------
-        if output_format == "pdf":
-            # make searchable PDF
-            doc = fitz.open(pdf_path)  # re-open to copy pages
-            out_doc = fitz.open()
-            for page in doc:
-                # noinspection PyUnresolvedReferences
-                new_page = out_doc.new_page(width=page.rect.width, height=page.rect.height)
-                new_page.show_pdf_page(page.rect, doc, page.number)
-                if ocr_text.strip():
-                    new_page.insert_textbox(
-                        fitz.Rect(0, 0, page.rect.width, page.rect.height),
-                        ocr_text,
-                        fontsize=1,
-                        color=(0, 0, 0, 0),
+        page_texts: List[Dict[str, Any]] = []
+
+        def finish(number, label, add_to_builder, page_ocr, future):
+            if future is not None:
+                page_ocr = future.result()
+                if checkpoint:
+                    checkpoint.save(number, page_ocr)
+            page_texts.append({"page": number + 1, "source": label, "text": page_ocr["text"]})
+            if builder:
+                add_to_builder(builder, page_ocr)
+            if progress_callback:
+                progress_callback(number + 1, page_count)
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-page")
+        try:
+            pending = deque()
+            for number, (label, load_image, add_to_builder) in enumerate(pages):
+                page_ocr = checkpoint.load(number) if checkpoint else None
+                future = None
+                if page_ocr is None:
+                    future = pool.submit(
+                        self._perform_page_ocr, load_image(), lang, quality, preprocess
                     )
-            doc.close()
-            filename = f"ocr_{pdf_path.stem}.pdf"
-            out_path = self.upload_folder / filename
-            out_doc.save(str(out_path))
-            out_doc.close()
-            return {"output_path": str(out_path), "filename": filename, "mime_type": "application/pdf", "output_format": output_format}
+                pending.append((number, label, add_to_builder, page_ocr, future))
+                # Bounds the rendered pages held in memory to the pool size
+                if len(pending) >= workers:
+                    finish(*pending.popleft())
+            while pending:
+                finish(*pending.popleft())
+        finally:
+            # On error or a time limit, don't wait for pages still in Tesseract
+            pool.shutdown(wait=False, cancel_futures=True)
 
-        # ---------- 3.  text or json ----------
+        if builder:
+            filename = f"ocr_{source.stem}.pdf"
+            out_path = self.file_service.create_output_path(filename, job_id=job_id)
+            with self.file_service.open_output(out_path) as f:
+                builder.save(f)
+            return {
+                "output_path": str(out_path), "filename": filename,
+                "mime_type": "application/pdf", "output_format": "searchable_pdf",
+            }
+
+        ocr_text = "\n".join(page["text"] for page in page_texts)
         if output_format == "json":
-            return self._create_json_output(ocr_text, pdf_path)
+            return self._create_json_output(ocr_text, source, page_texts, job_id=job_id)
         # default = plain text
-        return self._create_text_output(ocr_text, pdf_path)
+        return self._create_text_output(ocr_text, source, job_id=job_id)
 
-    def _process_image_ocr(self, img_path: Path, opts: Dict[str, Any]) -> Dict[str, Any]:
-        """Image → text / json on disk."""
-        ...
-        ocr_text = self._perform_image_ocr_bytes(img_path.read_bytes(), lang, quality)
+    def _iter_image_pages(
+        self, img_bytes: bytes, label: Optional[str] = None
+    ) -> Iterator[Tuple[
+        Optional[str], Callable[[], Any], Callable[[SearchablePDFBuilder, Dict[str, Any]], None]
+    ]]:
+        """Yield one page per image frame, decoding frames lazily.
 
-        if opts.get('output_format') == "json":
-            return self._create_json_output(ocr_text, img_path)
-        # default = plain text
-        return self._create_text_output(ocr_text, img_path)
+        Single-frame images are passed on as their original encoded bytes so
+        a JPEG scan stays JPEG in the searchable PDF.  A frame is only
+        decoded when its page is OCR'd or added to a searchable PDF, so
+        checkpointed pages of a text/json result cost nothing on resume.
+        """
+        with Image.open(io.BytesIO(img_bytes)) as img:
+            frames = getattr(img, "n_frames", 1)
+            if frames == 1:
+                dpi = self._image_dpi(img)
+        if frames == 1:
+            yield (
+                label,
+                lambda: img_bytes,
+                lambda builder, page_ocr: builder.add_image_page(img_bytes, page_ocr, dpi=dpi),
+            )
+            return
+        for index in range(frames):
+            load = self._frame_loader(img_bytes, index)
+            yield (
+                f"{label}#{index + 1}" if label else None,
+                lambda load=load: load()[0],
+                lambda builder, page_ocr, load=load: builder.add_image_page(
+                    load()[0], page_ocr, dpi=load()[1]
+                ),
+            )
+
+    def _frame_loader(self, img_bytes: bytes, index: int) -> Callable[[], Tuple[Any, int]]:
+        """Return a callable decoding frame ``index`` (and its DPI) once, on first use.
+
+        The image is re-opened from ``img_bytes``, so the frame can still be
+        loaded after the page loop has moved on to later frames.
+        """
+        decoded: List[Tuple[Any, int]] = []
+
+        def load() -> Tuple[Any, int]:
+            if not decoded:
+                with Image.open(io.BytesIO(img_bytes)) as img:
+                    img.seek(index)
+                    # convert() also detaches the frame from the file handle
+                    frame = img.convert("L" if img.mode in ("1", "L") else "RGB")
+                    decoded.append((frame, self._image_dpi(img)))
+            return decoded[0]
+
+        return load
+
+    def _image_dpi(self, img: Any) -> int:
+        """Resolution from the image header (fax TIFFs are ~200 dpi), else the render DPI."""
+        try:
+            dpi = int(round(float(img.info.get("dpi", (0, 0))[0])))
+        except (TypeError, ValueError, IndexError):
+            dpi = 0
+        return dpi if dpi > 0 else self.render_dpi
+
+    def _batch_members(self, archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+        """Image members of a ZIP batch in name order, within the batch limits."""
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not os.path.basename(info.filename).startswith(".")
+            and self._get_extension(info.filename) in self.batch_image_formats
+        ]
+        if not members:
+            raise ValueError("ZIP batch contains no supported images")
+        if len(members) > self.BATCH_MAX_FILES:
+            raise ValueError(
+                f"ZIP batch has {len(members)} images; the limit is {self.BATCH_MAX_FILES}"
+            )
+        if sum(info.file_size for info in members) > self.BATCH_MAX_BYTES:
+            raise ValueError("ZIP batch is too large once extracted")
+        return sorted(members, key=lambda info: info.filename)
+
+    @staticmethod
+    def _count_frames(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+        """Frame count from the image header; only TIFFs can hold more than one."""
+        if not info.filename.lower().endswith((".tif", ".tiff")):
+            return 1
+        with archive.open(info) as fh, Image.open(fh) as img:
+            return getattr(img, "n_frames", 1)
+
+    def _render_page(self, page: Any, preprocess: bool = False) -> Any:
+        """Render a PDF page to a PIL image straight from the pixmap samples.
+
+        Skips a PNG encode/decode round-trip; grayscale when preprocessing
+        will need it anyway.
+        """
+        # noinspection PyUnresolvedReferences
+        colorspace = fitz.csGRAY if preprocess else fitz.csRGB
+        pix = page.get_pixmap(dpi=self.render_dpi, colorspace=colorspace)
+        return Image.frombytes("L" if pix.n == 1 else "RGB", (pix.width, pix.height), pix.samples)
+
+    @staticmethod
+    def _get_output_format(opts: Dict[str, Any]) -> str:
+        """Routes send ``outputFormat``; older callers used ``output_format``."""
+        return opts.get("outputFormat") or opts.get("output_format") or "searchable_pdf"
+
+    @staticmethod
+    def _use_preprocessing(opts: Dict[str, Any]) -> bool:
+        """``preprocess: true`` enables the OpenCV clean-up stage when OpenCV is installed."""
+        if not opts.get("preprocess"):
+            return False
+        if not preprocessing_available():
+            logger.warning("OpenCV/NumPy unavailable – OCR preprocessing skipped")
+            return False
+        return True
 
     # --------------------------------------------------------------------------
     # low-level OCR
     # --------------------------------------------------------------------------
-    def _perform_image_ocr_bytes(self, img_bytes: bytes, lang: str, quality: str) -> str:
-        """Run Tesseract on in-memory image – sync."""
+    def _perform_page_ocr(
+        self, image: Any, lang: str, quality: str, preprocess: bool = False,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run Tesseract once on a page image and return text plus word boxes.
+
+        Uses the TSV (``image_to_data``) output so the same pass yields the
+        plain text and the pixel boxes needed for the searchable-PDF layer.
+        ``image`` is encoded image bytes or a PIL image.  With ``preprocess``
+        the image is deskewed, binarised and cropped first; the returned boxes
+        and size always refer to the original image.  With a ``deadline``
+        (``time.monotonic()`` value) a page whose preprocessing or Tesseract
+        run would pass it raises ``TimeoutError``.
+        """
         if not OCR_LIBS_AVAILABLE:
             raise RuntimeError("OCR libs not installed")
-        import io
         config = self._get_tesseract_config(quality)
-        return pytesseract.image_to_string(Image.open(io.BytesIO(img_bytes)), lang=lang, config=config)
+        opened = Image.open(io.BytesIO(image)) if isinstance(image, (bytes, bytearray)) else None
+        img = opened or image
+        try:
+            width, height = img.size
+            transform = None
+            if preprocess:
+                self._check_deadline(deadline)
+                img, transform = preprocess_for_ocr(img)
+            timeout = self._check_deadline(deadline)
+            try:
+                data = pytesseract.image_to_data(
+                    img, lang=lang, config=config, output_type=pytesseract.Output.DICT,
+                    timeout=timeout,
+                )
+            except RuntimeError as exc:
+                # pytesseract signals a killed run as RuntimeError("Tesseract process timeout")
+                if deadline is None or "timeout" not in str(exc).lower():
+                    raise
+                raise TimeoutError(str(exc)) from exc
+        finally:
+            if opened is not None:
+                opened.close()
+
+        words: List[List[Any]] = []
+        confidences: List[float] = []
+        lines: Dict[tuple, List[str]] = {}
+        for i, raw in enumerate(data.get("text", [])):
+            word = (raw or "").strip()
+            if not word:
+                continue
+            left, top = int(data["left"][i]), int(data["top"][i])
+            right, bottom = left + int(data["width"][i]), top + int(data["height"][i])
+            words.append([left, top, right, bottom, word])
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            try:
+                conf = float(data["conf"][i])
+            except (TypeError, ValueError):
+                continue
+            if conf >= 0:
+                confidences.append(conf)
+
+        if transform is not None:
+            words = map_boxes_to_source(words, transform)
+
+        return {
+            "text": "\n".join(" ".join(line) for line in lines.values()),
+            "words": words,
+            "width": width,
+            "height": height,
+            "mean_confidence": sum(confidences) / len(confidences) if confidences else None,
+        }
+
+    @staticmethod
+    def _check_deadline(deadline: Optional[float]) -> float:
+        """Seconds left until ``deadline`` (0 = no limit); ``TimeoutError`` once it has passed."""
+        if deadline is None:
+            return 0
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("OCR time budget exhausted")
+        return remaining
 
     @staticmethod
     def _get_tesseract_config(quality: str) -> str:
@@ -313,37 +947,57 @@ class OCRService:
     # --------------------------------------------------------------------------
     # output helpers – disk only
     # --------------------------------------------------------------------------
-    def _create_text_output(self, text: str, original: Path) -> Dict[str, Any]:
-        ...
-        return {"output_path": str(out_path), "filename": filename, "mime_type": "text/plain", "output_format": "text"}
+    def _create_text_output(
+        self, text: str, original: Path, job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        filename = f"ocr_{original.stem}.txt"
+        out_path = Path(self.file_service.create_output_path(filename, job_id=job_id))
+        with self.file_service.open_output(str(out_path), "w", encoding="utf-8") as f:
+            f.write(text)
+        return {
+            "output_path": str(out_path), "filename": filename,
+            "mime_type": "text/plain", "output_format": "text",
+        }
 
-    def _create_json_output(self, text: str, original: Path) -> Dict[str, Any]:
+    def _create_json_output(
+        self,
+        text: str,
+        original: Path,
+        pages: Optional[List[Dict[str, Any]]] = None,
+        job_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         filename = f"ocr_{original.stem}.json"
-        out_path = self.upload_folder / filename
-        out_path.write_text(
-            json.dumps(
+        out_path = Path(self.file_service.create_output_path(filename, job_id=job_id))
+        with self.file_service.open_output(str(out_path), "w", encoding="utf-8") as f:
+            json.dump(
                 {
                     "text": text,
                     "word_count": len(text.split()),
                     "character_count": len(text),
                     "lines": text.splitlines(),
+                    "pages": pages or [],
                     "metadata": {
                         "source_file": original.name,
                         "processed_at": datetime.utcnow().isoformat(),
                     },
                 },
+                f,
                 ensure_ascii=False,
                 indent=2,
-            ),
-            encoding="utf-8",
-        )
-        return {"output_path": str(out_path), "filename": filename, "mime_type": "application/json", "output_format": "json"}
+            )
+        return {
+            "output_path": str(out_path), "filename": filename,
+            "mime_type": "application/json", "output_format": "json",
+        }
 
     # --------------------------------------------------------------------------
     # estimation helpers
     # --------------------------------------------------------------------------
     def _estimate_ocr_time(self, analysis: Dict[str, Any], opts: Dict[str, Any]) -> int:
         page_count = analysis.get("page_count", 1)
+        sample = analysis.get("sample")
+        if sample:
+            return int(math.ceil(sample["seconds_per_page"] * page_count))
         quality = opts.get("quality", self.default_quality)
         base = 5
         mul = {"fast": 0.7, "balanced": 1.0, "accurate": 1.5}.get(quality, 1.0)
@@ -372,6 +1026,9 @@ class OCRService:
         return "low"
 
     def _estimate_ocr_accuracy(self, analysis: Dict[str, Any], opts: Dict[str, Any]) -> float:
+        sample = analysis.get("sample") or {}
+        if sample.get("mean_confidence") is not None:
+            return round(sample["mean_confidence"] / 100.0, 3)
         iq = analysis.get("image_quality", "medium")
         quality = opts.get("quality", self.default_quality)
         base = 0.8
@@ -392,6 +1049,12 @@ class OCRService:
             rec.append("Large document – use 'balanced' or 'accurate' quality.")
         if potential == "low":
             rec.append("Document already contains searchable text – OCR may be unnecessary.")
+        confidence = (analysis.get("sample") or {}).get("mean_confidence")
+        if confidence is not None and confidence < 70 and not opts.get("preprocess"):
+            rec.append(
+                "Low recognition confidence on sample pages – "
+                "enable 'preprocess' for skewed or noisy scans."
+            )
         return rec
 
     # --------------------------------------------------------------------------
@@ -404,4 +1067,12 @@ class OCRService:
     def cleanup_temp_files(self) -> None:
         """Cleanup temporary files using file management service."""
         # Delegate cleanup to file management service
-        return self.file_service.cleanup_temp_files()
\ No newline at end of file
+        return self.file_service.cleanup_temp_files()
+
+    def cleanup_checkpoints(self, max_age_hours: Optional[float] = None) -> Dict[str, Any]:
+        """Drop page checkpoints of OCR jobs that never finished."""
+        max_age = max_age_hours or self.CHECKPOINT_MAX_AGE_HOURS
+        removed = OCRCheckpointStore.purge_stale(self.checkpoint_root, max_age)
+        if removed:
+            logger.info("Removed %d stale OCR checkpoint folders", removed)
+        return {"checkpoints_removed": removed}
\ No newline at end of file
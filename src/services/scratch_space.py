@@ -0,0 +1,125 @@
+"""RAM-backed scratch space for short-lived intermediates
+
+Temp PDFs written for conversion, OCR and analysis live for seconds. Putting
+them on a tmpfs such as ``/dev/shm`` keeps that churn off the disk that holds
+uploads and results. The scratch directory has its own size cap; a file that
+doesn't fit (or hits ENOSPC on the tmpfs) is left for the caller to write to
+disk instead, so a full scratch tier never fails a job.
+
+Scratch files are not entered in the file index: they are deleted by their
+callers, and anything left behind is swept by age in ``cleanup``.
+"""
+import errno
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Optional
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class ScratchSpace:
+    """Size-capped flat directory for throwaway files"""
+
+    def __init__(self, root: str, max_bytes: int):
+        """
+        Args:
+            root: Scratch directory, normally on a tmpfs
+            max_bytes: Most bytes kept in scratch at once
+        """
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, filename: str) -> str:
+        return os.path.join(self.root, os.path.basename(filename))
+
+    def contains(self, file_path: str) -> bool:
+        return os.path.dirname(os.path.abspath(file_path)) == self.root
+
+    def used_bytes(self) -> int:
+        total = 0
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        try:
+                            total += entry.stat(follow_symlinks=False).st_size
+                        except FileNotFoundError:
+                            continue
+        except FileNotFoundError:
+            pass
+        return total
+
+    def fits(self, size: int) -> bool:
+        """Is there room for ``size`` more bytes under the cap and on the tmpfs?"""
+        if self.used_bytes() + size > self.max_bytes:
+            return False
+        return shutil.disk_usage(self.root).free >= size
+
+    def write(self, filename: str, data: bytes, fsync: bool = False) -> Optional[str]:
+        """Write ``data`` to scratch
+
+        Returns:
+            The file path, or None if it doesn't fit (write it to disk instead)
+        """
+        if not self.fits(len(data)):
+            return None
+
+        file_path = self.path_for(filename)
+        try:
+            with open(file_path, 'xb') as f:
+                f.write(data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            if e.errno in (errno.ENOSPC, errno.EDQUOT):
+                logger.info(f"Scratch space full, falling back to disk for {filename}")
+                return None
+            raise
+        return file_path
+
+    def cleanup(self, max_age_seconds: float) -> Dict[str, Any]:
+        """Remove scratch files older than ``max_age_seconds`` (leaked by their callers)"""
+        summary = {'files_deleted': 0, 'space_freed_mb': 0.0}
+        cutoff = time.time() - max_age_seconds
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                        if entry.is_file(follow_symlinks=False) and stat.st_mtime < cutoff:
+                            os.remove(entry.path)
+                            summary['files_deleted'] += 1
+                            summary['space_freed_mb'] += stat.st_size / MB
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return summary
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'root': self.root,
+            'used_mb': round(self.used_bytes() / MB, 2),
+            'max_mb': round(self.max_bytes / MB, 2),
+        }
+
+
+def create_scratch_space() -> Optional[ScratchSpace]:
+    """Scratch space configured by Config.SCRATCH_DIR, or None when disabled or unusable"""
+    if not Config.SCRATCH_DIR or Config.SCRATCH_MAX_MB <= 0:
+        return None
+    try:
+        return ScratchSpace(Config.SCRATCH_DIR, Config.SCRATCH_MAX_MB * MB)
+    except OSError as e:
+        logger.warning(f"Scratch space {Config.SCRATCH_DIR} unavailable, using disk: {str(e)}")
+        return None
@@ -116,6 +116,42 @@ class ServiceRegistry:
             cls._instances['bank_statement_extraction'] = BankStatementExtractionService()
         return cls._instances['bank_statement_extraction']
 
+    @classmethod
+    def get_job_status_cache(cls):
+        """Get JobStatusCache instance
+        
+        Returns:
+            JobStatusCache instance
+        """
+        if 'job_status_cache' not in cls._instances:
+            from src.services.job_status_cache import JobStatusCache
+            cls._instances['job_status_cache'] = JobStatusCache()
+        return cls._instances['job_status_cache']
+
+    @classmethod
+    def get_job_event_broker(cls):
+        """Get JobEventBroker instance
+        
+        Returns:
+            JobEventBroker instance
+        """
+        if 'job_event_broker' not in cls._instances:
+            from src.services.job_events import JobEventBroker
+            cls._instances['job_event_broker'] = JobEventBroker(cls.get_job_status_cache())
+        return cls._instances['job_event_broker']
+
+    @classmethod
+    def get_job_archive(cls):
+        """Get JobArchive instance
+        
+        Returns:
+            JobArchive instance
+        """
+        if 'job_archive' not in cls._instances:
+            from src.services.job_archive import JobArchive
+            cls._instances['job_archive'] = JobArchive()
+        return cls._instances['job_archive']
+
     @classmethod
     def get_service_count(cls) -> int:
         """Get count of cached service instances
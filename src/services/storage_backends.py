@@ -0,0 +1,241 @@
+"""Storage backends for FileManagementService
+
+Workers always produce files on local disk (Ghostscript, Tesseract and
+friends need real paths); a storage backend decides where finished files
+live so that any web node can serve them by object key:
+
+- LocalStorageBackend: keys map onto the upload folder (single node or a
+  shared volume). Publishing a file that is already in place is free.
+- S3StorageBackend: keys are objects in an S3-compatible bucket (AWS, MinIO,
+  Ceph...). Uploads use multipart transfers, downloads use ranged GETs.
+
+Keys are '/'-separated paths relative to the storage root, e.g.
+``results/3f/a2/ocr_scan.pdf``.
+"""
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import IO, Iterator, Optional
+
+from src.config import Config
+from src.utils.file_utils import atomic_write, copy_stream
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+    boto3 = None
+    TransferConfig = None
+    ClientError = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Where published files live, addressed by object key"""
+
+    #: True when keys resolve to files on this node's disk
+    is_local = False
+
+    @abstractmethod
+    def put_file(self, key: str, local_path: str) -> None:
+        """Publish a local file under ``key``, consuming it
+
+        The source path no longer exists afterwards: it is moved (local) or
+        uploaded and removed (remote), so no second copy is left behind.
+        """
+
+    @abstractmethod
+    def put_stream(self, key: str, source: IO[bytes]) -> None:
+        """Publish the contents of a binary file-like object under ``key``"""
+
+    @abstractmethod
+    def get_file(self, key: str, local_path: str) -> None:
+        """Fetch the object to a local path (for processing on a worker)"""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the bytes ``start``..``end`` (inclusive, as in HTTP Range) of an object"""
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Object size in bytes, or None if it does not exist"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete an object; returns False if it did not exist"""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on this node's disk, if it has one"""
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """Objects are files under a root directory"""
+
+    is_local = True
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, key: str) -> str:
+        """Filesystem path for a key, refusing keys that escape the root"""
+        root = os.path.abspath(self.root)
+        path = os.path.abspath(os.path.join(root, *key.split('/')))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Storage key escapes the storage root: {key}")
+        return path
+
+    def put_file(self, key: str, local_path: str) -> None:
+        path = self.path_for(key)
+        if os.path.abspath(local_path) == path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(local_path, path)
+
+    def put_stream(self, key: str, source: IO[bytes]) -> None:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path) as f:
+            copy_stream(source, f)
+
+    def get_file(self, key: str, local_path: str) -> None:
+        path = self.path_for(key)
+        if os.path.abspath(local_path) != path:
+            shutil.copyfile(path, local_path)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self.path_for(key), 'rb') as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.stat(self.path_for(key)).st_size
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        return path if os.path.isfile(path) else None
+
+
+class S3StorageBackend(StorageBackend):
+    """Objects live in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None, multipart_threshold: int = 8 * 1024 * 1024,
+                 multipart_chunksize: int = 8 * 1024 * 1024, max_concurrency: int = 4, client=None):
+        """
+        Args:
+            bucket: Bucket name
+            prefix: Key prefix inside the bucket
+            endpoint_url: Endpoint for S3-compatible stores such as MinIO
+            region_name: Bucket region
+            multipart_threshold: Size above which uploads are multipart
+            multipart_chunksize: Multipart part size (S3 minimum is 5MB)
+            max_concurrency: Parallel part transfers per file
+            client: Pre-built S3 client (defaults to a boto3 client)
+        """
+        if client is None:
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("boto3 is required for the S3 storage backend")
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region_name)
+        if not bucket:
+            raise ValueError("S3 storage backend requires a bucket name")
+
+        self.client = client
+        self.bucket = bucket
+        self.prefix = f"{prefix.strip('/')}/" if prefix.strip('/') else ''
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+        ) if TransferConfig else None
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put_file(self, key: str, local_path: str) -> None:
+        self.client.upload_file(local_path, self.bucket, self.object_key(key), Config=self.transfer_config)
+        os.remove(local_path)
+        logger.debug(f"Uploaded {local_path} to s3://{self.bucket}/{self.object_key(key)}")
+
+    def put_stream(self, key: str, source: IO[bytes]) -> None:
+        self.client.upload_fileobj(source, self.bucket, self.object_key(key), Config=self.transfer_config)
+
+    def get_file(self, key: str, local_path: str) -> None:
+        with atomic_write(local_path) as f:
+            self.client.download_fileobj(self.bucket, self.object_key(key), f, Config=self.transfer_config)
+
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key), Range=byte_range)
+        body = response['Body']
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))['ContentLength']
+        except Exception as e:
+            if ClientError and isinstance(e, ClientError) and \
+                    e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def delete(self, key: str) -> bool:
+        existed = self.exists(key)
+        if existed:
+            self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+        return existed
+
+
+def create_storage_backend(upload_folder: str) -> StorageBackend:
+    """Build the storage backend selected by Config.STORAGE_BACKEND
+
+    Args:
+        upload_folder: Root for the local backend
+
+    Returns:
+        StorageBackend instance
+    """
+    if str(getattr(Config, 'STORAGE_BACKEND', 'local')).lower() == 's3':
+        return S3StorageBackend(
+            bucket=Config.S3_BUCKET,
+            prefix=Config.S3_PREFIX,
+            endpoint_url=Config.S3_ENDPOINT_URL or None,
+            region_name=Config.S3_REGION or None,
+            multipart_threshold=Config.S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+            multipart_chunksize=Config.S3_MULTIPART_CHUNK_MB * 1024 * 1024,
+        )
+    return LocalStorageBackend(upload_folder)
@@ -24,7 +24,7 @@ from src.main import job_operations_controller, service_registry
 
 # Exception imports for specific error handling
 from sqlalchemy.exc import DBAPIError, OperationalError, IntegrityError
-from celery.exceptions import Ignore
+from celery.exceptions import Ignore, Retry, SoftTimeLimitExceeded
 import requests
 from src.utils.exceptions import ValidationError, ConfigurationError
 
@@ -256,35 +256,42 @@ def bulk_compress_task(self, job_id: str, file_data_list: List[bytes],
         total_files = len(file_data_list)
         processed_files, errors = [], []
 
-        for i, (file_data, filename) in enumerate(zip(file_data_list, filenames)):
-            try:
-                progress = int((i / total_files) * 100)
-                current_task.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'current': i + 1,
-                        'total': total_files,
-                        'progress': progress,
-                        'status': f'Processing file {i+1} of {total_files}: {filename}'
-                    }
-                )
-                result = service_registry.get_compression_service().process_file_data(file_data=file_data,
-                                                                                     settings=settings,
-                                                                                     original_filename=filename)
-                processed_files.append(result)
-                logger.info(f"Processed file {i+1}/{total_files} for job {job_id}: {filename}")
-
-            except Exception as e:
-                errors.append({'filename': filename, 'error': str(e), 'index': i})
-                logger.error(f"Error processing file {filename} in job {job_id}: {str(e)}")
-                continue
+        file_service = service_registry.get_compression_service().file_service
+
+        # Each file goes into the archive as soon as it is done, so the
+        # archive is complete when the last file finishes
+        with file_service.open_result_archive(job_id) as archive:
+            for i, (file_data, filename) in enumerate(zip(file_data_list, filenames)):
+                try:
+                    progress = int((i / total_files) * 100)
+                    # Buffered per job and written in batches, so per-file is cheap
+                    job_operations_controller.update_job_progress(job_id, progress)
+                    current_task.update_state(
+                        state='PROGRESS',
+                        meta={
+                            'current': i + 1,
+                            'total': total_files,
+                            'progress': progress,
+                            'status': f'Processing file {i+1} of {total_files}: {filename}'
+                        }
+                    )
+                    result = service_registry.get_compression_service().process_file_data(file_data=file_data,
+                                                                                         settings=settings,
+                                                                                         original_filename=filename)
+                    # An output that is gone or unreadable fails this file only
+                    if not archive.add(result):
+                        raise FileNotFoundError(f"Output missing: {result.get('output_path')}")
+                    processed_files.append(result)
+                    logger.info(f"Processed file {i+1}/{total_files} for job {job_id}: {filename}")
+
+                except Exception as e:
+                    errors.append({'filename': filename, 'error': str(e), 'index': i})
+                    logger.error(f"Error processing file {filename} in job {job_id}: {str(e)}")
 
         result_path = None
         if processed_files:
             try:
-                # Create archive of processed files and store on disk
-                output_path = service_registry.get_compression_service().file_service.create_result_archive(
-                    processed_files=processed_files, job_id=job_id)
+                output_path = archive.path
 
                 result_data = {
                     'processed_files': len(processed_files),
@@ -486,14 +493,35 @@ def ocr_process_task(
             job_operations_controller.update_job_status_safely(job_id=job_id, status=JobStatus.PROCESSING)
 
             current_task.update_state(
-                state="PROGRESS", meta={"progress": 10, "status": "Starting OCR"}
+                state="PROGRESS", meta={"progress": 0, "status": "Starting OCR"}
             )
 
-            result = service_registry.get_ocr_service().process_ocr_data(
-                file_data=file_data,
-                options=options,
-                original_filename=original_filename,
-            )
+            def report_page(done: int, total: int) -> None:
+                progress = round(done / total * 100, 2) if total else 100.0
+                job_operations_controller.update_job_progress(job_id, progress)
+                current_task.update_state(
+                    state="PROGRESS",
+                    meta={"current": done, "total": total, "progress": progress,
+                          "status": f"OCR page {done} of {total}"}
+                )
+
+            # Finished pages are checkpointed by the service, so a retry or a
+            # redelivered message (worker restart) resumes at the first page
+            # still missing. Only interruptions are retried: any other error
+            # would fail the same way again.
+            try:
+                result = service_registry.get_ocr_service().process_ocr_data(
+                    file_data=file_data,
+                    options=options,
+                    original_filename=original_filename,
+                    progress_callback=report_page,
+                    job_id=job_id,
+                )
+            except SoftTimeLimitExceeded:
+                if self.request.retries >= self.max_retries:
+                    raise
+                logger.warning(f"OCR job {job_id} hit its time limit, resuming from checkpoint")
+                raise self.retry(countdown=5)
 
             if result["success"]:
                 job_operations_controller.update_job_status_safely(job_id=job_id, status=JobStatus.COMPLETED, result=result)
@@ -505,6 +533,8 @@ def ocr_process_task(
             )
             return result
 
+    except Retry:
+        raise
     except Exception as exc:
         return handle_task_error(task_instance=self, exc=exc, job_id=job_id, job=job)
 
@@ -18,7 +18,8 @@ from src.utils.exceptions import (
     PDFCompressionError, ValidationError, AuthenticationError, 
     AuthorizationError, ResourceNotFoundError, RateLimitExceededError,
     FileProcessingError, SubscriptionError, UsageLimitExceededError,
-    ExternalServiceError, ConfigurationError, DatabaseError, SecurityError
+    ExternalServiceError, ConfigurationError, DatabaseError, SecurityError,
+    StorageCapacityError
 )
 from src.utils.logging_utils import log_error_with_context
 
@@ -133,6 +134,13 @@ def register_error_handlers(app: Flask) -> None:
         
         return response, status_code
     
+    @app.errorhandler(StorageCapacityError)
+    def handle_storage_capacity_error(error: StorageCapacityError):
+        """Handle full storage with a retry hint."""
+        response, status_code = handle_pdf_compression_error(error)
+        response.headers['Retry-After'] = str(error.details['retry_after'])
+        return response, status_code
+    
     @app.errorhandler(FileProcessingError)
     def handle_file_processing_error(error: FileProcessingError):
         """Handle file processing errors."""
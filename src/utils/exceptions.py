@@ -115,6 +115,24 @@ class RateLimitExceededError(PDFCompressionError):
         )
 
 
+class StorageCapacityError(PDFCompressionError):
+    """Raised when there is no disk room for new work."""
+    
+    def __init__(self, reason: str, retry_after: int = 120, details: Dict[str, Any] = None):
+        error_details = details or {}
+        error_details.update({
+            'reason': reason,
+            'retry_after': retry_after
+        })
+        
+        super().__init__(
+            message="Server storage is full, please retry later",
+            error_code='STORAGE_CAPACITY_EXCEEDED',
+            details=error_details,
+            status_code=503
+        )
+
+
 class FileProcessingError(PDFCompressionError):
     """Raised when file processing fails."""
     
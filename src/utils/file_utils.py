@@ -1,10 +1,12 @@
 """File handling utilities"""
 import os
 import time
+import uuid
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, IO, Iterator, Callable, Optional, Union, Iterable
 
 logger = logging.getLogger(__name__)
 
@@ -187,6 +189,88 @@ def copy_file_safely(source: str, destination: str) -> bool:
         return False
 
 
+@contextmanager
+def atomic_write(file_path: str, mode: str = 'wb', fsync: bool = False, **open_kwargs) -> Iterator[IO]:
+    """
+    Write a file via a temporary file in the same directory, renamed into place on success.
+    
+    Readers never see a partially written file; if the block raises, the
+    temporary file is removed and any existing file at the path is untouched.
+    
+    Args:
+        file_path: Final file path
+        mode: 'wb' for binary or 'w' for text
+        fsync: Flush file and directory to disk before returning
+        **open_kwargs: Passed to open() (e.g. encoding, newline)
+        
+    Yields:
+        Open file object to write to
+    """
+    if mode not in ('wb', 'w'):
+        raise ValueError(f"Unsupported mode for atomic write: {mode}")
+    
+    temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, mode.replace('w', 'x'), **open_kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+        if fsync:
+            _fsync_directory(os.path.dirname(os.path.abspath(file_path)))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def copy_stream(source: Union[bytes, IO[bytes], Iterable[bytes]], destination: IO[bytes],
+                chunk_size: int = 1024 * 1024, on_chunk: Optional[Callable[[bytes], None]] = None) -> int:
+    """
+    Copy bytes, a binary file-like object or an iterable of chunks to a file.
+    
+    Args:
+        source: Data to copy
+        destination: Binary file object to write to
+        chunk_size: Read size for file-like sources
+        on_chunk: Called with every chunk written (e.g. a hash update)
+        
+    Returns:
+        Number of bytes written
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        chunks = (source,)
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), b'')
+    else:
+        chunks = source
+    
+    total = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        destination.write(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+        total += len(chunk)
+    return total
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist a rename by syncing its directory (no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 def delete_file_safely(file_path: str) -> bool:
     """
     Safely delete a file with error handling.
@@ -0,0 +1,297 @@
+"""Image preprocessing for OCR input.
+
+Vectorised NumPy/OpenCV clean-up applied to rendered page images before they
+reach Tesseract: denoise, deskew, adaptive binarisation and border crop.
+OpenCV and NumPy are loaded through ``LazyImporter`` so nothing heavy is
+imported unless the stage is actually enabled.
+
+``preprocess_for_ocr`` returns the cleaned image together with the transform
+it applied, and ``map_boxes_to_source`` uses that transform to put Tesseract
+word boxes back on the original page so searchable-PDF text layers stay
+aligned with the unmodified scan.
+"""
+import logging
+from typing import Any, Dict, List, Tuple
+
+from src.utils.lazy_imports import LazyImporter
+
+logger = logging.getLogger(__name__)
+
+# Skew search range (degrees) and the width the search image is scaled to
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_COARSE_STEP = 0.5
+DESKEW_FINE_STEP = 0.1
+DESKEW_SEARCH_WIDTH = 800
+DESKEW_MIN_ANGLE = 0.2
+
+# Adaptive threshold window (odd, in pixels at 300 dpi) and offset
+BINARIZE_BLOCK_SIZE = 31
+BINARIZE_OFFSET = 15
+
+# Edge rows/columns darker than this fraction are treated as scanner border;
+# a band wider than BORDER_MAX_RATIO of the page is shading, not border
+BORDER_INK_RATIO = 0.5
+BORDER_MAX_RATIO = 0.15
+# Pixels shaved off inside a stripped border, where its ragged edge bleeds in
+BORDER_BLEED = 4
+
+# Ink components smaller than this (pixels at 300 dpi) are noise; a printed
+# full stop is around 36
+DESPECKLE_MAX_AREA = 15
+
+# Content box: ink is smeared into word blobs; smaller blobs are stray marks
+CONTENT_SMEAR = (25, 5)
+CONTENT_MIN_BLOB_AREA = 600
+CROP_MARGIN = 10
+
+
+def preprocessing_available() -> bool:
+    """Return True if OpenCV and NumPy can be imported."""
+    try:
+        LazyImporter.get_cv2()
+        LazyImporter.get_numpy()
+        return True
+    except ImportError:
+        return False
+
+
+def to_grayscale_array(image: Any) -> Any:
+    """Convert a PIL image or NumPy array to a 2-D uint8 grayscale array."""
+    np = LazyImporter.get_numpy()
+    cv2 = LazyImporter.get_cv2()
+
+    if not isinstance(image, np.ndarray):
+        if getattr(image, "mode", "L") != "L":
+            image = image.convert("L")
+        return np.asarray(image, dtype=np.uint8)
+
+    if image.ndim == 2:
+        return image.astype(np.uint8, copy=False)
+    channels = image.shape[2]
+    if channels == 1:
+        return image[:, :, 0]
+    code = cv2.COLOR_RGBA2GRAY if channels == 4 else cv2.COLOR_RGB2GRAY
+    return cv2.cvtColor(image, code)
+
+
+def find_border_box(ink: Any) -> Tuple[int, int, int, int]:
+    """Return ``(x0, y0, x1, y1)`` inside any dark scanner/phone border.
+
+    ``ink`` is a boolean mask.  Edge rows and columns that are mostly ink are
+    stripped, plus a few pixels for the ragged inner edge of the border.
+    Bands wider than ``BORDER_MAX_RATIO`` are left alone: on an unevenly lit
+    page a global threshold can paint a whole shaded side as ink.
+    """
+    np = LazyImporter.get_numpy()
+
+    def strip(dense: Any) -> Tuple[int, int]:
+        size = dense.size
+        clear = np.flatnonzero(~dense)
+        if clear.size == 0:
+            return 0, size
+        start, end = int(clear[0]), int(clear[-1]) + 1
+        limit = int(size * BORDER_MAX_RATIO)
+        start = start + BORDER_BLEED if 0 < start <= limit else 0
+        end = end - BORDER_BLEED if 0 < size - end <= limit else size
+        return start, max(start, end)
+
+    y0, y1 = strip(ink.mean(axis=1) > BORDER_INK_RATIO)
+    x0, x1 = strip(ink.mean(axis=0) > BORDER_INK_RATIO)
+    return x0, y0, x1, y1
+
+
+def find_content_box(ink: Any) -> Tuple[int, int, int, int]:
+    """Return ``(x0, y0, x1, y1)`` of the text on a page plus a small margin.
+
+    ``ink`` is a boolean mask.  Ink is smeared horizontally so letters merge
+    into word blobs, and only blobs of at least ``CONTENT_MIN_BLOB_AREA``
+    pixels count, which keeps stray marks out of the box.  The full image is
+    returned for blank pages.
+    """
+    np = LazyImporter.get_numpy()
+    cv2 = LazyImporter.get_cv2()
+
+    height, width = ink.shape
+    smeared = cv2.dilate(ink.astype(np.uint8), np.ones(CONTENT_SMEAR[::-1], np.uint8))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(smeared, connectivity=8)
+    blobs = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= CONTENT_MIN_BLOB_AREA]
+    if blobs.size == 0:
+        return 0, 0, width, height
+
+    left, top = blobs[:, cv2.CC_STAT_LEFT], blobs[:, cv2.CC_STAT_TOP]
+    right = left + blobs[:, cv2.CC_STAT_WIDTH]
+    bottom = top + blobs[:, cv2.CC_STAT_HEIGHT]
+    # The smear grew each blob by half the kernel on every side
+    pad_x, pad_y = CONTENT_SMEAR[0] // 2, CONTENT_SMEAR[1] // 2
+    return (
+        max(0, int(left.min()) + pad_x - CROP_MARGIN),
+        max(0, int(top.min()) + pad_y - CROP_MARGIN),
+        min(width, int(right.max()) - pad_x + CROP_MARGIN),
+        min(height, int(bottom.max()) - pad_y + CROP_MARGIN),
+    )
+
+
+def despeckle(binary: Any) -> Any:
+    """Whiten ink components of at most ``DESPECKLE_MAX_AREA`` pixels."""
+    np = LazyImporter.get_numpy()
+    cv2 = LazyImporter.get_cv2()
+
+    count, labels, stats, _ = cv2.connectedComponentsWithStats((binary < 128).astype(np.uint8), connectivity=8)
+    speckle = stats[:, cv2.CC_STAT_AREA] <= DESPECKLE_MAX_AREA
+    speckle[0] = False  # background label
+    cleaned = binary.copy()
+    cleaned[speckle[labels]] = 255
+    return cleaned
+
+
+def estimate_skew_angle(gray: Any) -> float:
+    """Estimate the rotation (degrees) that straightens the text lines.
+
+    Uses a projection-profile search on a downscaled copy: the angle whose
+    row sums have the highest variance is the one where text lines are
+    horizontal.  Ink comes from adaptive thresholding, so uneven lighting
+    does not swamp the profile, and any dark border is masked out first.
+    A coarse pass is refined around its best hit.
+    """
+    np = LazyImporter.get_numpy()
+    cv2 = LazyImporter.get_cv2()
+
+    height, width = gray.shape
+    scale = min(1.0, DESKEW_SEARCH_WIDTH / float(width))
+    small = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                       interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    x0, y0, x1, y1 = find_border_box(
+        cv2.threshold(small, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1] < 128
+    )
+    block = max(3, int(BINARIZE_BLOCK_SIZE * scale) | 1)
+    ink = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                cv2.THRESH_BINARY_INV, block, BINARIZE_OFFSET)
+    masked = np.zeros_like(ink)
+    masked[y0:y1, x0:x1] = ink[y0:y1, x0:x1]
+    if not masked.any():
+        return 0.0
+
+    h, w = masked.shape
+    center = (w / 2.0, h / 2.0)
+
+    def score(angle: float) -> float:
+        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(masked, matrix, (w, h), flags=cv2.INTER_NEAREST, borderValue=0)
+        return float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+
+    def search(lo: float, hi: float, step: float) -> float:
+        angles = np.arange(lo, hi + step / 2.0, step)
+        return float(angles[int(np.argmax([score(a) for a in angles]))])
+
+    coarse = search(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE, DESKEW_COARSE_STEP)
+    return search(coarse - DESKEW_COARSE_STEP, coarse + DESKEW_COARSE_STEP, DESKEW_FINE_STEP)
+
+
+def preprocess_for_ocr(
+    image: Any,
+    denoise: bool = True,
+    deskew: bool = True,
+    binarize: bool = True,
+    crop: bool = True,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Clean up a page image for Tesseract.
+
+    Args:
+        image: PIL image or NumPy array (grayscale, RGB or RGBA)
+        denoise: Median-filter the input and drop speckle after thresholding
+        deskew: Rotate so text lines are horizontal
+        binarize: Apply Gaussian adaptive thresholding
+        crop: Strip dark borders and crop to the content box
+
+    Returns:
+        Tuple of (processed grayscale array, transform dict).  The transform
+        records the border offset, rotation matrix and content-crop offset
+        for ``map_boxes_to_source``.
+    """
+    np = LazyImporter.get_numpy()
+    cv2 = LazyImporter.get_cv2()
+
+    gray = to_grayscale_array(image)
+    height, width = gray.shape
+    transform: Dict[str, Any] = {
+        "border_offset": (0, 0), "angle": 0.0, "matrix": None, "offset": (0, 0), "size": (width, height),
+    }
+
+    if denoise:
+        gray = cv2.medianBlur(gray, 3)
+
+    # Global threshold for the border: adaptive thresholding hollows out
+    # solid regions, which would hide them from the edge-density check.
+    if crop:
+        ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1] < 128
+        x0, y0, x1, y1 = find_border_box(ink)
+        if x1 > x0 and y1 > y0:
+            # Strip the border before rotating, or its tilted edges survive as wedges
+            gray = gray[y0:y1, x0:x1]
+            transform["border_offset"] = (x0, y0)
+
+    if deskew:
+        angle = estimate_skew_angle(gray)
+        if abs(angle) >= DESKEW_MIN_ANGLE:
+            h, w = gray.shape
+            matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+            gray = cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_LINEAR,
+                                  borderMode=cv2.BORDER_REPLICATE)
+            transform["angle"] = angle
+            transform["matrix"] = matrix
+
+    # Adaptive thresholding copes with uneven lighting and low contrast
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                   cv2.THRESH_BINARY, BINARIZE_BLOCK_SIZE, BINARIZE_OFFSET)
+    if denoise:
+        binary = despeckle(binary)
+
+    if crop:
+        ink = binary < 128
+        if transform["matrix"] is not None:
+            # Corners filled in by the rotation replicate edge noise into
+            # streaks; only pixels that came from the page count as content.
+            h, w = gray.shape
+            valid = cv2.warpAffine(np.ones((h, w), np.uint8), transform["matrix"], (w, h),
+                                   flags=cv2.INTER_NEAREST, borderValue=0)
+            ink &= cv2.erode(valid, np.ones((5, 5), np.uint8)).astype(bool)
+        x0, y0, x1, y1 = find_content_box(ink)
+        gray, binary = gray[y0:y1, x0:x1], binary[y0:y1, x0:x1]
+        transform["offset"] = (x0, y0)
+
+    if binarize:
+        gray = binary
+
+    logger.debug(f"Preprocessed page {width}x{height} -> {gray.shape[1]}x{gray.shape[0]}, "
+                 f"skew {transform['angle']:.2f} deg")
+    return gray, transform
+
+
+def map_boxes_to_source(words: List[List[Any]], transform: Dict[str, Any]) -> List[List[Any]]:
+    """Map ``[x0, y0, x1, y1, word]`` boxes from the processed image back to the source.
+
+    The content-crop offset is added back, each box centre is rotated by
+    the inverse deskew matrix, then the border offset is added.  Box size is
+    kept as-is, a close approximation within the few degrees the deskew
+    search allows.
+    """
+    if not words:
+        return words
+    off_x, off_y = transform.get("offset", (0, 0))
+    border_x, border_y = transform.get("border_offset", (0, 0))
+    matrix = transform.get("matrix")
+    inverse = LazyImporter.get_cv2().invertAffineTransform(matrix) if matrix is not None else None
+
+    mapped = []
+    for x0, y0, x1, y1, word in words:
+        x0, x1, y0, y1 = x0 + off_x, x1 + off_x, y0 + off_y, y1 + off_y
+        if inverse is not None:
+            cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+            sx = inverse[0][0] * cx + inverse[0][1] * cy + inverse[0][2]
+            sy = inverse[1][0] * cx + inverse[1][1] * cy + inverse[1][2]
+            dx, dy = sx - cx, sy - cy
+            x0, x1, y0, y1 = x0 + dx, x1 + dx, y0 + dy, y1 + dy
+        x0, x1, y0, y1 = x0 + border_x, x1 + border_x, y0 + border_y, y1 + border_y
+        mapped.append([int(round(x0)), int(round(y0)), int(round(x1)), int(round(y1)), word])
+    return mapped
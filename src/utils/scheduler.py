@@ -5,6 +5,7 @@ import time
 from datetime import datetime, timedelta
 from typing import Callable, Dict, Any
 from flask import Flask
+from src.config import Config
 from src.services import ServiceRegistry
 
 
@@ -18,21 +19,27 @@ class TaskScheduler:
         self.tasks = {}
         self.running = False
         self.thread = None
+        self.app = None
         self.file_service = file_service if file_service else ServiceRegistry.get_file_management_service()
 
     def init_app(self, app: Flask, file_service: None = None):
         """Initialize the scheduler with the Flask app context"""
 
+        self.app = app
         self.file_service = ServiceRegistry.get_file_management_service()
-        # Add cleanup tasks
-        self.add_task('cleanup_expired_jobs', self.file_service.cleanup_expired_jobs, interval_hours=6)  # Every 6 hours
-        self.add_task('cleanup_temp_files', self.file_service.cleanup_temp_files, interval_hours=1)  # Every hour
-        self.add_task('cleanup_old_files', self.file_service.cleanup_old_files, interval_hours=12)  # Every 12 hours
+        # Expired jobs, temp files and old files are handled by one incremental,
+        # time-boxed pass that runs often rather than three long sweeps
+        self.add_task('cleanup', self.file_service.run_cleanup,
+                      interval_hours=Config.CLEANUP_INTERVAL_MINUTES / 60)
+        self.add_task('reconcile_file_index', self.file_service.reconcile_file_index, interval_hours=24)  # Daily
+        # Resolved lazily so the OCR service (and Tesseract probing) is only built when the task runs
+        self.add_task('cleanup_ocr_checkpoints',
+                      lambda: ServiceRegistry.get_ocr_service().cleanup_checkpoints(), interval_hours=6)
         logger.info("Task scheduler initialized with Flask app context")
         app.scheduler = self
 
 
-    def add_task(self, name: str, func: Callable, interval_hours: int):
+    def add_task(self, name: str, func: Callable, interval_hours: float):
         """Add a periodic task to the scheduler"""
         self.tasks[name] = {
             'function': func,
@@ -70,14 +77,14 @@ class TaskScheduler:
                     if current_time >= task_info['next_run']:
                         try:
                             logger.info(f"Running scheduled task: {task_name}")
-                            result = task_info['function']()
+                            result = self._call_task(task_info['function'])
                             
                             # Update task timing
                             task_info['last_run'] = current_time
                             task_info['next_run'] = current_time + timedelta(hours=task_info['interval_hours'])
                             
                             logger.info(f"Completed scheduled task: {task_name}")
-                            if isinstance(result, dict) and 'jobs_cleaned' in result:
+                            if isinstance(result, dict) and ('jobs_cleaned' in result or 'files_deleted' in result):
                                 logger.info(f"Task {task_name} result: {result}")
                             
                         except Exception as e:
@@ -92,6 +99,13 @@ class TaskScheduler:
                 logger.error(f"Error in scheduler loop: {str(e)}")
                 time.sleep(60)  # Continue after error
     
+    def _call_task(self, func: Callable):
+        """Run a task inside the app context so it can use the database"""
+        if self.app is None:
+            return func()
+        with self.app.app_context():
+            return func()
+    
     def get_task_status(self) -> Dict[str, Any]:
         """Get status of all scheduled tasks"""
         status = {
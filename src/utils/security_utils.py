@@ -22,12 +22,21 @@ THREAT_TRACKING = {
 ALLOWED_EXTENSIONS = {
     'compression': {'pdf'},
     'conversion': {'pdf'},
-    'ocr': {'pdf', 'png', 'jpg', 'jpeg', 'tiff', 'bmp'},
+    'ocr': {'pdf', 'png', 'jpg', 'jpeg', 'tiff', 'tif', 'bmp', 'zip'},
     'ai': {'pdf'},
     'extraction': {'pdf'},
     'default': {'pdf'}
 }
 
+# Content types accepted per feature (sniffed from the bytes, not the name)
+ALLOWED_MIME_TYPES = {
+    'ocr': {
+        'application/pdf', 'image/png', 'image/jpeg', 'image/tiff',
+        'image/bmp', 'image/x-ms-bmp', 'application/zip',
+    },
+    'default': {'application/pdf'}
+}
+
 MAX_FILE_SIZES = {
     'compression': 100 * 1024 * 1024,  # 100MB
     'conversion': 100 * 1024 * 1024,   # 100MB
@@ -106,7 +115,10 @@ def validate_file(file, feature_type: str = 'default') -> Optional[str]:
         file.seek(0)  # Reset file pointer
         
         # Perform comprehensive content validation
-        validation_result = validate_file_content(file_data, file.filename)
+        validation_result = validate_file_content(
+            file_data, file.filename,
+            ALLOWED_MIME_TYPES.get(feature_type, ALLOWED_MIME_TYPES['default'])
+        )
         
         if not validation_result['valid']:
             logger.warning(f"File validation failed: {validation_result['errors']}")
@@ -1,6 +1,6 @@
 """Request validation utilities"""
 from flask import Request
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Set, Union
 import logging
 import re
 import os
@@ -276,13 +276,27 @@ def validate_field_types(data: Dict[str, Any], required_fields: List[str], optio
     return errors
 
 
-def validate_file_content(file_data: bytes, filename: str) -> Dict[str, Any]:
+# Leading bytes used to identify files when python-magic is unavailable
+FILE_SIGNATURES = {
+    b'%PDF-': 'application/pdf',
+    b'\x89PNG\r\n\x1a\n': 'image/png',
+    b'\xff\xd8\xff': 'image/jpeg',
+    b'II*\x00': 'image/tiff',
+    b'MM\x00*': 'image/tiff',
+    b'BM': 'image/bmp',
+    b'PK\x03\x04': 'application/zip',
+}
+
+
+def validate_file_content(file_data: bytes, filename: str,
+                          allowed_mime_types: Optional[Set[str]] = None) -> Dict[str, Any]:
     """
     Comprehensive file content validation and security scanning
     
     Args:
         file_data: File content as bytes
         filename: Original filename
+        allowed_mime_types: Accepted MIME types (defaults to PDF only)
         
     Returns:
         Dict with validation results
@@ -307,24 +321,34 @@ def validate_file_content(file_data: bytes, filename: str) -> Dict[str, Any]:
             result['errors'].append('File too large (maximum 100MB)')
             return result
         
+        allowed = allowed_mime_types or {'application/pdf'}
+        if allowed == {'application/pdf'}:
+            allowed_label = 'Only PDF files are allowed.'
+        else:
+            allowed_label = f"Allowed types: {', '.join(sorted(allowed))}."
+
         # Detect actual file type using magic numbers
         try:
             import magic
             file_type = magic.from_buffer(file_data, mime=True)
             result['file_type'] = file_type
             
-            # Validate PDF files
-            if file_type != 'application/pdf':
+            if file_type not in allowed:
                 result['valid'] = False
-                result['errors'].append(f'Invalid file type: {file_type}. Only PDF files are allowed.')
+                result['errors'].append(f'Invalid file type: {file_type}. {allowed_label}')
                 return result
                 
         except ImportError:
             # Fallback to basic header check if python-magic is not available
             logger.warning("python-magic not available, using basic file validation")
-            if not file_data.startswith(b'%PDF-'):
+            file_type = next((mime for sig, mime in FILE_SIGNATURES.items() if file_data.startswith(sig)), None)
+            result['file_type'] = file_type
+            if file_type not in allowed:
                 result['valid'] = False
-                result['errors'].append('File does not appear to be a valid PDF')
+                if allowed == {'application/pdf'}:
+                    result['errors'].append('File does not appear to be a valid PDF')
+                else:
+                    result['errors'].append(f'Unrecognised file content. {allowed_label}')
                 return result
         
         # Check for malicious content patterns
@@ -344,6 +368,9 @@ def validate_file_content(file_data: bytes, filename: str) -> Dict[str, Any]:
             if pattern in file_data_lower:
                 result['warnings'].append(f'Potentially suspicious content detected: {pattern.decode("utf-8", errors="ignore")}')
         
+        if file_type != 'application/pdf':
+            return result
+
         # PDF-specific security checks
         pdf_security_issues = check_pdf_security(file_data)
         if pdf_security_issues:
@@ -0,0 +1,103 @@
+"""ZIP archive helpers: per-entry compression and streaming archives"""
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+# Formats that are already compressed; deflating them again costs CPU for
+# a fraction of a percent. Office formats are ZIP containers themselves.
+STORED_EXTENSIONS = frozenset({
+    '.pdf', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.tif', '.tiff',
+    '.zip', '.gz', '.bz2', '.xz', '.7z',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods',
+})
+
+DEFLATE_LEVEL = 6
+
+
+class ZipEntry(NamedTuple):
+    """One member of a streamed archive"""
+    arcname: str
+    chunks: Iterable[bytes]
+    size: Optional[int] = None
+    modified: Optional[float] = None
+
+
+def zip_compression_for(filename: str) -> Tuple[int, Optional[int]]:
+    """Pick the compression method and level for an archive member
+
+    Args:
+        filename: Member name (only the extension matters)
+
+    Returns:
+        (compress_type, compresslevel) for ZipFile.write / ZipInfo
+    """
+    if os.path.splitext(filename)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, DEFLATE_LEVEL
+
+
+def unique_arcname(name: str, used: Set[str]) -> str:
+    """Return ``name`` or ``name (n)`` so that no two members share a name"""
+    candidate = name
+    stem, ext = os.path.splitext(name)
+    counter = 1
+    while candidate in used:
+        candidate = f"{stem} ({counter}){ext}"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object that collects bytes for a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_stream(entries: Iterable[ZipEntry]) -> Iterator[bytes]:
+    """Build a ZIP archive on the fly, yielding it as it is produced
+
+    Nothing touches the disk and memory use stays around one chunk per
+    member: ZipFile writes data descriptors when its output can't seek.
+
+    Args:
+        entries: Members to add, in order
+
+    Yields:
+        Consecutive pieces of the archive
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w') as zf:
+        for entry in entries:
+            # zlib's default level matches DEFLATE_LEVEL
+            info = zipfile.ZipInfo(entry.arcname, time.localtime(entry.modified or time.time())[:6])
+            info.compress_type = zip_compression_for(entry.arcname)[0]
+            if entry.size is not None:
+                info.file_size = entry.size
+            with zf.open(info, 'w', force_zip64=entry.size is None) as member:
+                for chunk in entry.chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
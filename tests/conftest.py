@@ -22,7 +22,9 @@ def app():
     # Create test configuration
     test_config = {
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        # TEST_DATABASE_URL runs the suite against another database, e.g. the
+        # PostgreSQL container in docker-compose.dev.yml
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:'),
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'CELERY_BROKER_URL': 'memory://',
         'CELERY_RESULT_BACKEND': 'cache+memory://',
@@ -0,0 +1,179 @@
+"""Tests for the disk budget manager: usage tracking, admission and early eviction"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+from src.models import Job
+from src.models.stored_file import StoredFile
+from src.services.disk_budget_manager import DiskBudgetManager, MB, parse_tier_budgets
+from src.services.file_management_service import FileManagementService
+from src.utils.error_handlers import register_error_handlers
+from src.utils.exceptions import StorageCapacityError
+
+PLENTY_FREE = 100 * 1024 * MB
+
+
+class TestParseTierBudgets:
+    """Test cases for parse_tier_budgets"""
+
+    def test_parses_megabytes(self):
+        assert parse_tier_budgets('results=4096, temp=0.5') == {'results': 4096 * MB, 'temp': MB // 2}
+
+    def test_empty_spec(self):
+        assert parse_tier_budgets('') == {}
+        assert parse_tier_budgets(None) == {}
+
+
+class TestBudgetChecks:
+    """Limit checks against stubbed usage figures"""
+
+    @pytest.fixture
+    def service(self):
+        temp_dir = tempfile.mkdtemp()
+        yield FileManagementService(upload_folder=temp_dir, content_addressed=False)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _manager(self, service, usage, free=PLENTY_FREE, **kwargs):
+        kwargs.setdefault('total_budget_bytes', 0)
+        kwargs.setdefault('tier_budgets', {})
+        kwargs.setdefault('min_free_bytes', 0)
+        manager = DiskBudgetManager(service, retry_after_seconds=30, **kwargs)
+        manager.usage = lambda refresh=False: usage
+        manager.free_bytes = lambda: free
+        return manager
+
+    def test_within_limits(self, service):
+        manager = self._manager(service, {'results': 10 * MB}, total_budget_bytes=100 * MB)
+
+        assert manager.check(10 * MB)['ok'] is True
+
+    def test_total_budget(self, service):
+        manager = self._manager(service, {'inputs': 50 * MB, 'results': 40 * MB}, total_budget_bytes=100 * MB)
+
+        status = manager.check(20 * MB)
+
+        assert status['ok'] is False
+        assert status['reason'] == 'total_budget'
+        assert status['shortfall_bytes'] == 10 * MB
+
+    def test_tier_budget_only_applies_to_its_tier(self, service):
+        manager = self._manager(service, {'temp': 9 * MB}, tier_budgets={'temp': 10 * MB})
+
+        assert manager.check(2 * MB, tier='temp')['reason'] == 'temp_budget'
+        assert manager.check(2 * MB, tier='inputs')['ok'] is True
+
+    def test_min_free_space(self, service):
+        manager = self._manager(service, {}, free=5 * MB, min_free_bytes=4 * MB)
+
+        status = manager.check(2 * MB)
+
+        assert status['reason'] == 'min_free_space'
+        assert status['shortfall_bytes'] == MB
+
+    def test_admit_raises_503_with_retry_after(self, service):
+        manager = self._manager(service, {'inputs': 95 * MB}, total_budget_bytes=100 * MB)
+
+        with patch.object(manager, 'evict', return_value={'jobs_evicted': 0, 'space_freed_mb': 0.0}) as evict:
+            with pytest.raises(StorageCapacityError) as exc_info:
+                manager.admit(10 * MB)
+
+        # Room is needed for the upload, a working copy and the result
+        evict.assert_called_once_with(95 * MB + 30 * MB - 100 * MB)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.details['retry_after'] == 30
+        assert exc_info.value.details['reason'] == 'total_budget'
+
+    def test_admit_does_not_evict_for_other_tier_budget(self, service):
+        manager = self._manager(service, {'inputs': 10 * MB}, tier_budgets={'inputs': 10 * MB})
+
+        with patch.object(manager, 'evict') as evict:
+            with pytest.raises(StorageCapacityError):
+                manager.admit(MB)
+
+        evict.assert_not_called()
+
+    def test_error_handler_sets_retry_after_header(self):
+        app = Flask(__name__)
+        register_error_handlers(app)
+
+        @app.route('/upload', methods=['POST'])
+        def upload():
+            raise StorageCapacityError(reason='total_budget', retry_after=45)
+
+        response = app.test_client().post('/upload')
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '45'
+        assert response.get_json()['error']['code'] == 'STORAGE_CAPACITY_EXCEEDED'
+
+
+class TestEviction:
+    """Early eviction against the test database"""
+
+    @pytest.fixture
+    def service(self, app, db):
+        temp_dir = tempfile.mkdtemp()
+        yield FileManagementService(upload_folder=temp_dir, content_addressed=False)
+        db.session.rollback()
+        StoredFile.query.delete()
+        Job.query.delete()
+        db.session.commit()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _job(self, db, service, job_id, status, age_hours, size=MB):
+        job = Job(task_type='compress', job_id=job_id)
+        job.status = status
+        job.created_at = job.updated_at = datetime.utcnow() - timedelta(hours=age_hours)
+        db.session.add(job)
+        db.session.commit()
+        service.save_file(b'x' * size, 'result.pdf', kind='results', job_id=job_id)
+        return job
+
+    def test_bytes_by_tier_from_index(self, service, db):
+        service.save_file(b'a' * 100, 'in.pdf', kind='inputs')
+        service.save_file(b'b' * 250, 'out.pdf', kind='results')
+
+        usage = service.bytes_by_tier()
+
+        assert usage['inputs'] == 100
+        assert usage['results'] == 250
+        assert usage['temp'] == 0
+
+    def test_evicts_soonest_to_expire_first(self, service, db):
+        # failed and completed share a 24h retention, so age decides
+        self._job(db, service, 'completed-young', 'completed', 1)
+        self._job(db, service, 'failed-old', 'failed', 20)
+        self._job(db, service, 'completed-mid', 'completed', 10)
+        self._job(db, service, 'running', 'processing', 30)
+
+        summary = DiskBudgetManager(service, eviction_batch=10).evict(2 * MB)
+
+        assert summary['jobs_evicted'] == 2
+        remaining = {job.job_id for job in Job.query.all()}
+        assert remaining == {'completed-young', 'running'}
+        assert service.bytes_by_tier()['results'] == 2 * MB
+
+    def test_eviction_batch_caps_removals(self, service, db):
+        for i in range(3):
+            self._job(db, service, f'done-{i}', 'completed', 5 + i)
+
+        summary = DiskBudgetManager(service, eviction_batch=1).evict(100 * MB)
+
+        assert summary['jobs_evicted'] == 1
+        assert Job.query.filter_by(job_id='done-2').first() is None
+
+    def test_cleanup_relieves_pressure(self, service, db):
+        self._job(db, service, 'done-old', 'completed', 5)
+        self._job(db, service, 'done-new', 'completed', 1)
+        service.disk_budget = DiskBudgetManager(service, total_budget_bytes=int(1.5 * MB), min_free_bytes=0)
+
+        summary = service.run_cleanup()
+
+        assert summary['jobs_evicted'] == 1
+        assert [job.job_id for job in Job.query.all()] == ['done-new']
@@ -4,15 +4,22 @@ Tests the combined file management service that integrates file storage,
 cleanup operations, and download functionality.
 """
 
+import hashlib
+import itertools
+import io
 import os
 import tempfile
 import shutil
+import zipfile
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
 import pytest
 from flask import Flask
 
 from src.services.file_management_service import FileManagementService
+from src.models.file_blob import FileBlob
+from src.models.stored_file import StoredFile
+from src.models.cleanup_cursor import CleanupCursor
 from src.models.job import Job, JobStatus, TaskType
 from src.utils.response_helpers import error_response
 
@@ -114,6 +121,41 @@ class TestFileManagementService:
             with pytest.raises(IOError):
                 file_service.save_file(b"test data", "test.pdf")
     
+    def test_save_stream_sources(self, file_service, sample_file_data):
+        """Test saving from a file-like object and from a chunk iterator"""
+        _, from_file = file_service.save_stream(io.BytesIO(sample_file_data), "a.pdf")
+        _, from_chunks = file_service.save_stream(iter([sample_file_data[:5], sample_file_data[5:]]), "b.pdf")
+        
+        for path in (from_file, from_chunks):
+            with open(path, 'rb') as f:
+                assert f.read() == sample_file_data
+    
+    def test_save_stream_failure_leaves_nothing(self, file_service):
+        """Test that a failing source leaves neither a partial nor a temp file"""
+        def chunks():
+            yield b"partial"
+            raise IOError("client went away")
+        
+        with pytest.raises(IOError):
+            file_service.save_stream(chunks(), "upload.pdf")
+        
+        assert list(file_service.iter_stored_files()) == []
+    
+    def test_open_output_is_atomic(self, file_service):
+        """Test that output written through open_output appears only on success"""
+        path = file_service.create_output_path("report.txt")
+        
+        with pytest.raises(ValueError):
+            with file_service.open_output(path, 'w', encoding='utf-8') as f:
+                f.write("half")
+                raise ValueError("render failed")
+        assert not os.path.exists(path)
+        
+        with file_service.open_output(path, 'w', encoding='utf-8') as f:
+            f.write("done")
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == "done"
+    
     # ========================= FILE RETRIEVAL TESTS =========================
     
     def test_get_file_path(self, file_service):
@@ -121,16 +163,60 @@ class TestFileManagementService:
         file_id = "test-uuid-123"
         file_path = file_service.get_file_path(file_id)
         
-        expected_path = os.path.join(file_service.upload_folder, f"{file_id}.pdf")
-        assert file_path == expected_path
+        assert file_path == file_service.shard_path(f"{file_id}.pdf", 'inputs', create=False)
+        assert os.path.basename(file_path) == f"{file_id}.pdf"
     
     def test_get_file_path_custom_extension(self, file_service):
         """Test getting file path with custom extension"""
         file_id = "test-uuid-123"
         file_path = file_service.get_file_path(file_id, ".docx")
         
-        expected_path = os.path.join(file_service.upload_folder, f"{file_id}.docx")
-        assert file_path == expected_path
+        assert file_path == file_service.shard_path(f"{file_id}.docx", 'inputs', create=False)
+    
+    def test_get_file_path_matches_saved_file(self, file_service, sample_file_data):
+        """Test that get_file_path locates a file saved to the same tree"""
+        file_id, file_path = file_service.save_file(sample_file_data, "scan.png", kind='temp')
+        
+        assert file_service.get_file_path(file_id, ".png", kind='temp') == file_path
+    
+    # ========================= STORAGE LAYOUT TESTS =========================
+    
+    def test_shard_path_layout(self, file_service):
+        """Test that files are placed under <kind>/<aa>/<bb>/"""
+        path = file_service.shard_path("result.pdf", 'results')
+        
+        relative = os.path.relpath(path, file_service.upload_folder).split(os.sep)
+        assert relative[0] == 'results'
+        assert [len(part) for part in relative[1:3]] == [2, 2]
+        assert relative[3] == "result.pdf"
+        assert os.path.isdir(os.path.dirname(path))
+        # Deterministic
+        assert file_service.shard_path("result.pdf", 'results') == path
+    
+    def test_shard_path_rejects_unknown_kind(self, file_service):
+        """Test that an unknown storage tree is rejected"""
+        with pytest.raises(ValueError):
+            file_service.shard_path("x.pdf", 'elsewhere')
+    
+    def test_save_file_kinds(self, file_service, sample_file_data):
+        """Test that save_file writes into the requested tree"""
+        _, input_path = file_service.save_file(sample_file_data, "in.pdf")
+        _, temp_path = file_service.save_file(sample_file_data, "tmp.pdf", kind='temp')
+        
+        assert os.path.relpath(input_path, file_service.upload_folder).startswith('inputs')
+        assert os.path.relpath(temp_path, file_service.upload_folder).startswith('temp')
+    
+    def test_iter_stored_files_includes_legacy(self, file_service, sample_file_data, temp_upload_folder):
+        """Test that scanning covers sharded trees and flat legacy files"""
+        _, sharded = file_service.save_file(sample_file_data, "a.pdf")
+        legacy = os.path.join(temp_upload_folder, "legacy.pdf")
+        with open(legacy, 'wb') as f:
+            f.write(sample_file_data)
+        
+        found = {path: stat.st_size for path, stat in file_service.iter_stored_files()}
+        
+        assert found == {sharded: len(sample_file_data), legacy: len(sample_file_data)}
+        assert [p for p, _ in file_service.iter_stored_files(include_legacy=False)] == [sharded]
     
     def test_file_exists_true(self, file_service, sample_file_data):
         """Test file_exists returns True for existing file"""
@@ -248,24 +334,6 @@ class TestFileManagementService:
                 assert 'space_freed_mb' in result
                 assert 'errors' in result
     
-    @patch('src.services.file_management_service.Job')
-    @patch('src.services.file_management_service.db')
-    def test_cleanup_expired_jobs_success(self, mock_db, mock_job_query, file_service):
-        """Test successful cleanup of expired jobs"""
-        # Create mock expired jobs
-        expired_job = Mock(spec=Job)
-        expired_job.job_id = "expired-job-123"
-        
-        # Mock the _get_expired_jobs method
-        with patch.object(file_service, '_get_expired_jobs', return_value=[expired_job]):
-            with patch.object(file_service, '_cleanup_job_files', return_value=5.0):
-                result = file_service.cleanup_expired_jobs()
-                
-                assert result['jobs_cleaned'] == 1
-                assert result['total_space_freed_mb'] == 5.0
-                mock_db.session.delete.assert_called_once_with(expired_job)
-                mock_db.session.commit.assert_called_once()
-    
     def test_cleanup_temp_files(self, file_service, temp_upload_folder):
         """Test cleanup of temporary files"""
         # Create old temp file
@@ -291,6 +359,37 @@ class TestFileManagementService:
         assert result['files_deleted'] == 1
         assert result['space_freed_mb'] > 0
     
+    @patch.object(FileManagementService, '_index_available', return_value=False)
+    def test_cleanup_temp_files_sharded(self, _, file_service, sample_file_data):
+        """Test that temp cleanup without the file index walks the temp tree"""
+        _, temp_path = file_service.save_file(sample_file_data, "t.pdf", kind='temp')
+        _, input_path = file_service.save_file(sample_file_data, "i.pdf")
+        old = (datetime.utcnow() - timedelta(hours=2)).timestamp()
+        for path in (temp_path, input_path):
+            os.utime(path, (old, old))
+        
+        result = file_service.cleanup_temp_files()
+        
+        assert result['files_deleted'] == 1
+        assert not os.path.exists(temp_path)
+        assert os.path.exists(input_path)
+    
+    @patch.object(FileManagementService, '_index_available', return_value=False)
+    def test_cleanup_old_files_sharded(self, _, file_service, sample_file_data):
+        """Test that old-file cleanup without the file index covers every storage tree"""
+        paths = [file_service.save_file(sample_file_data, "x.pdf", kind=kind)[1]
+                 for kind in FileManagementService.STORAGE_KINDS]
+        _, fresh = file_service.save_file(sample_file_data, "fresh.pdf", kind='results')
+        old = (datetime.utcnow() - timedelta(hours=48)).timestamp()
+        for path in paths:
+            os.utime(path, (old, old))
+        
+        result = file_service.cleanup_old_files(max_age_hours=24)
+        
+        assert result['files_deleted'] == 3
+        assert not any(os.path.exists(path) for path in paths)
+        assert os.path.exists(fresh)
+    
     @patch('src.services.file_management_service.Job')
     @patch('src.services.file_management_service.db')
     def test_get_cleanup_statistics(self, mock_db, mock_job_query, file_service):
@@ -306,7 +405,7 @@ class TestFileManagementService:
         ]
         
         # Mock expired jobs
-        with patch.object(file_service, '_get_expired_jobs', return_value=[]):
+        with patch.object(file_service, '_count_expired_jobs', return_value=0):
             result = file_service.get_cleanup_statistics()
             
             assert result['total_jobs'] == 100
@@ -316,17 +415,6 @@ class TestFileManagementService:
     
     # ========================= HELPER METHOD TESTS =========================
     
-    @patch('src.services.file_management_service.Job')
-    def test_get_expired_jobs(self, mock_job_query, file_service):
-        """Test getting expired jobs"""
-        # Mock query results
-        mock_job_query.query.filter.return_value.filter.return_value.all.return_value = [Mock(), Mock()]
-        
-        expired_jobs = file_service._get_expired_jobs()
-        
-        # Should return jobs (exact count depends on mock setup)
-        assert isinstance(expired_jobs, list)
-    
     def test_cleanup_job_files(self, file_service, temp_upload_folder):
         """Test cleanup of job files"""
         # Create test files
@@ -355,6 +443,65 @@ class TestFileManagementService:
         assert not os.path.exists(test_file2)
         assert space_freed > 0
     
+    # ========================= STORAGE MIGRATION TESTS =========================
+    
+    def _legacy_file(self, folder, name):
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as f:
+            f.write(b"legacy")
+        return path
+    
+    @patch('src.services.file_management_service.db')
+    @patch('src.services.file_management_service.Job')
+    def test_migrate_to_sharded_layout(self, mock_job_cls, mock_db, file_service, temp_upload_folder):
+        """Test that flat files are moved and job references rewritten"""
+        result_file = self._legacy_file(temp_upload_folder, "compressed_doc.pdf")
+        input_file = self._legacy_file(temp_upload_folder, "1b4e28ba-2fa1-11d2-883f-0016d3cca427.pdf")
+        stray_file = self._legacy_file(temp_upload_folder, "notes.txt")
+        
+        job = Mock()
+        job.job_id = "job-1"
+        job.result = {"output_path": result_file, "mime_type": "application/pdf"}
+        job.input_data = {"input_path": input_file}
+        mock_job_cls.query.all.return_value = [job]
+        
+        summary = file_service.migrate_to_sharded_layout()
+        
+        assert summary['files_moved'] == 3
+        assert summary['jobs_updated'] == 1
+        assert summary['errors'] == []
+        assert job.result == {"output_path": file_service.shard_path("compressed_doc.pdf", 'results'),
+                              "mime_type": "application/pdf"}
+        assert job.input_data["input_path"] == file_service.shard_path(os.path.basename(input_file), 'inputs')
+        assert os.path.exists(job.result["output_path"])
+        assert os.path.exists(file_service.shard_path("notes.txt", 'results'))
+        assert not any(os.path.exists(p) for p in (result_file, input_file, stray_file))
+        mock_db.session.commit.assert_called_once()
+        
+        # Re-running is a no-op
+        assert file_service.migrate_to_sharded_layout()['files_moved'] == 0
+    
+    @patch('src.services.file_management_service.db')
+    @patch('src.services.file_management_service.Job')
+    def test_migrate_to_sharded_layout_dry_run(self, mock_job_cls, mock_db, file_service, temp_upload_folder):
+        """Test that a dry run reports without moving files or touching jobs"""
+        legacy = self._legacy_file(temp_upload_folder, "result.pdf")
+        job = Mock()
+        job.job_id = "job-1"
+        job.result = {"output_path": legacy}
+        job.input_data = {}
+        mock_job_cls.query.all.return_value = [job]
+        
+        summary = file_service.migrate_to_sharded_layout(dry_run=True)
+        
+        assert summary['dry_run'] is True
+        assert summary['files_moved'] == 1
+        assert summary['jobs_updated'] == 1
+        assert os.path.exists(legacy)
+        assert job.result == {"output_path": legacy}
+        mock_db.session.commit.assert_not_called()
+        assert not os.path.exists(os.path.join(temp_upload_folder, 'results'))
+    
     # ========================= UTILITY METHOD TESTS =========================
     
     def test_get_service_status(self, file_service):
@@ -380,12 +527,80 @@ class TestFileManagementService:
     
     def test_error_handling_in_cleanup_expired_jobs(self, file_service):
         """Test error handling during job cleanup"""
-        with patch.object(file_service, '_get_expired_jobs', side_effect=Exception("Database error")):
+        with patch.object(file_service, '_expired_jobs_filter', side_effect=Exception("Database error")):
             result = file_service.cleanup_expired_jobs()
             
             assert result['jobs_cleaned'] == 0
             assert len(result['errors']) > 0
     
+    # ========================= ARCHIVE TESTS =========================
+    
+    def _processed_file(self, file_service, name, data):
+        path = file_service.create_output_path(name)
+        with file_service.open_output(path) as f:
+            f.write(data)
+        return {'output_path': path, 'original_filename': name}
+    
+    def test_create_result_archive_compression_per_entry(self, file_service):
+        """Test PDFs are stored and text is deflated"""
+        files = [
+            self._processed_file(file_service, 'a.pdf', b'%PDF' + os.urandom(2000)),
+            self._processed_file(file_service, 'b.txt', b'text ' * 500),
+            self._processed_file(file_service, 'a.pdf', b'%PDF second'),
+            {'output_path': '/nonexistent/file.pdf'},
+        ]
+        
+        archive_path = file_service.create_result_archive(files, 'job-1')
+        
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.namelist() == ['a.pdf', 'b.txt', 'a (1).pdf']
+            assert archive.getinfo('a.pdf').compress_type == zipfile.ZIP_STORED
+            assert archive.getinfo('b.txt').compress_type == zipfile.ZIP_DEFLATED
+    
+    def test_result_archive_appends_incrementally(self, file_service):
+        """Test the archive only appears at its final path once closed"""
+        first = self._processed_file(file_service, 'one.pdf', b'1')
+        
+        with file_service.open_result_archive('job-2') as archive:
+            assert archive.path is None
+            archive.add(first)
+            assert not os.path.exists(archive.path)
+            archive.add(self._processed_file(file_service, 'two.pdf', b'2'))
+        
+        with zipfile.ZipFile(archive.path) as result:
+            assert result.namelist() == ['one.pdf', 'two.pdf']
+    
+    def test_result_archive_discarded_on_error(self, file_service, temp_upload_folder):
+        """Test a failed job leaves no partial archive behind"""
+        with pytest.raises(RuntimeError):
+            with file_service.open_result_archive('job-3') as archive:
+                archive.add(self._processed_file(file_service, 'one.pdf', b'1'))
+                raise RuntimeError("processing failed")
+        
+        archives = [p for p, _ in file_service.iter_stored_files() if 'processed_files_job-3' in p]
+        assert archives == []
+        assert archive.path is None
+    
+    @patch('src.services.file_management_service.Job')
+    def test_job_archive_stream_response(self, mock_job_query, file_service):
+        """Test bulk results are zipped at request time"""
+        mock_job = Mock()
+        mock_job.is_completed.return_value = True
+        mock_job.result = {'processed_files_info': [
+            self._processed_file(file_service, 'x.pdf', b'%PDF x'),
+            self._processed_file(file_service, 'y.pdf', b'%PDF y'),
+        ]}
+        mock_job_query.query.filter_by.return_value.first.return_value = mock_job
+        
+        with Flask(__name__).test_request_context():
+            response = file_service.get_job_archive_stream_response('test-job-123')
+            body = b''.join(response.response)
+        
+        assert response.mimetype == 'application/zip'
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            assert archive.read('x.pdf') == b'%PDF x'
+            assert archive.read('y.pdf') == b'%PDF y'
+    
     def test_error_handling_in_get_cleanup_statistics(self, file_service):
         """Test error handling when getting cleanup statistics"""
         with patch('src.services.file_management_service.Job.query', side_effect=Exception("Database error")):
@@ -400,4 +615,441 @@ class TestFileManagementService:
             status = file_service.get_service_status()
             
             assert 'error' in status
-            assert status['service_name'] == 'FileManagementService'
\ No newline at end of file
+            assert status['service_name'] == 'FileManagementService'
+
+class TestContentAddressedStorage:
+    """Test cases for the content-addressed blob store"""
+    
+    @pytest.fixture
+    def cas_service(self, app, db):
+        """Content-addressed FileManagementService with a clean blob table"""
+        temp_dir = tempfile.mkdtemp()
+        yield FileManagementService(upload_folder=temp_dir, content_addressed=True)
+        db.session.rollback()
+        FileBlob.query.delete()
+        StoredFile.query.delete()
+        db.session.commit()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def test_blob_reference_joins_callers_transaction(self, cas_service, db):
+        """Test that commit=False leaves the reference to the caller's transaction"""
+        digest, _ = cas_service.save_file(b"%PDF-1.4 tx", "a.pdf")
+        
+        cas_service.save_file(b"%PDF-1.4 tx", "b.pdf", commit=False)
+        assert db.session.get(FileBlob, digest).ref_count == 2
+        db.session.rollback()
+        
+        assert db.session.get(FileBlob, digest).ref_count == 1
+    
+    def test_register_blob_ignores_concurrent_insert(self, cas_service, db):
+        """Test that a blob registered by another worker first is not an error"""
+        assert cas_service._register_blob('a' * 64, '.pdf', 10) is True
+        assert cas_service._register_blob('a' * 64, '.pdf', 10) is False
+        assert db.session.get(FileBlob, 'a' * 64).ref_count == 1
+    
+    def test_repeat_saves_share_one_blob(self, cas_service, db):
+        """Test that identical content is written once and reference counted"""
+        first_id, first_path = cas_service.save_file(b"%PDF-1.4 same", "a.pdf")
+        second_id, second_path = cas_service.save_file(b"%PDF-1.4 same", "b.pdf", kind='temp')
+        
+        assert first_id == second_id == hashlib.sha256(b"%PDF-1.4 same").hexdigest()
+        assert first_path == second_path
+        assert first_path.endswith(f"{first_id}.pdf")
+        assert os.path.relpath(first_path, cas_service.upload_folder).startswith(FileManagementService.BLOB_KIND)
+        assert db.session.get(FileBlob, first_id).ref_count == 2
+        assert cas_service.get_file_path(first_id) == first_path
+        assert len(list(cas_service.iter_stored_files(kinds=(FileManagementService.BLOB_KIND,)))) == 1
+    
+    def test_distinct_content_gets_distinct_blobs(self, cas_service):
+        """Test that different content is stored separately"""
+        first_id, _ = cas_service.save_file(b"one", "a.pdf")
+        second_id, _ = cas_service.save_file(b"two", "a.pdf")
+        
+        assert first_id != second_id
+        assert FileBlob.query.count() == 2
+    
+    def test_delete_file_releases_reference(self, cas_service):
+        """Test that a blob is only removed when its last reference goes"""
+        _, path = cas_service.save_file(b"shared", "a.pdf")
+        cas_service.save_file(b"shared", "a.pdf")
+        
+        assert cas_service.delete_file(path) is True
+        assert os.path.exists(path)
+        
+        assert cas_service.delete_file(path) is True
+        assert not os.path.exists(path)
+        assert FileBlob.query.count() == 0
+    
+    def test_cleanup_job_files_decrements_blob(self, cas_service, db):
+        """Test that job cleanup releases blob references instead of deleting"""
+        _, path = cas_service.save_file(b"input", "in.pdf")
+        cas_service.save_file(b"input", "in.pdf")
+        job = Mock(spec=Job)
+        job.job_id = "cas-job"
+        job.result = {"output_path": path}
+        job.input_data = {}
+        
+        cas_service._cleanup_job_files(job)
+        db.session.commit()
+        assert os.path.exists(path)
+        assert db.session.get(FileBlob, hashlib.sha256(b"input").hexdigest()).ref_count == 1
+        
+        assert cas_service._cleanup_job_files(job) > 0
+        db.session.commit()
+        assert not os.path.exists(path)
+
+    def test_released_blob_survives_rollback(self, cas_service, db):
+        """Test that the blob file is only unlinked once the release commits"""
+        digest, path = cas_service.save_file(b"keep me", "a.pdf")
+
+        assert cas_service.release_blob(digest, commit=False) > 0
+        assert os.path.exists(path)
+        db.session.rollback()
+
+        assert os.path.exists(path)
+        assert db.session.get(FileBlob, digest).ref_count == 1
+
+        cas_service.release_blob(digest, commit=False)
+        db.session.commit()
+        assert not os.path.exists(path)
+
+    def test_save_stream_deduplicates(self, cas_service, db):
+        """Test that streamed saves hash while staging and share blobs"""
+        first_id, first_path = cas_service.save_stream(io.BytesIO(b"streamed"), "a.pdf")
+        second_id, second_path = cas_service.save_stream(iter([b"stream", b"ed"]), "a.pdf")
+        
+        assert first_id == second_id == hashlib.sha256(b"streamed").hexdigest()
+        assert first_path == second_path
+        assert db.session.get(FileBlob, first_id).ref_count == 2
+        assert list(cas_service.iter_stored_files(kinds=('temp',), include_legacy=False)) == []
+    
+    def test_missing_blob_file_is_rewritten(self, cas_service):
+        """Test that a referenced blob whose file vanished is restored on save"""
+        _, path = cas_service.save_file(b"restore me", "a.pdf")
+        os.remove(path)
+        
+        _, again = cas_service.save_file(b"restore me", "a.pdf")
+        
+        assert again == path
+        with open(path, 'rb') as f:
+            assert f.read() == b"restore me"
+
+
+
+class TestFileIndex:
+    """Test cases for the stored-file index"""
+    
+    @pytest.fixture
+    def indexed_service(self, app, db):
+        """FileManagementService backed by the test database's file index"""
+        temp_dir = tempfile.mkdtemp()
+        yield FileManagementService(upload_folder=temp_dir, content_addressed=False)
+        db.session.rollback()
+        StoredFile.query.delete()
+        db.session.commit()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _entry(self, path):
+        return StoredFile.query.filter_by(path=os.path.abspath(path)).one()
+    
+    def _expire(self, db, path, hours=2):
+        entry = self._entry(path)
+        entry.created_at = entry.created_at - timedelta(hours=hours)
+        entry.expires_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+    
+    def test_save_file_is_indexed(self, indexed_service):
+        """Test that saved files are recorded with size, kind, job and expiry"""
+        _, path = indexed_service.save_file(b"12345", "a.pdf", kind='temp', job_id="job-7")
+        
+        entry = self._entry(path)
+        assert (entry.kind, entry.size_bytes, entry.job_id) == ('temp', 5, "job-7")
+        assert entry.expires_at - entry.created_at == timedelta(hours=FileManagementService.TEMP_FILE_MAX_AGE_HOURS)
+    
+    def test_cleanup_temp_files_uses_expiry(self, indexed_service, db):
+        """Test that temp cleanup removes expired entries only, whatever the mtime"""
+        _, expired = indexed_service.save_file(b"old", "a.pdf", kind='temp')
+        _, fresh = indexed_service.save_file(b"new", "b.pdf", kind='temp')
+        _, expired_input = indexed_service.save_file(b"in", "c.pdf")
+        self._expire(db, expired)
+        self._expire(db, expired_input)
+        stale = (datetime.utcnow() - timedelta(hours=5)).timestamp()
+        os.utime(fresh, (stale, stale))
+        
+        result = indexed_service.cleanup_temp_files()
+        
+        assert result['files_deleted'] == 1
+        assert not os.path.exists(expired)
+        assert os.path.exists(fresh)
+        assert os.path.exists(expired_input)
+        assert StoredFile.query.filter_by(path=os.path.abspath(expired)).count() == 0
+    
+    def test_cleanup_old_files_uses_index(self, indexed_service, db):
+        """Test that old-file cleanup queries expiry, or creation time when an age is given"""
+        _, expired = indexed_service.save_file(b"old", "a.pdf", kind='results')
+        _, recent = indexed_service.save_file(b"new", "b.pdf", kind='results')
+        self._expire(db, expired, hours=30)
+        
+        assert indexed_service.cleanup_old_files(max_age_hours=48)['files_deleted'] == 0
+        assert indexed_service.cleanup_old_files(max_age_hours=24)['files_deleted'] == 1
+        assert not os.path.exists(expired)
+        assert os.path.exists(recent)
+    
+    def test_cleanup_job_files_uses_index(self, indexed_service, db):
+        """Test that job cleanup removes the files indexed against the job"""
+        _, input_path = indexed_service.save_file(b"input", "in.pdf", job_id="job-9")
+        output_path = indexed_service.create_output_path("out.pdf", job_id="job-9")
+        with open(output_path, 'wb') as f:
+            f.write(b"output")
+        job = Mock(spec=Job)
+        job.job_id = "job-9"
+        job.result = {}
+        job.input_data = {}
+        
+        assert indexed_service._cleanup_job_files(job) > 0
+        db.session.commit()
+        
+        assert not os.path.exists(input_path)
+        assert not os.path.exists(output_path)
+        assert StoredFile.query.filter_by(job_id="job-9").count() == 0
+    
+    def test_output_path_index_survives_caller_rollback(self, indexed_service, db):
+        """Test that create_output_path indexes in its own transaction"""
+        indexed_service.save_file(b"pending", "p.pdf", commit=False)
+        
+        output_path = indexed_service.create_output_path("out.pdf", job_id="job-10")
+        db.session.rollback()
+        
+        assert self._entry(output_path).job_id == "job-10"
+        assert StoredFile.query.filter(StoredFile.path.like('%p.pdf')).count() == 0
+    
+    def test_reconcile_file_index(self, indexed_service):
+        """Test that reconciling adds, updates and removes index entries"""
+        output_path = indexed_service.create_output_path("out.pdf")
+        with open(output_path, 'wb') as f:
+            f.write(b"output")
+        untracked = indexed_service.shard_path("untracked.pdf", 'inputs')
+        with open(untracked, 'wb') as f:
+            f.write(b"x")
+        _, vanished = indexed_service.save_file(b"gone", "gone.pdf")
+        os.remove(vanished)
+        
+        summary = indexed_service.reconcile_file_index()
+        
+        assert (summary['files_added'], summary['sizes_updated'], summary['entries_removed']) == (1, 1, 1)
+        assert self._entry(output_path).size_bytes == 6
+        assert self._entry(untracked).kind == 'inputs'
+    
+    def test_folder_statistics_from_index(self, indexed_service, db):
+        """Test that folder statistics are aggregated from the index"""
+        indexed_service.save_file(b"aaaa", "a.pdf")
+        _, temp_path = indexed_service.save_file(b"bb", "b.pdf", kind='temp')
+        self._expire(db, temp_path)
+        
+        stats = indexed_service._folder_statistics()
+        
+        assert stats['upload_folder_file_count'] == 2
+        assert stats['upload_folder_size_mb'] == pytest.approx(6 / (1024 * 1024))
+        assert stats['files_by_kind'] == {'inputs': 1, 'temp': 1}
+        assert stats['expired_files'] == 1
+
+
+class TestCleanupEngine:
+    """Test cases for the incremental cleanup engine"""
+    
+    @pytest.fixture
+    def service(self, app, db):
+        """FileManagementService backed by the test database"""
+        temp_dir = tempfile.mkdtemp()
+        yield FileManagementService(upload_folder=temp_dir, content_addressed=False)
+        db.session.rollback()
+        StoredFile.query.delete()
+        Job.query.delete()
+        CleanupCursor.query.delete()
+        db.session.commit()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _job(self, db, job_id, status, age_hours):
+        job = Job(task_type='compress', job_id=job_id)
+        job.status = status
+        job.created_at = job.updated_at = datetime.utcnow() - timedelta(hours=age_hours)
+        db.session.add(job)
+        db.session.commit()
+        return job
+    
+    def _expire(self, db, path):
+        entry = StoredFile.query.filter_by(path=os.path.abspath(path)).one()
+        entry.expires_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+    
+    def test_removes_expired_jobs_with_their_files(self, service, db):
+        """Test retention per status, including the processing safety buffer"""
+        self._job(db, 'done-old', 'completed', 30)
+        self._job(db, 'done-new', 'completed', 2)
+        self._job(db, 'running-buffer', 'processing', 9)
+        self._job(db, 'running-stale', 'processing', 11)
+        _, path = service.save_file(b"result", "r.pdf", job_id='done-old')
+        
+        summary = service.run_cleanup()
+        
+        assert summary['complete'] is True
+        assert summary['jobs_cleaned'] == 2
+        remaining = {job.job_id for job in Job.query.all()}
+        assert remaining == {'done-new', 'running-buffer'}
+        assert not os.path.exists(path)
+        assert StoredFile.query.filter_by(job_id='done-old').count() == 0
+    
+    def test_keeps_results_of_retained_jobs(self, service, db):
+        """Test that a job's result outlives MAX_FILE_AGE while the job is retained"""
+        self._job(db, 'done-2h', 'completed', 2)
+        output_path = service.create_output_path("out.pdf", job_id='done-2h')
+        with open(output_path, 'wb') as f:
+            f.write(b"output")
+        db.session.commit()
+        entry = StoredFile.query.filter_by(path=os.path.abspath(output_path)).one()
+        assert entry.expires_at - entry.created_at >= timedelta(hours=24)
+        # Entries indexed with the old 1h expiry are kept too
+        entry.created_at = datetime.utcnow() - timedelta(hours=2)
+        entry.expires_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+        
+        summary = service.run_cleanup()
+        
+        assert summary['files_deleted'] == 0
+        assert os.path.exists(output_path)
+    
+    def _age_results(self, db, job_id):
+        """Backdate a job's result entries past MAX_FILE_AGE"""
+        entries = StoredFile.query.filter_by(job_id=job_id, kind='results').all()
+        for entry in entries:
+            entry.created_at = datetime.utcnow() - timedelta(hours=2)
+            entry.expires_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+        return entries
+    
+    def test_keeps_conversion_results_of_retained_jobs(self, service, db):
+        """Test that conversion output is indexed against its job and kept with it"""
+        fitz = pytest.importorskip("fitz")
+        from src.services.conversion_service import ConversionService
+        self._job(db, 'conv-2h', 'completed', 2)
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "converted")
+        
+        result = ConversionService(file_service=service).convert_pdf_data(
+            doc.tobytes(), "txt", {}, "doc.pdf", job_id='conv-2h')
+        
+        assert result["success"] is True
+        assert len(self._age_results(db, 'conv-2h')) == 1
+        assert service.run_cleanup()['files_deleted'] == 0
+        assert os.path.exists(result["output_path"])
+    
+    def test_keeps_ocr_results_of_retained_jobs(self, service, db):
+        """Test that OCR output is indexed against its job and kept with it"""
+        fitz = pytest.importorskip("fitz")
+        from src.services import ocr_service as ocr_module
+        self._job(db, 'ocr-2h', 'completed', 2)
+        doc = fitz.open()
+        doc.new_page(width=100, height=100)
+        tesseract = Mock()
+        tesseract.image_to_data.return_value = {key: [] for key in ('text', 'conf')}
+        
+        with patch.object(ocr_module, 'pytesseract', tesseract, create=True), \
+                patch.object(ocr_module, 'OCR_LIBS_AVAILABLE', True):
+            ocr = ocr_module.OCRService(file_service=service)
+            ocr.render_dpi = 72
+            result = ocr.process_ocr_data(doc.tobytes(), {"outputFormat": "text"}, "scan.pdf", job_id='ocr-2h')
+        
+        assert result["success"] is True
+        assert len(self._age_results(db, 'ocr-2h')) == 1
+        assert service.run_cleanup()['files_deleted'] == 0
+        assert os.path.exists(result["output_path"])
+    
+    def test_removes_expired_files_and_legacy_files(self, service, db):
+        """Test the file phases: expired index entries and old flat files"""
+        _, expired = service.save_file(b"old", "a.pdf", kind='temp')
+        _, fresh = service.save_file(b"new", "b.pdf", kind='temp')
+        self._expire(db, expired)
+        legacy = os.path.join(service.upload_folder, 'legacy.pdf')
+        with open(legacy, 'wb') as f:
+            f.write(b"legacy")
+        stale = (datetime.utcnow() - timedelta(hours=5)).timestamp()
+        os.utime(legacy, (stale, stale))
+        
+        summary = service.run_cleanup()
+        
+        assert summary['files_deleted'] == 2
+        assert not os.path.exists(expired)
+        assert not os.path.exists(legacy)
+        assert os.path.exists(fresh)
+        assert StoredFile.query.filter_by(path=os.path.abspath(expired)).count() == 0
+    
+    def test_time_budget_resumes_from_cursor(self, service, db):
+        """Test that a run out of time stops after a batch and the next run carries on"""
+        for i in range(3):
+            self._job(db, f'old-{i}', 'failed', 30)
+        engine = service.cleanup_engine
+        engine.batch_size = 1
+        
+        # One batch fits in the budget, then the clock says time is up
+        clock = itertools.chain([0, 0], itertools.repeat(100))
+        with patch('src.services.file_management_service.time.monotonic', side_effect=lambda: next(clock)):
+            summary = engine.run()
+        
+        assert summary['complete'] is False
+        assert summary['jobs_cleaned'] == 1
+        assert summary['cursor']['phase'] == 'jobs'
+        assert Job.query.count() == 2
+        
+        summary = engine.run()
+        assert summary['complete'] is True
+        assert Job.query.count() == 0
+    
+    def test_cursor_is_shared_between_processes(self, service, db):
+        """Test that a fresh engine (another worker, or after a restart) resumes from the stored cursor"""
+        for i in range(3):
+            self._job(db, f'old-{i}', 'failed', 30 - i)
+        service.cleanup_engine.batch_size = 1
+        clock = itertools.chain([0, 0], itertools.repeat(100))
+        with patch('src.services.file_management_service.time.monotonic', side_effect=lambda: next(clock)):
+            service.run_cleanup()
+        
+        stored = db.session.get(CleanupCursor, os.path.abspath(service.upload_folder))
+        assert stored.phase == 'jobs'
+        other = FileManagementService(upload_folder=service.upload_folder, content_addressed=False)
+        other.cleanup_engine._load_cursor()
+        assert other.cleanup_engine.cursor['position'][1] == 'old-0'
+        
+        summary = other.run_cleanup()
+        assert summary['complete'] is True
+        assert summary['jobs_cleaned'] == 2
+        assert Job.query.count() == 0
+    
+    def test_statistics_and_cleanup_expired_jobs_use_sql(self, service, db):
+        """Test that stats count expired jobs in SQL and cleanup_expired_jobs removes them in batches"""
+        for i in range(3):
+            self._job(db, f'old-{i}', 'failed', 30)
+        self._job(db, 'fresh', 'completed', 1)
+        service.save_file(b"12345", "in.pdf", job_id='old-0')
+        
+        stats = service.get_cleanup_statistics()
+        assert stats['expired_jobs'] == 3
+        assert stats['estimated_space_to_free_mb'] == 5 / (1024 * 1024)
+        assert service.health_check()['checks']['cleanup']['details']['expired_jobs_count'] == 3
+        
+        with patch('src.services.file_management_service.Config.CLEANUP_BATCH_SIZE', 2):
+            result = service.cleanup_expired_jobs()
+        
+        assert result['jobs_cleaned'] == 3
+        assert result['errors'] == []
+        assert {job.job_id for job in Job.query.all()} == {'fresh'}
+    
+    def test_concurrent_run_is_skipped(self, service):
+        """Test that overlapping runs don't process the same batches twice"""
+        service.cleanup_engine._lock.acquire()
+        try:
+            summary = service.run_cleanup()
+        finally:
+            service.cleanup_engine._lock.release()
+        
+        assert summary['batches'] == 0
+        assert summary['errors'] == ["Cleanup already running"]
@@ -0,0 +1,71 @@
+"""Unit tests for file utilities"""
+import hashlib
+import io
+import os
+
+import pytest
+
+from src.utils.file_utils import atomic_write, copy_stream
+
+
+class TestAtomicWrite:
+    """Test temp-then-rename writes"""
+
+    def test_writes_file_and_leaves_no_temp(self, tmp_path):
+        """Test that the data lands at the final path only"""
+        target = tmp_path / "out.bin"
+
+        with atomic_write(str(target)) as f:
+            f.write(b"payload")
+            assert not target.exists()
+
+        assert target.read_bytes() == b"payload"
+        assert os.listdir(tmp_path) == ["out.bin"]
+
+    def test_failure_keeps_existing_file(self, tmp_path):
+        """Test that an exception discards the partial write"""
+        target = tmp_path / "out.bin"
+        target.write_bytes(b"original")
+
+        with pytest.raises(RuntimeError):
+            with atomic_write(str(target)) as f:
+                f.write(b"half")
+                raise RuntimeError("converter crashed")
+
+        assert target.read_bytes() == b"original"
+        assert os.listdir(tmp_path) == ["out.bin"]
+
+    def test_text_mode_with_fsync(self, tmp_path):
+        """Test text mode and the fsync path"""
+        target = tmp_path / "out.txt"
+
+        with atomic_write(str(target), 'w', fsync=True, encoding='utf-8') as f:
+            f.write("héllo")
+
+        assert target.read_text(encoding='utf-8') == "héllo"
+
+    def test_rejects_append_mode(self, tmp_path):
+        """Test that non-truncating modes are refused"""
+        with pytest.raises(ValueError):
+            with atomic_write(str(tmp_path / "x"), 'ab'):
+                pass
+
+
+class TestCopyStream:
+    """Test copying from bytes, file objects and chunk iterators"""
+
+    @pytest.mark.parametrize("source", [
+        b"abcdef",
+        io.BytesIO(b"abcdef"),
+        iter([b"ab", b"", b"cdef"]),
+    ])
+    def test_sources(self, source):
+        """Test that every source type is copied in full"""
+        destination = io.BytesIO()
+        hasher = hashlib.sha256()
+
+        written = copy_stream(source, destination, chunk_size=4, on_chunk=hasher.update)
+
+        assert written == 6
+        assert destination.getvalue() == b"abcdef"
+        assert hasher.hexdigest() == hashlib.sha256(b"abcdef").hexdigest()
@@ -0,0 +1,88 @@
+"""Unit tests for the OCR image preprocessing stage"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from src.utils.image_preprocessing import (
+    estimate_skew_angle,
+    find_border_box,
+    find_content_box,
+    map_boxes_to_source,
+    preprocess_for_ocr,
+    to_grayscale_array,
+)
+
+
+def _lined_page(angle=0.0, border=0):
+    """White page with dark horizontal bars standing in for text lines."""
+    page = np.full((1200, 1000), 255, np.uint8)
+    for y in range(150, 1050, 40):
+        page[y:y + 12, 120:880] = 0
+    if angle:
+        matrix = cv2.getRotationMatrix2D((500, 600), angle, 1.0)
+        page = cv2.warpAffine(page, matrix, (1000, 1200), borderValue=255)
+    if border:
+        page = cv2.copyMakeBorder(page, border, border, border, border, cv2.BORDER_CONSTANT, value=0)
+    return page
+
+
+class TestImagePreprocessing:
+    """Test cases for image_preprocessing"""
+
+    def test_skew_angle_detected(self):
+        """The estimate undoes a known rotation"""
+        assert estimate_skew_angle(_lined_page(angle=3.0)) == pytest.approx(-3.0, abs=0.2)
+        assert estimate_skew_angle(_lined_page()) == pytest.approx(0.0, abs=0.2)
+
+    def test_blank_page_has_no_skew(self):
+        assert estimate_skew_angle(np.full((400, 300), 255, np.uint8)) == 0.0
+
+    def test_border_box_strips_dark_frame(self):
+        """A scanner frame is stripped along with its ragged inner edge"""
+        assert find_border_box(_lined_page(border=50) < 128) == (54, 54, 1046, 1246)
+        assert find_border_box(_lined_page() < 128) == (0, 0, 1000, 1200)
+
+    def test_border_box_ignores_shaded_side(self):
+        """A wide dark band is lighting, not a border"""
+        page = _lined_page()
+        page[:, :400] = 60
+        assert find_border_box(page < 128) == (0, 0, 1000, 1200)
+
+    def test_content_box_ignores_speckle(self):
+        """The box hugs the text block plus margin; isolated dots are dropped"""
+        page = _lined_page()
+        page[20:23, 20:23] = 0
+        page[1150:1153, 950:953] = 0
+
+        assert find_content_box(page < 128) == (120 - 10, 150 - 10, 880 + 10, 1042 + 10)
+
+    def test_preprocess_returns_binary_cropped_image(self):
+        noisy = _lined_page(angle=2.0, border=40)
+        noisy = cv2.add(noisy, np.random.default_rng(0).integers(0, 40, noisy.shape, dtype=np.uint8))
+
+        cleaned, transform = preprocess_for_ocr(noisy)
+
+        assert set(np.unique(cleaned)) <= {0, 255}
+        assert cleaned.shape[0] < noisy.shape[0] and cleaned.shape[1] < noisy.shape[1]
+        assert transform["angle"] == pytest.approx(-2.0, abs=0.2)
+        assert transform["size"] == (noisy.shape[1], noisy.shape[0])
+
+    def test_rgb_input_converted_to_grayscale(self):
+        rgb = np.zeros((10, 20, 3), np.uint8)
+        assert to_grayscale_array(rgb).shape == (10, 20)
+
+    def test_boxes_mapped_back_through_crop_and_rotation(self):
+        """Boxes found on the processed image land on the original pixels"""
+        original = _lined_page(angle=3.0, border=30)
+        cleaned, transform = preprocess_for_ocr(original, denoise=False)
+
+        # First bar in the deskewed, cropped image
+        rows = np.flatnonzero((cleaned[:, :] == 0).mean(axis=1) > 0.5)
+        cols = np.flatnonzero((cleaned[rows[0]:rows[0] + 12] == 0).any(axis=0))
+        box = [int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[0]) + 12, "bar"]
+
+        x0, y0, x1, y1, _ = map_boxes_to_source([box], transform)[0]
+        cx, cy = (x0 + x1) // 2, (y0 + y1) // 2
+        assert original[cy, cx] < 128
@@ -0,0 +1,111 @@
+"""Tests for job history archival"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.config import Config
+from src.jobs import JobOperations
+from src.models.job import Job, JobStatus
+from src.models.job_result import OFFLOAD_KEY, JobResult
+from src.services.file_management_service import FileManagementService
+from src.services.job_archive import JobArchive
+
+LARGE_RESULT = {'output_path': '/results/bulk.zip', 'files': ['x' * 100] * 500}
+
+
+@pytest.fixture
+def archive_dir():
+    directory = tempfile.mkdtemp()
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture(params=['ndjson', 'table'])
+def archive(request, app, db, archive_dir):
+    archive = JobArchive(backend=request.param, directory=archive_dir, enabled=True)
+    with patch('src.services.service_registry.ServiceRegistry.get_job_archive', return_value=archive), \
+            patch.object(Config, 'JOB_ARCHIVE_ENABLED', True), \
+            patch.object(Config, 'JOB_ARCHIVE_AFTER_HOURS', 6):
+        yield archive
+    db.session.rollback()
+    for table in archive._tables.values():
+        table.drop(db.engine, checkfirst=True)
+    JobResult.query.delete()
+    Job.query.delete()
+    db.session.commit()
+
+
+def _job(db, job_id, status, age_hours, result=None):
+    job = Job(job_id=job_id, task_type='compress')
+    job.status = status
+    job.result = result
+    job.created_at = job.updated_at = datetime.utcnow() - timedelta(hours=age_hours)
+    db.session.add(job)
+    db.session.commit()
+    return job.created_at.date()
+
+
+def _archived(archive, db, day):
+    return {row['job_id']: row for row in archive.iter_day(db.session, day)}
+
+
+class TestJobArchive:
+    """Test cases for JobArchive"""
+
+    def test_archives_by_creation_day_with_full_result(self, archive, db):
+        day = _job(db, 'arc-1', JobStatus.COMPLETED.value, 30, result=LARGE_RESULT)
+        other_day = _job(db, 'arc-2', JobStatus.FAILED.value, 60)
+        assert OFFLOAD_KEY in Job.query.filter_by(job_id='arc-1').one().result
+
+        assert archive.archive_jobs(db.session, ['arc-1', 'arc-2']) == 2
+        db.session.commit()
+
+        archived = _archived(archive, db, day)
+        assert list(archived) == ['arc-1']
+        assert archived['arc-1']['result'] == LARGE_RESULT
+        assert archived['arc-1']['status'] == 'completed'
+        assert list(_archived(archive, db, other_day)) == ['arc-2']
+
+    def test_disabled_archive_does_nothing(self, app, db, archive_dir):
+        archive = JobArchive(backend='ndjson', directory=archive_dir, enabled=False)
+
+        assert archive.archive_jobs(db.session, ['arc-1']) == 0
+        assert os.listdir(archive_dir) == []
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            JobArchive(backend='parquet')
+
+
+class TestCleanupArchival:
+    """Cleanup moves old finished jobs to the archive"""
+
+    @pytest.fixture
+    def service(self, archive):
+        temp_dir = tempfile.mkdtemp()
+        yield FileManagementService(upload_folder=temp_dir, content_addressed=False)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_run_cleanup_archives_finished_jobs(self, service, archive, db):
+        day = _job(db, 'old-done', JobStatus.COMPLETED.value, 7, result={'output_path': '/x.pdf'})
+        _job(db, 'new-done', JobStatus.COMPLETED.value, 2)
+        _job(db, 'running', JobStatus.PROCESSING.value, 7)
+
+        summary = service.run_cleanup()
+
+        assert summary['jobs_cleaned'] == summary['jobs_archived'] == 1
+        assert {job.job_id for job in Job.query.all()} == {'new-done', 'running'}
+        assert _archived(archive, db, day)['old-done']['result'] == {'output_path': '/x.pdf'}
+
+    def test_cleanup_old_jobs_archives(self, archive, db):
+        day = _job(db, 'old-failed', JobStatus.FAILED.value, 24 * 40)
+
+        assert JobOperations().cleanup_old_jobs(days_old=30) == 1
+
+        assert Job.query.count() == 0
+        assert list(_archived(archive, db, day)) == ['old-failed']
@@ -0,0 +1,97 @@
+"""Tests for server-sent job events"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.models.job import Job, JobStatus
+from src.services.job_events import JobEventBroker, format_event
+from src.services.job_status_cache import JobStatusCache
+
+
+@pytest.fixture
+def broker(app, db):
+    # Cache off: no Redis listener, statuses come from the database
+    broker = JobEventBroker(JobStatusCache(enabled=False))
+    with patch('src.services.service_registry.ServiceRegistry.get_job_event_broker', return_value=broker):
+        yield broker
+    db.session.rollback()
+    Job.query.delete()
+    db.session.commit()
+
+
+def _job(db, job_id, status=JobStatus.PROCESSING.value):
+    job = Job(job_id=job_id, task_type='compress')
+    job.status = status
+    db.session.add(job)
+    db.session.commit()
+    return job_id
+
+
+def _data(message):
+    return json.loads(message.split('data: ', 1)[1])
+
+
+class TestJobEventBroker:
+    """Test cases for JobEventBroker"""
+
+    def test_format_event(self):
+        assert format_event({'status': 'pending'}) == 'event: status\ndata: {"status": "pending"}\n\n'
+
+    def test_dispatch_reaches_only_that_jobs_subscribers(self, broker):
+        first, second, other = broker.subscribe('a'), broker.subscribe('a'), broker.subscribe('b')
+
+        broker.dispatch('a', {'progress': 5.0})
+
+        assert first.get_nowait() == second.get_nowait() == {'progress': 5.0}
+        assert other.empty()
+
+        for job_id, events in (('a', first), ('a', second), ('b', other)):
+            broker.unsubscribe(job_id, events)
+        assert broker.subscriber_count() == 0
+
+    def test_stream_pushes_changes_until_finished(self, broker, db):
+        job_id = _job(db, 'ev-1')
+        stream = broker.stream(job_id, heartbeat_seconds=0.01, max_seconds=60)
+
+        assert next(stream).startswith('retry: ')
+        assert _data(next(stream))['status'] == 'processing'
+
+        broker.dispatch(job_id, {'job_id': job_id, 'progress': 40.0})
+        assert _data(next(stream))['progress'] == 40.0
+
+        broker.dispatch(job_id, {'job_id': job_id, 'status': 'completed', 'progress': 100.0})
+        assert _data(next(stream))['status'] == 'completed'
+        assert list(stream) == []
+        assert broker.subscriber_count() == 0
+
+    def test_stream_polls_without_redis(self, broker, db):
+        job_id = _job(db, 'ev-2')
+        stream = broker.stream(job_id, heartbeat_seconds=0.01, max_seconds=60)
+        next(stream), next(stream)
+
+        assert next(stream) == ': keepalive\n\n'
+
+        Job.query.filter_by(job_id=job_id).update({'status': JobStatus.FAILED.value})
+        db.session.commit()
+        assert _data(next(stream))['status'] == 'failed'
+
+    def test_stream_for_missing_job_is_empty(self, broker):
+        assert list(broker.stream('missing')) == []
+
+
+class TestJobEventsRoute:
+    """GET /api/jobs/<job_id>/events"""
+
+    def test_streams_finished_job(self, broker, client, db):
+        job_id = _job(db, 'ev-route', JobStatus.COMPLETED.value)
+
+        response = client.get(f'/api/jobs/{job_id}/events')
+
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['X-Accel-Buffering'] == 'no'
+        assert 'event: status' in response.get_data(as_text=True)
+
+    def test_not_found(self, broker, client):
+        assert client.get('/api/jobs/missing/events').status_code == 404
@@ -0,0 +1,120 @@
+"""Tests for offloading large job results"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.jobs import JobOperations, JobStatusManager
+from src.models.job import Job, JobStatus
+from src.models.job_result import OFFLOAD_KEY, JobResult, split_result
+
+LARGE_RESULT = {
+    'output_path': '/results/bulk.zip',
+    'processed_files_info': [{'filename': f'file_{i}.pdf', 'size': i} for i in range(2000)],
+}
+
+
+@pytest.fixture
+def manager(app, db):
+    yield JobStatusManager(JobOperations())
+    db.session.rollback()
+    JobResult.query.delete()
+    Job.query.delete()
+    db.session.commit()
+
+
+def _job(db, job_id, status=JobStatus.PROCESSING.value):
+    job = Job(job_id=job_id, task_type='bulk_compress')
+    job.status = status
+    db.session.add(job)
+    db.session.commit()
+    return job_id
+
+
+def _reload(db, job_id):
+    db.session.expire_all()
+    return Job.query.filter_by(job_id=job_id).one()
+
+
+class TestSplitResult:
+    """Test cases for split_result"""
+
+    def test_small_result_stays_inline(self):
+        assert split_result({'output_path': '/x.pdf'}) == ({'output_path': '/x.pdf'}, None)
+        assert split_result(None) == (None, None)
+
+    def test_large_result_keeps_small_values_in_summary(self):
+        summary, full = split_result(LARGE_RESULT)
+
+        assert full is LARGE_RESULT
+        assert summary['output_path'] == '/results/bulk.zip'
+        assert 'processed_files_info' not in summary
+        assert summary[OFFLOAD_KEY]['keys'] == ['processed_files_info']
+        assert summary[OFFLOAD_KEY]['size_bytes'] > 16384
+
+    def test_summary_is_not_offloaded_again(self):
+        summary, _ = split_result(LARGE_RESULT)
+
+        assert split_result(summary, max_inline_bytes=1) == (summary, None)
+
+
+class TestResultOffloading:
+    """Large results are moved off the jobs row on every write path"""
+
+    def test_status_transition_offloads(self, manager, db):
+        job_id = _job(db, 'res-1')
+
+        assert manager.update_job_status(job_id, JobStatus.COMPLETED, result=LARGE_RESULT) is True
+
+        job = _reload(db, job_id)
+        assert OFFLOAD_KEY in job.result
+        assert job.get_full_result() == LARGE_RESULT
+        assert 'processed_files_info' not in job.to_status_dict()['result']
+
+    def test_orm_write_offloads(self, manager, db):
+        job = Job.query.filter_by(job_id=_job(db, 'res-2')).one()
+
+        job.mark_as_completed(LARGE_RESULT)
+        db.session.commit()
+
+        job = _reload(db, 'res-2')
+        assert job.result[OFFLOAD_KEY]['keys'] == ['processed_files_info']
+        assert job.get_full_result() == LARGE_RESULT
+
+    def test_small_result_stays_on_row(self, manager, db):
+        job_id = _job(db, 'res-3')
+
+        manager.update_job_status(job_id, JobStatus.COMPLETED, result={'output_path': '/x.pdf'})
+
+        assert _reload(db, job_id).result == {'output_path': '/x.pdf'}
+        assert JobResult.query.count() == 0
+
+    def test_cleanup_removes_offloaded_results(self, manager, db):
+        job_id = _job(db, 'res-4')
+        manager.update_job_status(job_id, JobStatus.COMPLETED, result=LARGE_RESULT)
+        Job.query.filter_by(job_id=job_id).update({'created_at': datetime.utcnow() - timedelta(days=40)})
+        db.session.commit()
+
+        assert manager.job_operations.cleanup_old_jobs(days_old=30) == 1
+        assert JobResult.query.count() == 0
+
+
+class TestJobResultRoutes:
+    """Full results are served on request"""
+
+    def test_result_endpoint_returns_full_result(self, manager, client, db):
+        job_id = _job(db, 'res-route-1')
+        manager.update_job_status(job_id, JobStatus.COMPLETED, result=LARGE_RESULT)
+
+        data = client.get(f'/api/jobs/{job_id}/result').get_json()['data']
+
+        assert data['result'] == LARGE_RESULT
+        assert client.get('/api/jobs/missing/result').status_code == 404
+
+    def test_full_view_includes_offloaded_result(self, manager, client, db):
+        job_id = _job(db, 'res-route-2')
+        manager.update_job_status(job_id, JobStatus.COMPLETED, result=LARGE_RESULT)
+
+        data = client.get(f'/api/jobs/{job_id}?view=full').get_json()['data']
+
+        assert data['result'] == LARGE_RESULT
@@ -0,0 +1,278 @@
+"""Tests for the Redis-backed job status cache"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.jobs import JobOperations, JobOperationsController, JobStateBuffer, JobStatusManager
+from src.models.job import Job, JobStatus
+from src.services.job_status_cache import JobStatusCache
+
+
+class FakeRedis:
+    """The few hash commands the cache uses, kept in a dict"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.published = []
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        entry = self.hashes.setdefault(key, {})
+        if mapping:
+            entry.update({k: str(v) for k, v in mapping.items()})
+        if field is not None:
+            entry[field] = str(value)
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, str(value))
+
+    def expire(self, key, seconds):
+        pass
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        if self.client.fail:
+            raise ConnectionError('redis is down')
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+@pytest.fixture
+def cache(app, db):
+    cache = JobStatusCache(client=FakeRedis(), ttl_seconds=60, enabled=True)
+    with patch('src.services.service_registry.ServiceRegistry.get_job_status_cache', return_value=cache):
+        yield cache
+    db.session.rollback()
+    Job.query.delete()
+    db.session.commit()
+
+
+def _job(db, job_id, status=JobStatus.PENDING.value, result=None):
+    job = Job(job_id=job_id, task_type='compress', input_data={'file_size': 1024})
+    job.status = status
+    job.result = result
+    db.session.add(job)
+    db.session.commit()
+    return job_id
+
+
+class TestStatusProjection:
+    """Test cases for Job.to_status_dict"""
+
+    def test_leaves_out_input_data(self, cache, db):
+        job = Job.query.filter_by(job_id=_job(db, 'proj-1')).one()
+
+        projection = job.to_status_dict()
+        assert 'input_data' not in projection
+        assert 'result' not in projection
+        assert projection['status'] == 'pending'
+        assert projection['is_completed'] is False
+
+    def test_includes_result_once_completed(self, cache, db):
+        job = Job.query.filter_by(job_id=_job(db, 'proj-2', 'completed', {'output_path': '/x.pdf'})).one()
+
+        assert job.to_status_dict()['result'] == {'output_path': '/x.pdf'}
+
+
+class TestJobStatusCache:
+    """Test cases for JobStatusCache"""
+
+    def test_new_jobs_are_cached_on_commit(self, cache, db):
+        assert cache.get(_job(db, 'rt-0'))['status'] == 'pending'
+
+    def test_read_through_populates_cache(self, cache, db):
+        job_id = _job(db, 'rt-1')
+        cache.delete_many([job_id])
+
+        assert cache.get(job_id) is None
+        assert cache.get_status(job_id)['status'] == 'pending'
+        assert cache.get(job_id)['status'] == 'pending'
+
+    def test_missing_job(self, cache):
+        assert cache.get_status('missing') is None
+
+    def test_read_through_never_overwrites_newer_status(self, cache, db):
+        cache.set({'job_id': 'rt-2', 'status': 'processing', 'progress': 5.0})
+
+        cache.populate_many([{'job_id': 'rt-2', 'status': 'pending', 'progress': 0.0}])
+
+        assert cache.get('rt-2') == {'job_id': 'rt-2', 'status': 'processing', 'progress': 5.0}
+
+    def test_progress_overlays_entry(self, cache, db):
+        job_id = _job(db, 'rt-3', JobStatus.PROCESSING.value)
+        cache.get_status(job_id)
+
+        cache.set_progress(job_id, 42.0)
+
+        assert cache.get_status(job_id)['progress'] == 42.0
+
+    def test_one_query_for_many_misses(self, cache, db):
+        job_ids = [_job(db, f'rt-many-{i}') for i in range(3)]
+        cache.get_status(job_ids[0])
+
+        assert set(cache.get_statuses(job_ids + ['missing'])) == set(job_ids)
+
+    def test_falls_back_to_database_and_backs_off(self, cache, db):
+        job_id = _job(db, 'rt-4')
+        cache.client.fail = True
+
+        assert cache.get_status(job_id)['status'] == 'pending'
+        assert not cache._available()
+
+        cache.client.fail = False
+        assert cache.get(job_id) is None
+
+    def test_delete_many(self, cache):
+        cache.set({'job_id': 'rt-5', 'status': 'completed'})
+
+        cache.delete_many(['rt-5'])
+
+        assert cache.get('rt-5') is None
+
+
+class TestCacheWrites:
+    """Status changes write the cache"""
+
+    def test_compare_and_set_transition_updates_cache(self, cache, db):
+        job_id = _job(db, 'w-1')
+        cache.get_status(job_id)
+        manager = JobStatusManager(JobOperations())
+
+        assert manager.update_job_status(job_id, JobStatus.PROCESSING, progress=10.0) is True
+
+        assert cache.get(job_id)['status'] == 'processing'
+        assert cache.get(job_id)['progress'] == 10.0
+        assert cache.client.published[-1] == (f'jobevents:{job_id}', cache.get(job_id))
+
+    def test_refused_transition_leaves_cache(self, cache, db):
+        job_id = _job(db, 'w-2')
+        cache.get_status(job_id)
+        manager = JobStatusManager(JobOperations())
+
+        assert manager.update_job_status(job_id, JobStatus.COMPLETED) is False
+
+        assert cache.get(job_id)['status'] == 'pending'
+
+    def test_orm_commit_updates_cache(self, cache, db):
+        job_id = _job(db, 'w-3', JobStatus.PROCESSING.value)
+        cache.get_status(job_id)
+
+        job = Job.query.filter_by(job_id=job_id).one()
+        job.mark_as_completed({'output_path': '/y.pdf'})
+        db.session.commit()
+
+        assert cache.get(job_id)['status'] == 'completed'
+        assert cache.get(job_id)['result'] == {'output_path': '/y.pdf'}
+
+    def test_buffered_progress_is_visible(self, cache, db):
+        job_id = _job(db, 'w-4', JobStatus.PROCESSING.value)
+        operations = JobOperations()
+        controller = JobOperationsController(operations, JobStatusManager(operations))
+        controller.state_buffer = JobStateBuffer(operations, flush_interval=3600)
+
+        controller.update_job_progress(job_id, 60)
+
+        assert cache.get_status(job_id)['progress'] == 60.0
+        assert cache.client.published[-1] == (f'jobevents:{job_id}', {'job_id': job_id, 'progress': 60.0})
+
+
+class TestJobStatusRoute:
+    """GET /api/jobs/<job_id> serves the cached projection"""
+
+    def test_serves_projection(self, cache, client, db):
+        job_id = _job(db, 'route-1')
+
+        data = client.get(f'/api/jobs/{job_id}').get_json()['data']
+
+        assert data['status'] == 'pending'
+        assert 'input_data' not in data
+        assert data['monitoring']['created_at_iso'] == data['created_at']
+        assert cache.get(job_id) is not None
+
+    def test_poll_after_orm_status_change(self, cache, client, db):
+        """mark_as_* sets an aware updated_at; the projection stays naive UTC"""
+        job_id = _job(db, 'route-3')
+        job = Job.query.filter_by(job_id=job_id).one()
+        job.mark_as_processing()
+        db.session.commit()
+        assert cache.get(job_id)['status'] == 'processing'
+
+        response = client.get(f'/api/jobs/{job_id}')
+
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert '+' not in data['updated_at']
+        assert data['monitoring']['processing_duration_seconds'] >= 0
+
+    def test_full_view(self, cache, client, db):
+        job_id = _job(db, 'route-2')
+
+        data = client.get(f'/api/jobs/{job_id}?view=full').get_json()['data']
+
+        assert data['input_data'] == {'file_size': 1024}
+
+    def test_not_found(self, cache, client):
+        assert client.get('/api/jobs/missing').status_code == 404
+
+
+class TestJobStatusBatchRoute:
+    """GET/POST /api/jobs/status"""
+
+    def test_returns_statuses_in_request_order(self, cache, client, db):
+        first = _job(db, 'batch-1', 'completed', {'output_path': '/x.pdf'})
+        second = _job(db, 'batch-2')
+
+        data = client.get(f'/api/jobs/status?ids={second},missing,{first}').get_json()['data']
+
+        assert [job['job_id'] for job in data['jobs']] == [second, first]
+        assert data['not_found'] == ['missing']
+        assert all('input_data' not in job and 'result' not in job for job in data['jobs'])
+
+    def test_status_view_includes_result(self, cache, client, db):
+        job_id = _job(db, 'batch-3', 'completed', {'output_path': '/x.pdf'})
+
+        response = client.post('/api/jobs/status?view=status', json={'job_ids': [job_id]})
+
+        assert response.get_json()['data']['jobs'][0]['result'] == {'output_path': '/x.pdf'}
+
+    def test_unchanged_statuses_return_304(self, cache, client, db):
+        job_ids = [_job(db, 'batch-4'), _job(db, 'batch-5')]
+        url = f'/api/jobs/status?ids={",".join(job_ids)}'
+
+        etag = client.get(url).headers['ETag']
+        assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+        cache.set_progress(job_ids[0], 10.0)
+        changed = client.get(url, headers={'If-None-Match': etag})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+
+    def test_rejects_bad_requests(self, cache, client, app):
+        assert client.get('/api/jobs/status').status_code == 400
+        assert client.post('/api/jobs/status', json={'job_ids': 'abc'}).status_code == 400
+
+        with patch('src.routes.jobs_routes.Config.JOB_STATUS_BATCH_MAX', 2):
+            response = client.get('/api/jobs/status?ids=a,b,c')
+        assert response.get_json()['error']['code'] == 'TOO_MANY_JOB_IDS'
@@ -0,0 +1,248 @@
+"""Tests for compare-and-set job status transitions and write-behind progress"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from src.jobs import JobOperations, JobOperationsController, JobStateBuffer, JobStatusManager
+from src.models.job import Job, JobStatus
+
+
+@pytest.fixture
+def manager(app, db):
+    yield JobStatusManager(JobOperations())
+    db.session.rollback()
+    Job.query.delete()
+    db.session.commit()
+
+
+def _job(db, job_id, status=JobStatus.PENDING.value):
+    job = Job(job_id=job_id, task_type='compress')
+    job.status = status
+    db.session.add(job)
+    db.session.commit()
+    return job_id
+
+
+def _status(db, job_id):
+    db.session.expire_all()
+    return Job.query.filter_by(job_id=job_id).one().status
+
+
+class TestCompareAndSet:
+    """Test cases for JobOperations.compare_and_set"""
+
+    def test_applies_when_status_matches(self, manager, db):
+        job_id = _job(db, 'cas-1')
+
+        assert manager.job_operations.compare_and_set(
+            job_id, {'status': 'processing', 'not_a_column': 1}, expected_statuses=['pending']
+        ) is True
+        assert _status(db, job_id) == 'processing'
+
+    def test_refuses_when_status_differs(self, manager, db):
+        job_id = _job(db, 'cas-2', JobStatus.COMPLETED.value)
+
+        assert manager.job_operations.compare_and_set(
+            job_id, {'status': 'processing'}, expected_statuses=['pending']
+        ) is False
+        assert _status(db, job_id) == 'completed'
+
+    def test_missing_job(self, manager):
+        assert manager.job_operations.compare_and_set('missing', {'status': 'failed'}) is False
+
+
+class TestClaimAndCleanup:
+    """Test cases for claiming jobs and JobOperations.cleanup_old_jobs"""
+
+    def test_processing_claim_is_applied_once(self, manager, db):
+        job_id = _job(db, 'claim-1')
+
+        assert manager.update_job_status(job_id, JobStatus.PROCESSING) is True
+        assert manager.update_job_status(job_id, JobStatus.PROCESSING) is False
+        assert _status(db, job_id) == 'processing'
+
+    def test_skip_locked_transition_is_guarded_by_status(self, manager, db):
+        job_id = _job(db, 'claim-2', JobStatus.COMPLETED.value)
+
+        assert manager.job_operations.transition(job_id, {'status': 'processing'}, ['pending'],
+                                                 skip_locked=True) is None
+        assert _status(db, job_id) == 'completed'
+
+    def test_cleanup_deletes_old_finished_jobs_in_batches(self, manager, db):
+        old = datetime.utcnow() - timedelta(days=40)
+        for i in range(5):
+            _job(db, f'old-{i}', JobStatus.COMPLETED.value)
+        _job(db, 'old-running', JobStatus.PROCESSING.value)
+        _job(db, 'recent', JobStatus.COMPLETED.value)
+        Job.query.filter(Job.job_id.like('old-%')).update({'created_at': old}, synchronize_session=False)
+        db.session.commit()
+
+        assert manager.job_operations.cleanup_old_jobs(days_old=30, batch_size=2) == 5
+
+        db.session.expire_all()
+        assert sorted(job.job_id for job in Job.query.all()) == ['old-running', 'recent']
+
+
+class TestQueryJobs:
+    """Test cases for JobOperations.query_jobs"""
+
+    @pytest.fixture
+    def jobs(self, manager, db):
+        base = datetime(2024, 1, 1)
+        for i in range(7):
+            job = Job(job_id=f'q-{i}', task_type='ocr' if i % 2 else 'compress')
+            job.status = JobStatus.FAILED.value if i < 4 else JobStatus.COMPLETED.value
+            # Two jobs share a timestamp, so job_id has to break the tie
+            job.created_at = job.updated_at = base + timedelta(minutes=min(i, 5))
+            db.session.add(job)
+        db.session.commit()
+        return manager.job_operations
+
+    def _all_pages(self, operations, **filters):
+        pages, cursor = [], None
+        while True:
+            jobs, cursor = operations.query_jobs(cursor=cursor, **filters)
+            pages.append([job.job_id for job in jobs])
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_job_once(self, jobs):
+        pages = self._all_pages(jobs, limit=3)
+
+        assert pages == [['q-6', 'q-5', 'q-4'], ['q-3', 'q-2', 'q-1'], ['q-0']]
+
+    def test_oldest_first(self, jobs):
+        pages = self._all_pages(jobs, limit=4, newest_first=False)
+
+        assert pages == [['q-0', 'q-1', 'q-2', 'q-3'], ['q-4', 'q-5', 'q-6']]
+
+    def test_filters(self, jobs):
+        assert self._all_pages(jobs, status='failed', limit=2) == [['q-3', 'q-2'], ['q-1', 'q-0']]
+        assert self._all_pages(jobs, task_type='ocr', limit=10) == [['q-5', 'q-3', 'q-1']]
+        assert self._all_pages(jobs, created_after=datetime(2024, 1, 1, 0, 2),
+                               created_before=datetime(2024, 1, 1, 0, 5)) == [['q-4', 'q-3', 'q-2']]
+
+    def test_get_jobs_by_status(self, jobs):
+        assert [job.job_id for job in jobs.get_jobs_by_status(JobStatus.COMPLETED, limit=2)] == ['q-6', 'q-5']
+
+    def test_invalid_cursor(self, jobs):
+        with pytest.raises(ValueError):
+            jobs.query_jobs(cursor='not-a-cursor')
+
+
+class TestUpdateJobStatus:
+    """Test cases for JobStatusManager.update_job_status"""
+
+    def test_valid_lifecycle(self, manager, db):
+        job_id = _job(db, 'life-1')
+
+        assert manager.update_job_status(job_id, JobStatus.PROCESSING, progress=10.0) is True
+        assert manager.update_job_status(job_id, JobStatus.COMPLETED, result={'output_path': '/x.pdf'}) is True
+
+        db.session.expire_all()
+        job = Job.query.filter_by(job_id=job_id).one()
+        assert job.status == 'completed'
+        assert job.progress == 100.0
+        assert job.result == {'output_path': '/x.pdf'}
+
+    def test_invalid_transition_is_not_applied(self, manager, db):
+        job_id = _job(db, 'life-2')
+
+        assert manager.update_job_status(job_id, JobStatus.COMPLETED) is False
+        assert _status(db, job_id) == 'pending'
+
+    def test_second_completion_loses(self, manager, db):
+        job_id = _job(db, 'life-3', JobStatus.PROCESSING.value)
+
+        assert manager.update_job_status(job_id, JobStatus.COMPLETED) is True
+        assert manager.update_job_status(job_id, JobStatus.FAILED, error_message='late') is False
+        assert _status(db, job_id) == 'completed'
+
+    def test_validation_can_be_skipped(self, manager, db):
+        job_id = _job(db, 'life-4', JobStatus.COMPLETED.value)
+
+        assert manager.update_job_status(job_id, JobStatus.FAILED, error_message='forced',
+                                         validate_transition=False) is True
+        assert _status(db, job_id) == 'failed'
+
+    def test_allowed_predecessors(self):
+        assert JobStatusManager._allowed_predecessors('processing') == ['pending', 'failed']
+        assert JobStatusManager._allowed_predecessors('pending') == []
+
+    def test_controller_sets_progress_in_same_update(self, manager, db):
+        job_id = _job(db, 'life-5')
+        controller = JobOperationsController(manager.job_operations, manager)
+
+        assert controller.update_job_status_safely(job_id, JobStatus.PROCESSING, progress=25.0) is True
+
+        db.session.expire_all()
+        assert Job.query.filter_by(job_id=job_id).one().progress == 25.0
+
+
+class TestJobStateBuffer:
+    """Write-behind progress buffering in JobOperationsController"""
+
+    @pytest.fixture
+    def controller(self, manager):
+        controller = JobOperationsController(manager.job_operations, manager)
+        controller.state_buffer = JobStateBuffer(manager.job_operations, flush_interval=3600)
+        return controller
+
+    def _progress(self, db, job_id):
+        db.session.expire_all()
+        return Job.query.filter_by(job_id=job_id).one().progress
+
+    def test_progress_is_coalesced_until_flush(self, controller, db):
+        job_id = _job(db, 'buf-1', JobStatus.PROCESSING.value)
+
+        for progress in (10, 20, 30):
+            assert controller.update_job_progress(job_id, progress) is True
+        assert self._progress(db, job_id) == 0.0
+
+        with patch.object(controller.job_operations, 'write_progress_batch',
+                          wraps=controller.job_operations.write_progress_batch) as write:
+            assert controller.state_buffer.flush() == 1
+        write.assert_called_once_with({job_id: 30.0})
+        assert self._progress(db, job_id) == 30.0
+
+    def test_one_transaction_for_many_jobs(self, controller, db):
+        job_ids = [_job(db, f'buf-many-{i}', JobStatus.PROCESSING.value) for i in range(3)]
+        for i, job_id in enumerate(job_ids):
+            controller.update_job_progress(job_id, 10 * (i + 1))
+
+        assert controller.state_buffer.flush() == 3
+        assert [self._progress(db, job_id) for job_id in job_ids] == [10.0, 20.0, 30.0]
+
+    def test_status_change_takes_buffered_progress(self, controller, db):
+        job_id = _job(db, 'buf-2', JobStatus.PROCESSING.value)
+        controller.update_job_progress(job_id, 40)
+
+        assert controller.update_job_status_safely(job_id, JobStatus.FAILED, error_message='boom') is True
+
+        assert self._progress(db, job_id) == 40.0
+        assert controller.state_buffer.flush() == 0
+
+    def test_late_flush_does_not_touch_finished_job(self, controller, db):
+        job_id = _job(db, 'buf-3', JobStatus.COMPLETED.value)
+        controller.state_buffer.record_progress(job_id, 50.0)
+
+        assert controller.state_buffer.flush() == 0
+
+    def test_flushes_inline_once_interval_passed(self, manager, db):
+        job_id = _job(db, 'buf-4', JobStatus.PROCESSING.value)
+        controller = JobOperationsController(manager.job_operations, manager)
+        controller.state_buffer = JobStateBuffer(manager.job_operations, flush_interval=1e-9)
+
+        controller.update_job_progress(job_id, 55)
+
+        assert self._progress(db, job_id) == 55.0
+
+    def test_write_through_when_disabled(self, manager, db):
+        job_id = _job(db, 'buf-5', JobStatus.PROCESSING.value)
+        controller = JobOperationsController(manager.job_operations, manager)
+        controller.state_buffer = JobStateBuffer(manager.job_operations, flush_interval=0)
+
+        assert controller.update_job_progress(job_id, 70) is True
+        assert self._progress(db, job_id) == 70.0
@@ -0,0 +1,431 @@
+"""Unit tests for OCRService
+
+Tesseract itself is mocked; PyMuPDF and Pillow are required to build and
+inspect the PDFs the service writes.
+"""
+
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from unittest.mock import Mock, patch
+
+import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("PIL")
+
+from src.services import ocr_service as ocr_module
+from src.services.file_management_service import FileManagementService
+from src.services.ocr_service import OCRCheckpointStore, OCRService, SearchablePDFBuilder
+
+
+def _tsv(words):
+    """Build a pytesseract ``image_to_data`` dict for one line of words."""
+    data = {key: [] for key in (
+        "text", "left", "top", "width", "height", "conf", "block_num", "par_num", "line_num"
+    )}
+    for i, word in enumerate(words):
+        data["text"].append(word)
+        data["left"].append(100 + i * 400)
+        data["top"].append(200)
+        data["width"].append(300)
+        data["height"].append(60)
+        data["conf"].append(90)
+        data["block_num"].append(1)
+        data["par_num"].append(1)
+        data["line_num"].append(1)
+    return data
+
+
+class TestOCRService:
+    """Test cases for OCRService"""
+
+    @pytest.fixture
+    def temp_upload_folder(self):
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    @pytest.fixture
+    def ocr_service(self, temp_upload_folder):
+        with patch.object(ocr_module, "OCR_LIBS_AVAILABLE", False):
+            service = OCRService(file_service=FileManagementService(upload_folder=temp_upload_folder))
+        service.render_dpi = 72
+        # Mocks below hand out results in call order
+        service.page_workers = 1
+        return service
+
+    @pytest.fixture
+    def mock_tesseract(self):
+        tesseract = Mock()
+        tesseract.Output.DICT = "dict"
+        with patch.object(ocr_module, "pytesseract", tesseract, create=True), \
+                patch.object(ocr_module, "OCR_LIBS_AVAILABLE", True):
+            yield tesseract
+
+    @pytest.fixture
+    def three_page_pdf(self):
+        return self._blank_pdf(3)
+
+    @staticmethod
+    def _blank_pdf(pages):
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page(width=612, height=792)
+        data = doc.tobytes()
+        doc.close()
+        return data
+
+    # ========================= PAGE OCR TESTS =========================
+
+    def test_page_ocr_returns_text_and_word_boxes(self, ocr_service, mock_tesseract):
+        """A single Tesseract TSV pass yields the text and pixel word boxes"""
+        mock_tesseract.image_to_data.return_value = _tsv(["hello", "world"])
+        page = fitz.open().new_page(width=100, height=100)
+        png = page.get_pixmap().tobytes("png")
+
+        result = ocr_service._perform_page_ocr(png, "eng", "balanced")
+
+        assert result["text"] == "hello world"
+        assert result["words"][0] == [100, 200, 400, 260, "hello"]
+        assert result["mean_confidence"] == 90
+        mock_tesseract.image_to_string.assert_not_called()
+
+    def test_preprocessed_page_boxes_refer_to_original_image(self, ocr_service, mock_tesseract):
+        """Word boxes found on the cropped image are shifted back onto the page"""
+        pytest.importorskip("cv2")
+        from PIL import Image, ImageDraw
+
+        image = Image.new("L", (600, 400), 0)
+        ImageDraw.Draw(image).rectangle([40, 40, 559, 359], fill=255)
+        ImageDraw.Draw(image).rectangle([200, 150, 400, 170], fill=0)
+        mock_tesseract.image_to_data.return_value = _tsv(["hello"])
+
+        result = ocr_service._perform_page_ocr(image, "eng", "balanced", preprocess=True)
+
+        seen = mock_tesseract.image_to_data.call_args[0][0]
+        assert seen.shape[1] < 600
+        assert (result["width"], result["height"]) == (600, 400)
+        # Crop starts at the bar (x=200) less the margin, so "hello" moves right by 190
+        assert result["words"][0][:4] == pytest.approx([290, 200 + 140, 590, 260 + 140], abs=2)
+
+    # ========================= SEARCHABLE PDF TESTS =========================
+
+    def test_searchable_pdf_has_per_page_text_layer(self, ocr_service, mock_tesseract, three_page_pdf):
+        """Each page only carries its own words, placed on their boxes"""
+        mock_tesseract.image_to_data.side_effect = [
+            _tsv(["alpha", "one"]), _tsv(["beta", "two"]), _tsv(["gamma", "three"])
+        ]
+
+        result = ocr_service.process_ocr_data(three_page_pdf, {"outputFormat": "searchable_pdf"}, "scan.pdf")
+
+        assert result["success"] is True
+        assert result["mime_type"] == "application/pdf"
+        with fitz.open(result["output_path"]) as out:
+            assert len(out) == 3
+            texts = [page.get_text() for page in out]
+            assert "alpha" in texts[0] and "beta" not in texts[0]
+            assert "beta" in texts[1] and "alpha" not in texts[1]
+            assert "gamma" in texts[2]
+
+            hit = out[0].search_for("alpha")[0]
+            assert hit.x0 == pytest.approx(100, abs=2)
+            assert hit.x1 == pytest.approx(400, abs=2)
+
+    def test_searchable_pdf_grows_linearly(self, ocr_service, mock_tesseract):
+        """Doubling the page count roughly doubles the text layer, not quadruples it"""
+        words = ["lorem", "ipsum", "dolor", "sit", "amet"]
+        mock_tesseract.image_to_data.side_effect = lambda *a, **k: _tsv(words)
+
+        def text_layer_size(pages):
+            doc = fitz.open()
+            for _ in range(pages):
+                doc.new_page(width=612, height=792)
+            result = ocr_service.process_ocr_data(doc.tobytes(), {}, "scan.pdf")
+            with fitz.open(result["output_path"]) as out:
+                return sum(len(page.get_text()) for page in out)
+
+        assert text_layer_size(20) == 2 * text_layer_size(10)
+
+    def test_text_output_joins_pages(self, ocr_service, mock_tesseract, three_page_pdf):
+        """Plain-text output is written next to the other results"""
+        mock_tesseract.image_to_data.side_effect = [_tsv(["a"]), _tsv(["b"]), _tsv(["c"])]
+
+        result = ocr_service.process_ocr_data(three_page_pdf, {"outputFormat": "text"}, "scan.pdf")
+
+        assert result["success"] is True
+        assert result["mime_type"] == "text/plain"
+        with open(result["output_path"], encoding="utf-8") as f:
+            assert f.read() == "a\nb\nc"
+
+    def test_builder_skips_pages_without_words(self):
+        """Blank pages are copied without a text layer"""
+        src = fitz.open()
+        src.new_page(width=200, height=200)
+        builder = SearchablePDFBuilder()
+        builder.add_pdf_page(src, 0, {"text": "", "words": [], "width": 200, "height": 200})
+
+        assert builder.page_count == 1
+        assert builder.doc[0].get_text() == ""
+
+    # ========================= MULTI-FRAME / BATCH TESTS =========================
+
+    @staticmethod
+    def _tiff(frames, dpi=200):
+        from PIL import Image
+        images = [Image.new("1", (400, 400), 1) for _ in range(frames)]
+        buf = io.BytesIO()
+        images[0].save(buf, format="TIFF", save_all=True, append_images=images[1:], dpi=(dpi, dpi))
+        return buf.getvalue()
+
+    @staticmethod
+    def _png():
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new("RGB", (300, 300), "white").save(buf, format="PNG")
+        return buf.getvalue()
+
+    def test_multi_frame_tiff_ocrs_every_frame(self, ocr_service, mock_tesseract):
+        """A fax TIFF no longer loses every page after the first"""
+        mock_tesseract.image_to_data.side_effect = [_tsv(["one"]), _tsv(["two"]), _tsv(["three"])]
+        progress = []
+
+        result = ocr_service.process_ocr_data(
+            self._tiff(3), {"outputFormat": "text"}, "fax.tiff",
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+
+        assert result["success"] is True
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+        with open(result["output_path"], encoding="utf-8") as f:
+            assert f.read() == "one\ntwo\nthree"
+
+    def test_multi_frame_tiff_searchable_pdf_uses_frame_dpi(self, ocr_service, mock_tesseract):
+        """Each frame becomes a page sized from the TIFF's own resolution"""
+        mock_tesseract.image_to_data.side_effect = lambda *a, **k: _tsv(["fax"])
+
+        result = ocr_service.process_ocr_data(self._tiff(2, dpi=200), {}, "fax.tif")
+
+        with fitz.open(result["output_path"]) as out:
+            assert len(out) == 2
+            assert out[1].rect.width == pytest.approx(400 * 72 / 200)
+            assert "fax" in out[1].get_text()
+
+    def test_zip_batch_produces_one_combined_result(self, ocr_service, mock_tesseract):
+        """Images in a ZIP are OCR'd in name order into a single JSON result"""
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr("b.png", self._png())
+            archive.writestr("a.tiff", self._tiff(2))
+            archive.writestr("notes.txt", "ignored")
+            archive.writestr("__MACOSX/._a.tiff", "ignored")
+        mock_tesseract.image_to_data.side_effect = [_tsv(["a1"]), _tsv(["a2"]), _tsv(["b"])]
+
+        result = ocr_service.process_ocr_data(buf.getvalue(), {"outputFormat": "json"}, "batch.zip")
+
+        assert result["success"] is True
+        with open(result["output_path"], encoding="utf-8") as f:
+            output = json.load(f)
+        assert output["text"] == "a1\na2\nb"
+        assert [page["source"] for page in output["pages"]] == ["a.tiff#1", "a.tiff#2", "b.png"]
+
+    def test_parallel_pages_keep_page_order(self, ocr_service, mock_tesseract):
+        """Pages OCR'd concurrently are checkpointed and reported in page order"""
+        from PIL import Image
+        ocr_service.page_workers = 3
+        delays = {1: 0.1, 2: 0.05, 3: 0.0, 4: 0.02}
+
+        def ocr_frame(image, *args, **kwargs):
+            page = image.size[0] // 100
+            time.sleep(delays[page])
+            return _tsv([f"p{page}"])
+        mock_tesseract.image_to_data.side_effect = ocr_frame
+        frames = [Image.new("L", (100 * page, 100), 255) for page in delays]
+        buf = io.BytesIO()
+        frames[0].save(buf, format="TIFF", save_all=True, append_images=frames[1:])
+        progress, saved = [], []
+        save = OCRCheckpointStore.save
+
+        def record_save(store, number, page_ocr):
+            saved.append(number)
+            save(store, number, page_ocr)
+        with patch.object(OCRCheckpointStore, "save", record_save):
+            result = ocr_service.process_ocr_data(
+                buf.getvalue(), {"outputFormat": "text"}, "fax.tiff",
+                progress_callback=lambda done, total: progress.append(done),
+            )
+
+        assert result["success"] is True
+        assert saved == [0, 1, 2, 3]
+        assert progress == [1, 2, 3, 4]
+        with open(result["output_path"], encoding="utf-8") as f:
+            assert f.read() == "p1\np2\np3\np4"
+
+    def test_zip_batch_without_images_fails(self, ocr_service, mock_tesseract):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as archive:
+            archive.writestr("readme.txt", "no images here")
+
+        result = ocr_service.process_ocr_data(buf.getvalue(), {}, "batch.zip")
+
+        assert result["success"] is False
+        assert "no supported images" in result["error"]
+
+    # ========================= PREVIEW TESTS =========================
+
+    def test_preview_extrapolates_measured_sample(self, ocr_service, mock_tesseract):
+        """Two sample pages are timed and scaled up to the full document"""
+        def slow_page(*args, **kwargs):
+            time.sleep(0.05)
+            return _tsv(["sample"])
+        mock_tesseract.image_to_data.side_effect = slow_page
+
+        preview = ocr_service.get_ocr_preview(self._blank_pdf(9), {"quality": "fast"})
+
+        assert preview["success"] is True
+        assert preview["estimate_method"] == "measured"
+        assert preview["page_count"] == 9
+        assert preview["sample"]["pages_sampled"] == 2
+        assert preview["sample"]["seconds_per_page"] >= 0.05
+        assert preview["estimated_time"] == math.ceil(preview["sample"]["seconds_per_page"] * 9)
+        assert preview["estimated_accuracy"] == 0.9
+
+    def test_preview_respects_time_budget(self, ocr_service, mock_tesseract):
+        """Tesseract is killed at the budget and the overrun is reported"""
+        mock_tesseract.image_to_data.side_effect = RuntimeError("Tesseract process timeout")
+
+        preview = ocr_service.get_ocr_preview(self._blank_pdf(4), {"time_budget": 2})
+
+        assert mock_tesseract.image_to_data.call_count == 1
+        assert 0 < mock_tesseract.image_to_data.call_args.kwargs["timeout"] <= 2
+        assert preview["estimate_method"] == "measured"
+        assert preview["sample"]["budget_exceeded"] is True
+        assert preview["sample"]["mean_confidence"] is None
+
+    def test_preview_budget_covers_rendering_and_preprocessing(self, ocr_service, mock_tesseract):
+        """Time spent before Tesseract counts against the budget"""
+        mock_tesseract.image_to_data.side_effect = lambda *a, **k: _tsv(["x"])
+        render = ocr_service._render_page
+
+        def slow_render(*args, **kwargs):
+            time.sleep(0.3)
+            return render(*args, **kwargs)
+        with patch.object(ocr_service, "_render_page", side_effect=slow_render):
+            preview = ocr_service.get_ocr_preview(self._blank_pdf(4), {"time_budget": 0.2})
+
+        mock_tesseract.image_to_data.assert_not_called()
+        assert preview["sample"]["budget_exceeded"] is True
+        assert preview["sample"]["seconds_per_page"] >= 0.3
+
+        with patch.object(ocr_service, "_render_page", side_effect=slow_render):
+            ocr_service.get_ocr_preview(self._blank_pdf(4), {"time_budget": 1})
+
+        assert 0 < mock_tesseract.image_to_data.call_args.kwargs["timeout"] <= 0.7
+
+    def test_preview_pages_seed_job_checkpoints(self, ocr_service, mock_tesseract):
+        """The job that follows a preview does not OCR the sampled pages again"""
+        data = self._blank_pdf(6)
+        mock_tesseract.image_to_data.side_effect = lambda *a, **k: _tsv(["x"])
+        ocr_service.get_ocr_preview(data, {"outputFormat": "text"})
+        mock_tesseract.image_to_data.reset_mock()
+
+        ocr_service.process_ocr_data(data, {"outputFormat": "text"}, "scan.pdf")
+
+        assert mock_tesseract.image_to_data.call_count == 4
+
+    def test_preview_falls_back_to_heuristics(self, ocr_service):
+        """Without Tesseract the constant-based estimate is still returned"""
+        with patch.object(ocr_module, "OCR_LIBS_AVAILABLE", False):
+            preview = ocr_service.get_ocr_preview(self._blank_pdf(4), {})
+
+        assert preview["success"] is True
+        assert preview["estimate_method"] == "heuristic"
+        assert preview["estimated_time"] == 20
+
+    # ========================= CHECKPOINT TESTS =========================
+
+    def test_interrupted_job_resumes_from_first_missing_page(self, ocr_service, mock_tesseract, three_page_pdf):
+        """A re-run only OCRs the pages that were not checkpointed"""
+        mock_tesseract.image_to_data.side_effect = [_tsv(["a"]), _tsv(["b"]), RuntimeError("soft time limit")]
+
+        first = ocr_service.process_ocr_data(three_page_pdf, {"outputFormat": "text"}, "scan.pdf")
+        assert first["success"] is False
+        assert first["pages_completed"] == 2
+
+        mock_tesseract.image_to_data.reset_mock()
+        mock_tesseract.image_to_data.side_effect = [_tsv(["c"])]
+        progress = []
+        second = ocr_service.process_ocr_data(
+            three_page_pdf, {"outputFormat": "text"}, "scan.pdf",
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+
+        assert second["success"] is True
+        assert mock_tesseract.image_to_data.call_count == 1
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+        with open(second["output_path"], encoding="utf-8") as f:
+            assert f.read() == "a\nb\nc"
+
+    def test_resume_does_not_decode_checkpointed_frames(self, ocr_service, mock_tesseract):
+        """Frames whose pages are checkpointed are not decoded again for text output"""
+        from PIL import Image
+        data, opts = self._tiff(3), {"outputFormat": "text"}
+        checkpoint = ocr_service._checkpoint_for(data, opts)
+        checkpoint.save(0, {"text": "one"})
+        checkpoint.save(1, {"text": "two"})
+        mock_tesseract.image_to_data.side_effect = [_tsv(["three"])]
+
+        original_convert = Image.Image.convert
+        with patch.object(Image.Image, "convert", autospec=True, side_effect=original_convert) as convert:
+            result = ocr_service.process_ocr_data(data, opts, "fax.tiff")
+
+        assert convert.call_count == 1
+        with open(result["output_path"], encoding="utf-8") as f:
+            assert f.read() == "one\ntwo\nthree"
+
+    def test_time_limit_is_raised_for_retry(self, ocr_service, mock_tesseract, three_page_pdf):
+        """An interrupted run is re-raised (the task retries); other errors are returned"""
+        mock_tesseract.image_to_data.side_effect = [_tsv(["a"]), SoftTimeLimitExceeded()]
+
+        with pytest.raises(SoftTimeLimitExceeded):
+            ocr_service.process_ocr_data(three_page_pdf, {"outputFormat": "text"}, "scan.pdf")
+
+        mock_tesseract.image_to_data.side_effect = [RuntimeError("bad language")]
+        result = ocr_service.process_ocr_data(three_page_pdf, {"outputFormat": "text"}, "scan.pdf")
+        assert result["success"] is False
+        assert result["pages_completed"] == 1
+
+    def test_checkpoints_removed_after_success(self, ocr_service, mock_tesseract, three_page_pdf):
+        """Successful jobs leave no checkpoint folder behind"""
+        mock_tesseract.image_to_data.side_effect = lambda *a, **k: _tsv(["x"])
+
+        ocr_service.process_ocr_data(three_page_pdf, {"outputFormat": "text"}, "scan.pdf")
+
+        assert os.listdir(ocr_service.checkpoint_root) == []
+
+    def test_checkpoint_key_depends_on_settings(self):
+        """Changing language or quality must not reuse another run's pages"""
+        key = OCRCheckpointStore.make_key(b"doc", "eng", "fast", 300)
+        assert key != OCRCheckpointStore.make_key(b"doc", "deu", "fast", 300)
+        assert key != OCRCheckpointStore.make_key(b"doc", "eng", "accurate", 300)
+        assert key == OCRCheckpointStore.make_key(b"doc", "eng", "fast", 300)
+        assert key != OCRCheckpointStore.make_key(b"doc", "eng", "fast", 300, preprocess=True)
+
+    def test_cleanup_checkpoints_purges_stale_folders(self, ocr_service):
+        """Abandoned checkpoint folders are purged by age"""
+        store = OCRCheckpointStore(ocr_service.checkpoint_root, "stale")
+        store.save(0, {"text": "x"})
+        old = time.time() - 48 * 3600
+        os.utime(store.path, (old, old))
+        OCRCheckpointStore(ocr_service.checkpoint_root, "fresh")
+
+        result = ocr_service.cleanup_checkpoints()
+
+        assert result == {"checkpoints_removed": 1}
+        assert os.listdir(ocr_service.checkpoint_root) == ["fresh"]
@@ -0,0 +1,36 @@
+"""Tests for the PostgreSQL engine profile"""
+
+from src.database.postgres_profile import is_postgres, postgres_engine_options
+
+
+class TestPostgresProfile:
+    """Test cases for the PostgreSQL engine profile"""
+
+    def test_is_postgres(self):
+        assert is_postgres('postgresql://user@localhost/jobs') is True
+        assert is_postgres('postgresql+psycopg2://user@localhost/jobs') is True
+        assert is_postgres('sqlite:////var/app/jobs.db') is False
+
+    def test_engine_options(self):
+        options = postgres_engine_options('postgresql://user@localhost/jobs',
+                                          {'pool_recycle': 300, 'max_overflow': 0})
+
+        assert options['pool_size'] == 10
+        assert options['max_overflow'] == 10
+        assert options['pool_recycle'] == 300
+        assert options['pool_pre_ping'] is True
+        connect_args = options['connect_args']
+        assert connect_args['connect_timeout'] == 10
+        assert connect_args['options'] == ('-c statement_timeout=30000 -c lock_timeout=5000 '
+                                           '-c idle_in_transaction_session_timeout=60000 -c timezone=UTC')
+
+    def test_explicit_connect_args_win(self):
+        options = postgres_engine_options('postgresql://user@localhost/jobs',
+                                          {'connect_args': {'application_name': 'celery'}})
+
+        assert options['connect_args']['application_name'] == 'celery'
+
+    def test_other_databases_untouched(self):
+        options = {'pool_pre_ping': True}
+
+        assert postgres_engine_options('sqlite:///:memory:', options) is options
@@ -0,0 +1,103 @@
+"""Tests for the RAM-backed scratch tier"""
+
+import errno
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.services.file_management_service import FileManagementService
+from src.services.scratch_space import ScratchSpace, create_scratch_space
+
+
+@pytest.fixture
+def temp_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def scratch(temp_dir):
+    return ScratchSpace(os.path.join(temp_dir, 'scratch'), max_bytes=100)
+
+
+class TestScratchSpace:
+    """Test cases for ScratchSpace"""
+
+    def test_write_within_cap(self, scratch):
+        path = scratch.write('a.pdf', b'x' * 60)
+
+        assert path == scratch.path_for('a.pdf')
+        assert scratch.contains(path)
+        assert scratch.used_bytes() == 60
+
+    def test_write_over_cap_returns_none(self, scratch):
+        scratch.write('a.pdf', b'x' * 60)
+
+        assert scratch.write('b.pdf', b'x' * 60) is None
+        assert not os.path.exists(scratch.path_for('b.pdf'))
+
+    def test_enospc_returns_none_and_removes_partial(self, scratch):
+        with patch('builtins.open', side_effect=OSError(errno.ENOSPC, 'No space left on device')):
+            assert scratch.write('a.pdf', b'x') is None
+        assert not os.path.exists(scratch.path_for('a.pdf'))
+
+    def test_cleanup_removes_old_files_only(self, scratch):
+        old = scratch.write('old.pdf', b'x' * 10)
+        new = scratch.write('new.pdf', b'x' * 10)
+        stale = time.time() - 7200
+        os.utime(old, (stale, stale))
+
+        summary = scratch.cleanup(3600)
+
+        assert summary['files_deleted'] == 1
+        assert not os.path.exists(old)
+        assert os.path.exists(new)
+
+    def test_factory_disabled_by_default(self):
+        with patch('src.services.scratch_space.Config') as mock_config:
+            mock_config.SCRATCH_DIR = ''
+            mock_config.SCRATCH_MAX_MB = 256
+            assert create_scratch_space() is None
+
+
+class TestScratchTempFiles:
+    """FileManagementService routes 'temp' saves to the scratch tier"""
+
+    @pytest.fixture
+    def service(self, temp_dir, scratch):
+        return FileManagementService(upload_folder=os.path.join(temp_dir, 'uploads'),
+                                     content_addressed=False, scratch=scratch)
+
+    def test_temp_files_go_to_scratch(self, service, scratch):
+        file_id, path = service.save_file(b'%PDF temp', 'preview.pdf', kind='temp')
+
+        assert scratch.contains(path)
+        assert service.get_file_path(file_id, kind='temp') == path
+        assert service.delete_file(path) is True
+        assert not os.path.exists(path)
+
+    def test_other_kinds_stay_on_disk(self, service, scratch):
+        _, path = service.save_file(b'%PDF input', 'in.pdf', kind='inputs')
+
+        assert not scratch.contains(path)
+        assert path.startswith(service.upload_folder)
+
+    def test_falls_back_to_disk_when_full(self, service, scratch):
+        _, path = service.save_file(b'x' * 500, 'big.pdf', kind='temp')
+
+        assert not scratch.contains(path)
+        assert os.path.exists(path)
+        assert path.startswith(os.path.join(service.upload_folder, 'temp'))
+
+    def test_content_addressed_temp_files_skip_blobs(self, temp_dir, scratch):
+        service = FileManagementService(upload_folder=os.path.join(temp_dir, 'uploads'),
+                                        content_addressed=True, scratch=scratch)
+
+        _, path = service.save_file(b'%PDF temp', 'a.pdf', kind='temp')
+
+        assert scratch.contains(path)
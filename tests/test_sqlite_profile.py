@@ -0,0 +1,84 @@
+"""Tests for the SQLite engine profile"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.database.sqlite_profile import (
+    configure_sqlite_engine, incremental_vacuum, is_sqlite_file, sqlite_engine_options
+)
+
+
+@pytest.fixture
+def db_url():
+    directory = tempfile.mkdtemp()
+    yield f"sqlite:///{os.path.join(directory, 'jobs.db')}"
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestSqliteProfile:
+    """Test cases for the SQLite engine profile"""
+
+    def test_is_sqlite_file(self):
+        assert is_sqlite_file('sqlite:////var/app/jobs.db') is True
+        assert is_sqlite_file('sqlite:///:memory:') is False
+        assert is_sqlite_file('sqlite://') is False
+        assert is_sqlite_file('postgresql://user@localhost/jobs') is False
+
+    def test_pragmas_applied_on_connect(self, db_url):
+        engine = create_engine(db_url, **sqlite_engine_options(db_url, {}))
+        configure_sqlite_engine(engine)
+
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            # NORMAL
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1
+            assert conn.execute(text('PRAGMA cache_size')).scalar() == -64 * 1024
+        engine.dispose()
+
+    def test_engine_options_for_file_database(self, db_url):
+        options = sqlite_engine_options(db_url, {'pool_pre_ping': True, 'max_overflow': 2})
+
+        assert options['pool_size'] == 5
+        assert options['max_overflow'] == 2
+        assert options['pool_pre_ping'] is True
+        assert options['connect_args'] == {'timeout': 5.0, 'check_same_thread': False}
+
+    def test_in_memory_database_untouched(self):
+        options = {'pool_pre_ping': True}
+
+        assert sqlite_engine_options('sqlite:///:memory:', options) is options
+
+    def test_in_memory_engine_skips_wal(self):
+        engine = create_engine('sqlite://')
+        configure_sqlite_engine(engine)
+
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'memory'
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        engine.dispose()
+
+    def test_incremental_vacuum_returns_free_pages(self, db_url):
+        engine = create_engine(db_url, **sqlite_engine_options(db_url, {}))
+        configure_sqlite_engine(engine)
+        with engine.begin() as conn:
+            assert conn.execute(text('PRAGMA auto_vacuum')).scalar() == 2
+            conn.execute(text('CREATE TABLE t (x TEXT)'))
+            conn.execute(text("INSERT INTO t VALUES (:x)"), [{'x': 'x' * 1000}] * 500)
+        with engine.begin() as conn:
+            conn.execute(text('DELETE FROM t'))
+
+        assert incremental_vacuum(engine, 50) == 50
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA freelist_count')).scalar() > 0
+        engine.dispose()
+
+    def test_incremental_vacuum_skips_other_modes(self):
+        engine = create_engine('sqlite://')
+
+        assert incremental_vacuum(engine, 50) == 0
+        engine.dispose()
@@ -0,0 +1,343 @@
+"""Tests for storage backends, result publishing and downloads
+
+The S3 backend is exercised against moto when it is installed; the request
+shape (prefixes, Range headers) is checked with a stand-in client either way.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+from flask import Flask
+
+from src.services.file_management_service import FileManagementService
+from src.services.storage_backends import (
+    LocalStorageBackend, S3StorageBackend, create_storage_backend
+)
+
+
+class RemoteDirBackend(LocalStorageBackend):
+    """A directory that behaves like a remote store (no local paths)"""
+
+    is_local = False
+
+    def local_path(self, key):
+        return None
+
+
+@pytest.fixture
+def temp_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class TestLocalStorageBackend:
+    """Test cases for LocalStorageBackend"""
+
+    @pytest.fixture
+    def backend(self, temp_dir):
+        return LocalStorageBackend(temp_dir)
+
+    def test_put_file_in_place_is_noop(self, backend, temp_dir):
+        path = os.path.join(temp_dir, 'results', 'ab', 'out.pdf')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(b'data')
+        inode = os.stat(path).st_ino
+
+        backend.put_file('results/ab/out.pdf', path)
+
+        assert os.stat(path).st_ino == inode
+        assert backend.local_path('results/ab/out.pdf') == path
+
+    def test_put_file_moves_without_copying(self, backend, temp_dir):
+        source = os.path.join(temp_dir, 'scratch.pdf')
+        with open(source, 'wb') as f:
+            f.write(b'data')
+        inode = os.stat(source).st_ino
+
+        backend.put_file('results/cd/out.pdf', source)
+
+        assert not os.path.exists(source)
+        assert os.stat(backend.path_for('results/cd/out.pdf')).st_ino == inode
+
+    def test_put_stream_and_size(self, backend):
+        backend.put_stream('results/x.bin', io.BytesIO(b'0123456789'))
+
+        assert backend.size('results/x.bin') == 10
+        assert backend.exists('results/x.bin')
+        assert backend.size('results/missing.bin') is None
+
+    def test_iter_range(self, backend):
+        backend.put_stream('r.bin', io.BytesIO(b'0123456789'))
+
+        assert b''.join(backend.iter_range('r.bin')) == b'0123456789'
+        assert b''.join(backend.iter_range('r.bin', 2, 5)) == b'2345'
+        assert b''.join(backend.iter_range('r.bin', 7)) == b'789'
+        assert list(backend.iter_range('r.bin', 0, 9, chunk_size=4)) == [b'0123', b'4567', b'89']
+
+    def test_get_file_and_delete(self, backend, temp_dir):
+        backend.put_stream('a/b.bin', io.BytesIO(b'abc'))
+        target = os.path.join(temp_dir, 'copy.bin')
+
+        backend.get_file('a/b.bin', target)
+        with open(target, 'rb') as f:
+            assert f.read() == b'abc'
+
+        assert backend.delete('a/b.bin') is True
+        assert backend.delete('a/b.bin') is False
+        assert backend.local_path('a/b.bin') is None
+
+    def test_rejects_keys_outside_root(self, backend):
+        with pytest.raises(ValueError):
+            backend.path_for('../etc/passwd')
+
+
+class TestS3StorageBackend:
+    """Request shape of S3StorageBackend using a stand-in client"""
+
+    @pytest.fixture
+    def client(self):
+        return Mock()
+
+    @pytest.fixture
+    def backend(self, client):
+        return S3StorageBackend('bucket', prefix='/results-store/', client=client)
+
+    def test_prefixes_keys(self, backend, client, temp_dir):
+        source = os.path.join(temp_dir, 'out.pdf')
+        with open(source, 'wb') as f:
+            f.write(b'data')
+
+        backend.put_file('results/ab/out.pdf', source)
+
+        args = client.upload_file.call_args[0]
+        assert args == (source, 'bucket', 'results-store/results/ab/out.pdf')
+        assert not os.path.exists(source)
+
+    def test_ranged_get(self, backend, client):
+        body = Mock()
+        body.iter_chunks.return_value = iter([b'23', b'45'])
+        client.get_object.return_value = {'Body': body}
+
+        assert b''.join(backend.iter_range('k', 2, 5)) == b'2345'
+        client.get_object.assert_called_once_with(
+            Bucket='bucket', Key='results-store/k', Range='bytes=2-5'
+        )
+        body.close.assert_called_once()
+
+    def test_open_ended_range(self, backend, client):
+        body = Mock()
+        body.iter_chunks.return_value = iter([])
+        client.get_object.return_value = {'Body': body}
+
+        list(backend.iter_range('k', 100))
+        assert client.get_object.call_args[1]['Range'] == 'bytes=100-'
+
+    def test_requires_bucket(self, client):
+        with pytest.raises(ValueError):
+            S3StorageBackend('', client=client)
+
+    def test_factory_defaults_to_local(self, temp_dir):
+        with patch('src.services.storage_backends.Config') as mock_config:
+            mock_config.STORAGE_BACKEND = 'local'
+            backend = create_storage_backend(temp_dir)
+        assert isinstance(backend, LocalStorageBackend)
+        assert backend.root == temp_dir
+
+
+class TestS3StorageBackendMoto:
+    """S3StorageBackend against moto's in-memory S3"""
+
+    @pytest.fixture
+    def backend(self):
+        moto = pytest.importorskip('moto')
+        boto3 = pytest.importorskip('boto3')
+        mock_aws = getattr(moto, 'mock_aws', None) or moto.mock_s3
+        with mock_aws():
+            client = boto3.client('s3', region_name='us-east-1')
+            client.create_bucket(Bucket='results')
+            yield S3StorageBackend('results', prefix='pdf', client=client,
+                                   multipart_threshold=5 * 1024 * 1024,
+                                   multipart_chunksize=5 * 1024 * 1024)
+
+    def test_multipart_upload_and_ranged_read(self, backend, temp_dir):
+        data = os.urandom(11 * 1024 * 1024)
+        source = os.path.join(temp_dir, 'big.pdf')
+        with open(source, 'wb') as f:
+            f.write(data)
+
+        backend.put_file('results/aa/big.pdf', source)
+
+        assert not os.path.exists(source)
+        assert backend.size('results/aa/big.pdf') == len(data)
+        assert b''.join(backend.iter_range('results/aa/big.pdf', 1000, 1999)) == data[1000:2000]
+
+    def test_missing_object_and_delete(self, backend):
+        assert backend.size('nope') is None
+        backend.put_stream('k', io.BytesIO(b'abc'))
+        assert backend.delete('k') is True
+        assert backend.delete('k') is False
+
+
+class TestPublishResult:
+    """Publishing job outputs through FileManagementService"""
+
+    @pytest.fixture
+    def remote_dir(self):
+        path = tempfile.mkdtemp()
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _write_result(self, service, name='out.pdf', data=b'%PDF result'):
+        path = service.create_output_path(name)
+        with service.open_output(path) as f:
+            f.write(data)
+        return path
+
+    def test_local_backend_keeps_file_in_place(self, temp_dir):
+        service = FileManagementService(upload_folder=temp_dir)
+        path = self._write_result(service)
+
+        result = service.publish_result({'output_path': path, 'mime_type': 'application/pdf'})
+
+        assert result['output_path'] == path
+        assert result['output_key'] == service.storage_key(path)
+        assert service.storage.local_path(result['output_key']) == os.path.abspath(path)
+
+    def test_remote_backend_takes_file(self, temp_dir, remote_dir):
+        service = FileManagementService(upload_folder=temp_dir, storage=RemoteDirBackend(remote_dir))
+        path = self._write_result(service)
+
+        result = service.publish_result({'output_path': path})
+
+        assert 'output_path' not in result
+        assert not os.path.exists(path)
+        assert service.storage.size(result['output_key']) == len(b'%PDF result')
+
+    def test_paths_outside_upload_folder_are_left_alone(self, temp_dir, remote_dir):
+        service = FileManagementService(upload_folder=temp_dir, storage=RemoteDirBackend(remote_dir))
+        outside = os.path.join(remote_dir, 'elsewhere.pdf')
+        with open(outside, 'wb') as f:
+            f.write(b'x')
+
+        assert service.publish_result({'output_path': outside}) == {'output_path': outside}
+
+    def test_download_streams_remote_object(self, temp_dir, remote_dir):
+        service = FileManagementService(upload_folder=temp_dir, storage=RemoteDirBackend(remote_dir))
+        result = service.publish_result({
+            'output_path': self._write_result(service),
+            'original_filename': 'report.pdf',
+            'mime_type': 'application/pdf',
+        })
+        job = Mock()
+        job.is_completed.return_value = True
+        job.result = result
+
+        with patch('src.services.file_management_service.Job') as mock_job_query:
+            mock_job_query.query.filter_by.return_value.first.return_value = job
+            assert service.is_download_available('job-1') is True
+            with Flask(__name__).test_request_context():
+                response = service.get_job_download_response('job-1')
+                body = b''.join(response.response)
+
+        assert body == b'%PDF result'
+        assert response.headers['Content-Length'] == str(len(body))
+        assert 'report.pdf' in response.headers['Content-Disposition']
+
+
+class TestDownloadResponses:
+    """Range, ETag and X-Accel-Redirect handling for result downloads"""
+
+    DATA = b'0123456789' * 10
+
+    @pytest.fixture
+    def remote_dir(self):
+        path = tempfile.mkdtemp()
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+
+    def _publish(self, service):
+        path = service.create_output_path('report.pdf')
+        with service.open_output(path) as f:
+            f.write(self.DATA)
+        return service.publish_result({
+            'output_path': path,
+            'original_filename': 'report.pdf',
+            'mime_type': 'application/pdf',
+        })
+
+    def _download(self, service, result, headers=None):
+        job = Mock()
+        job.is_completed.return_value = True
+        job.result = result
+        with patch('src.services.file_management_service.Job') as mock_job_query:
+            mock_job_query.query.filter_by.return_value.first.return_value = job
+            with Flask(__name__).test_request_context(headers=headers or {}):
+                response = service.get_job_download_response('job-1')
+                response.direct_passthrough = False
+                body = response.get_data()
+        return response, body
+
+    @pytest.fixture
+    def remote_service(self, temp_dir, remote_dir):
+        return FileManagementService(upload_folder=temp_dir, storage=RemoteDirBackend(remote_dir))
+
+    def test_remote_range_request(self, remote_service):
+        response, body = self._download(remote_service, self._publish(remote_service),
+                                        {'Range': 'bytes=10-19'})
+
+        assert response.status_code == 206
+        assert body == self.DATA[10:20]
+        assert response.headers['Content-Range'] == f'bytes 10-19/{len(self.DATA)}'
+        assert response.headers['Content-Length'] == '10'
+
+    def test_remote_if_none_match_returns_304(self, remote_service):
+        result = self._publish(remote_service)
+        first, _ = self._download(remote_service, result)
+        etag = first.headers['ETag']
+
+        response, body = self._download(remote_service, result, {'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert body == b''
+
+    def test_remote_stale_if_range_sends_whole_file(self, remote_service):
+        response, body = self._download(remote_service, self._publish(remote_service),
+                                        {'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+
+        assert response.status_code == 200
+        assert body == self.DATA
+
+    def test_remote_unsatisfiable_range(self, remote_service):
+        response, _ = self._download(remote_service, self._publish(remote_service),
+                                     {'Range': 'bytes=500-600'})
+
+        assert response.status_code == 416
+        assert response.headers['Content-Range'] == f'bytes */{len(self.DATA)}'
+
+    def test_direct_local_range_request(self, temp_dir):
+        service = FileManagementService(upload_folder=temp_dir)
+
+        response, body = self._download(service, self._publish(service), {'Range': 'bytes=-5'})
+
+        assert response.status_code == 206
+        assert body == self.DATA[-5:]
+        assert 'ETag' in response.headers
+
+    def test_accel_mode_hands_off_to_nginx(self, temp_dir):
+        service = FileManagementService(upload_folder=temp_dir)
+        result = self._publish(service)
+
+        with patch('src.services.file_management_service.Config') as mock_config:
+            mock_config.DOWNLOAD_MODE = 'accel'
+            mock_config.ACCEL_REDIRECT_PREFIX = '/protected-downloads/'
+            response, body = self._download(service, result)
+
+        assert response.headers['X-Accel-Redirect'] == f"/protected-downloads/{result['output_key']}"
+        assert 'report.pdf' in response.headers['Content-Disposition']
+        assert body == b''
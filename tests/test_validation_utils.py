@@ -1,5 +1,6 @@
 """Unit tests for validation utilities"""
 import pytest
+import io
 import tempfile
 import os
 from unittest.mock import Mock, patch, MagicMock
@@ -240,6 +241,20 @@ class TestFileContentValidation:
             result = validate_file_content(text_data, 'test.pdf')
             assert result['valid'] is False
     
+    def test_validate_file_content_allowed_image_types(self):
+        """Feature-specific MIME types let image uploads through"""
+        Image = pytest.importorskip('PIL.Image')
+        buf = io.BytesIO()
+        Image.new('L', (8, 8)).save(buf, format='PNG')
+        png_data = buf.getvalue()
+
+        assert validate_file_content(png_data, 'scan.png')['valid'] is False
+
+        result = validate_file_content(png_data, 'scan.png', {'application/pdf', 'image/png'})
+        assert result['valid'] is True
+        assert result['file_type'] == 'image/png'
+        assert result['warnings'] == []
+
     def test_check_pdf_security(self):
         """Test PDF security checks"""
         # Test encrypted PDF
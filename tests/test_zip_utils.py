@@ -0,0 +1,52 @@
+"""Unit tests for ZIP helpers"""
+import io
+import os
+import zipfile
+
+from src.utils.zip_utils import ZipEntry, iter_zip_stream, unique_arcname, zip_compression_for
+
+
+class TestZipCompressionFor:
+    """Test per-entry compression selection"""
+
+    def test_compressed_formats_are_stored(self):
+        for name in ('a.pdf', 'b.PNG', 'c.jpeg', 'd.docx'):
+            assert zip_compression_for(name) == (zipfile.ZIP_STORED, None)
+
+    def test_text_is_deflated(self):
+        for name in ('a.txt', 'b.json', 'c.csv', 'noext'):
+            assert zip_compression_for(name)[0] == zipfile.ZIP_DEFLATED
+
+
+class TestUniqueArcname:
+    """Test duplicate member names get numbered"""
+
+    def test_numbers_duplicates(self):
+        used = set()
+        names = [unique_arcname('report.pdf', used) for _ in range(3)]
+        assert names == ['report.pdf', 'report (1).pdf', 'report (2).pdf']
+
+
+class TestIterZipStream:
+    """Test archives built on the fly"""
+
+    def test_stream_is_valid_archive(self):
+        data = os.urandom(300_000)
+        entries = [
+            ZipEntry('scan.pdf', [data[:100_000], data[100_000:]], len(data)),
+            ZipEntry('notes.txt', iter([b'hello ' * 1000])),
+        ]
+
+        chunks = list(iter_zip_stream(entries))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+        assert len(chunks) > 1
+        assert archive.testzip() is None
+        assert archive.read('scan.pdf') == data
+        assert archive.getinfo('scan.pdf').compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo('notes.txt').compress_type == zipfile.ZIP_DEFLATED
+        assert archive.getinfo('notes.txt').compress_size < 1000
+
+    def test_empty_stream(self):
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_zip_stream([]))))
+        assert archive.namelist() == []